@@ -1,19 +1,157 @@
-import pandas as pd
+import functools
+import itertools
+import json
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Iterator
 
 import uvicorn
+from fastapi import BackgroundTasks
 from fastapi import FastAPI
 from fastapi import File
+from fastapi import HTTPException
+from fastapi import Request
+from fastapi import Response
 from fastapi import UploadFile
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import pandas as pd
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from threadpoolctl import threadpool_limits
+
+try:
+    # быстрая сериализация больших ответов (необязательная зависимость)
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as BatchResponse
+except ImportError:
+    BatchResponse = JSONResponse
 
-from src.pipeline.pipeline import pipeline_training
-from src.evaluate.evaluate import pipeline_evaluate
+from src.data.get_data import get_dataset
+from src.evaluate.batching import MicroBatcher
+from src.evaluate.cache import (
+    PredictionCache,
+    canonical_frame_keys,
+    canonical_keys,
+    feature_casts,
+)
+from src.evaluate.evaluate import (
+    pipeline_evaluate,
+    pipeline_evaluate_chunks,
+    predict_scores,
+    validate_dataset,
+)
+from src.jobs.jobs import TrainingJobs
+from src.monitoring.drift import DriftMonitor
+from src.monitoring.metrics import (
+    PREDICTION_ROWS,
+    REGISTRY,
+    REQUEST_SECONDS,
+    REQUESTS,
+    stage_timer,
+)
+from src.monitoring.workers import WorkerStates
+from src.registry.registry import ArtifactRegistry, load_config
+from src.transform.encoder import EncodingError
+from src.transform.validation import encode_binary, expand_rows, validate_features
 
 # import warnings
 # warnings.filterwarnings("ignore")
 
-app = FastAPI()
-CONFIG_PATH = "../config/params.yaml"
+# путь до конфигурации можно переопределить (например, для бенчмарков)
+CONFIG_PATH = os.environ.get("CONFIG_PATH", "../config/params.yaml")
+config = load_config(CONFIG_PATH)
+registry = ArtifactRegistry(config_path=CONFIG_PATH)
+training_jobs = TrainingJobs(config_path=CONFIG_PATH, **config["jobs"])
+VERSION_HEADER = config["serving"]["version_header"]
+
+# кэш предсказаний (опционально), записи неактивных версий удаляются
+# после смены маршрутизации
+prediction_cache = None
+cache_config = config["evaluate"]["cache"]
+if cache_config["enabled"]:
+    prediction_cache = PredictionCache(
+        max_entries=cache_config["max_entries"],
+        ttl_seconds=cache_config["ttl_seconds"],
+    )
+    registry.listeners.append(prediction_cache.retain)
+upload_config = config["evaluate"]["upload"]
+# проверка значений признаков по схеме train: строки с ошибками
+# не предсказываются и не прерывают запрос
+validation_config = config["evaluate"]["validation"]
+
+# мониторинг сдвига данных в запросах (опционально)
+drift_monitor = None
+drift_config = config["monitoring"]["drift"]
+if drift_config["enabled"]:
+    drift_monitor = DriftMonitor(
+        min_rows=drift_config["min_rows"],
+        psi_warning=drift_config["psi_warning"],
+        psi_alert=drift_config["psi_alert"],
+    )
+    registry.listeners.append(drift_monitor.retain)
+
+
+def worker_state() -> dict:
+    """
+    Состояние мониторинга процесса для объединения с другими воркерами
+    """
+    return {
+        "metrics": REGISTRY.state(),
+        "drift": drift_monitor.state() if drift_monitor is not None else {},
+        "batching": batcher.state() if batcher is not None else {},
+        "cache": prediction_cache.state() if prediction_cache is not None else None,
+    }
+
+
+# метрики, сдвиг данных и статистика /predict_input объединяются
+# по всем воркерам uvicorn через файлы состояний
+worker_states = WorkerStates(collect=worker_state, **config["monitoring"]["workers"])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Загрузка артефактов модели один раз при старте приложения
+    и запуск сборщика батчей для /predict_input (если включен).
+    Потоки BLAS ограничиваются: параллельность дают воркеры uvicorn
+    """
+    if config["serving"]["blas_threads"]:
+        threadpool_limits(limits=config["serving"]["blas_threads"])
+    await run_in_threadpool(registry.try_load)
+    if batcher is not None:
+        await batcher.start()
+    await worker_states.start()
+    yield
+    await worker_states.stop()
+    if batcher is not None:
+        await batcher.stop()
+    training_jobs.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_requests(request: Request, call_next):
+    """
+    Количество и время обработки запросов по endpoint (шаблону пути)
+    """
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start, method=request.method, path=path
+        )
+        REQUESTS.inc(method=request.method, path=path, status=status)
 
 
 class Patient(BaseModel):
@@ -43,85 +181,581 @@ class Patient(BaseModel):
     DifficultyCompletingTasks: str
 
 
+# пакет пациентов: массив объектов или массив значений для каждого признака
+PATIENT_LIST = TypeAdapter(list[Patient])
+PatientColumns = create_model(
+    "PatientColumns",
+    **{name: (list[field.annotation], ...) for name, field in Patient.model_fields.items()},
+)
+batch_config = config["evaluate"]["batch"]
+
+
+class Routing(BaseModel):
+    """
+    Доли трафика дополнительных версий модели и теневая версия
+    """
+
+    weights: dict[str, float] = {}
+    shadow: str | None = None
+
+
+def route(request: Request) -> object:
+    """
+    Версия модели для запроса: из заголовка или по долям трафика
+    :param request: запрос
+    :return: набор артефактов
+    """
+    try:
+        return registry.get(request.headers.get(VERSION_HEADER))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Версия модели не найдена")
+    except FileNotFoundError:
+        # ни одна версия еще не опубликована
+        raise HTTPException(status_code=503, detail="Нет обученной модели")
+
+
 @app.post("/train")
-def training():
+def training(search: bool = None):
+    """
+    Запуск фонового обучения модели, логирование метрик.
+    При search=true перед обучением подбираются гиперпараметры.
+    Если обучение уже идет, возвращается текущая задача
     """
-    Обучение модели, логирование метрик
+    return training_jobs.submit(search=search)
+
+
+@app.get("/train/{job_id}")
+def training_status(job_id: str):
+    """
+    Статус, прогресс, время выполнения и метрики задачи обучения
     """
-    pipeline_training(config_path=CONFIG_PATH)
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Метрики сервиса в текстовом формате Prometheus
+    """
+    training_jobs.collect_timings()
+    others = [state["metrics"] for state in worker_states.others()]
+    return PlainTextResponse(
+        REGISTRY.render(others), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/models")
+def models():
+    """
+    Опубликованные версии модели с метриками, маршрутизация
+    и статистика теневой оценки
+    """
+    return registry.describe()
+
+
+@app.post("/models/{version}/promote")
+def promote_model(version: str):
+    """
+    Перевод версии модели в основную
+    """
+    try:
+        return registry.promote(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Версия модели не найдена")
+
+
+@app.post("/models/rollback")
+def rollback_model():
+    """
+    Откат на предыдущую основную версию модели
+    """
+    try:
+        return registry.rollback()
+    except KeyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@app.put("/models/routing")
+def model_routing(routing: Routing):
+    """
+    Доли трафика дополнительных версий (остаток - основной версии)
+    и теневая версия, получающая копию запросов /predict_input
+    """
+    try:
+        return registry.set_routing(routing.weights, routing.shadow)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Версия модели не найдена")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
 
 @app.post("/predict")
-def prediction(file: UploadFile = File(...)):
+def prediction(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    scores: bool = False,
+):
     """
-    Предсказание модели по данным из файла
+    Предсказание модели по данным из файла,
+    при scores=true - вместе со значениями решающей функции и вероятностями
     """
-    result = pipeline_evaluate(config_path=CONFIG_PATH, data_path=file.file)
-    assert isinstance(result, list), "Результат не соответствует типу list"
-    # заглушка так как не выводим все предсказания, иначе зависнет
-    return {"prediction": result[:5]}
+    artifacts = route(request)
+    response.headers[VERSION_HEADER] = artifacts.version
+    try:
+        result = predict_file(file.file, artifacts)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    assert isinstance(result["prediction"], list), "Результат не соответствует типу list"
+    PREDICTION_ROWS.observe(len(result["prediction"]), path="/predict")
+    # все предсказания (большие файлы - потоково через /predict_stream)
+    if not scores:
+        result = {field: result[field] for field in ("prediction", "validation")}
+    return result
 
 
-@app.post("/predict_input")
-def prediction_input(patient: Patient):
-    """
-    Предсказание модели по введенным данным
-    """
-    features = [
-        [
-            patient.Age,
-            patient.Ethnicity,
-            patient.Smoking,
-            patient.SleepQuality,
-            patient.FamilyHistoryAlzheimers,
-            patient.CardiovascularDisease,
-            patient.Depression,
-            patient.HeadInjury,
-            patient.Hypertension,
-            patient.SystolicBP,
-            patient.CholesterolLDL,
-            patient.CholesterolHDL,
-            patient.MMSE,
-            patient.FunctionalAssessment,
-            patient.MemoryComplaints,
-            patient.BehavioralProblems,
-            patient.ADL,
-            patient.Confusion,
-            patient.PersonalityChanges,
-            patient.DifficultyCompletingTasks,
+def predict_dataset(dataset: object, artifacts: object) -> dict:
+    """
+    Предсказание по датасету за один векторизованный проход: строки
+    с ошибками в значениях признаков пропускаются, строки, предсказания
+    для которых уже есть в кэше (и повторы внутри датасета),
+    не проходят через модель
+    :param dataset: датасет с признаками
+    :param artifacts: набор артефактов версии модели
+    :return: словарь со списками prediction, score, probability
+    (None для строк с ошибками) и отчетом validation
+    """
+    data, valid, report = validate_dataset(dataset, artifacts)
+    # в мониторинг сдвига попадают и строки с ошибками
+    if drift_monitor is not None:
+        drift_monitor.observe_frame(artifacts, dataset)
+    if len(data):
+        results = predict_valid(data, artifacts)
+    else:
+        results = {field: [] for field in ("prediction", "score", "probability")}
+    return {**expand_rows(results, valid), "validation": report}
+
+
+def predict_valid(dataset: object, artifacts: object) -> dict:
+    """
+    Предсказание по проверенному датасету (с кэшем предсказаний,
+    если он включен)
+    :param dataset: датасет с признаками
+    :param artifacts: набор артефактов версии модели
+    :return: словарь со списками prediction, score, probability
+    """
+    if prediction_cache is None:
+        return pipeline_evaluate(dataset=dataset, artifacts=artifacts, return_scores=True)
+
+    keys = canonical_frame_keys(
+        dataset, artifacts.schema["columns"], feature_casts(artifacts.config)
+    )
+    results = prediction_cache.get_many(artifacts.version, keys)
+
+    # первая строка для каждого отсутствующего в кэше ключа
+    missing = {}
+    for position, (key, result) in enumerate(zip(keys, results)):
+        if result is None:
+            missing.setdefault(key, position)
+    if missing:
+        scores = pipeline_evaluate(
+            dataset=dataset.iloc[list(missing.values())],
+            artifacts=artifacts,
+            return_scores=True,
+        )
+        values = [dict(zip(scores, row)) for row in zip(*scores.values())]
+        prediction_cache.put_many(artifacts.version, list(missing), values)
+        computed = dict(zip(missing, values))
+        results = [
+            computed[key] if result is None else result
+            for key, result in zip(keys, results)
         ]
-    ]
-
-    cols = [
-        "Age",
-        "Ethnicity",
-        "Smoking",
-        "SleepQuality",
-        "FamilyHistoryAlzheimers",
-        "CardiovascularDisease",
-        "Depression",
-        "HeadInjury",
-        "Hypertension",
-        "SystolicBP",
-        "CholesterolLDL",
-        "CholesterolHDL",
-        "MMSE",
-        "FunctionalAssessment",
-        "MemoryComplaints",
-        "BehavioralProblems",
-        "ADL",
-        "Confusion",
-        "PersonalityChanges",
-        "DifficultyCompletingTasks",
-    ]
-
-    data = pd.DataFrame(features, columns=cols)
-    data.replace({"Yes": 1, "No": 0}, inplace=True)
-    predictions = pipeline_evaluate(config_path=CONFIG_PATH, dataset=data)[0]
-
-    return predictions
+    return {
+        field: [result[field] for result in results]
+        for field in ("prediction", "score", "probability")
+    }
+
+
+def predict_file(file: object, artifacts: object) -> dict:
+    """
+    Предсказание по файлу (с кэшем предсказаний, если он включен)
+    :param file: файловый объект с данными
+    :param artifacts: набор артефактов версии модели
+    :return: словарь со списками prediction, score, probability
+    и отчетом validation
+    """
+    preproc = artifacts.config["preprocessing"]
+    with stage_timer("get_dataset"):
+        dataset = get_dataset(
+            data_path=file,
+            drop_columns=preproc["drop_columns"],
+            dtypes=preproc["dtypes"],
+            lenient=validation_config["enabled"],
+        )
+    return predict_dataset(dataset, artifacts)
+
+
+def format_errors(report: dict) -> dict:
+    """
+    Ошибки строк из отчета проверки в виде для вывода
+    :param report: отчет проверки части файла
+    :return: словарь номер строки -> строка вида признак:ошибка;...
+    """
+    return {
+        item["row"]: ";".join(f"{column}:{kind}" for column, kind in item["errors"].items())
+        for item in report["errors"]
+    }
+
+
+def stream_predictions(results: Iterator, output_format: str, scores: bool):
+    """
+    Построчная сериализация предсказаний, полученных частями из файла
+    :param results: итератор по предсказаниям частей (pipeline_evaluate_chunks)
+    :param output_format: формат вывода (ndjson или csv)
+    :param scores: выводить также значения решающей функции и вероятности
+    :return: итератор по сериализованным частям
+    """
+    fields = ["prediction", "score", "probability"] if scores else ["prediction"]
+    validate = validation_config["enabled"]
+    row = 0
+    if output_format == "csv":
+        yield ",".join(["row"] + fields + (["errors"] if validate else [])) + "\n"
+
+    for result in results:
+        if validate:
+            columns = [result[field] for field in fields]
+            errors = format_errors(result["validation"])
+        else:
+            columns = [result[field] for field in fields] if scores else [result]
+            errors = {}
+        if output_format == "csv":
+            # у строк с ошибками пустые предсказания и список ошибок
+            lines = [
+                ",".join(
+                    ["" if value is None else str(value) for value in (row + i,) + values]
+                    + ([errors.get(row + i, "")] if validate else [])
+                )
+                + "\n"
+                for i, values in enumerate(zip(*columns))
+            ]
+        else:
+            lines = []
+            for i, values in enumerate(zip(*columns)):
+                item = {"row": row + i, **dict(zip(fields, values))}
+                if row + i in errors:
+                    item["errors"] = errors[row + i]
+                lines.append(json.dumps(item) + "\n")
+        row += len(columns[0])
+        yield "".join(lines)
+    PREDICTION_ROWS.observe(row, path="/predict_stream")
+
+
+async def spool_body(request: Request) -> tempfile.SpooledTemporaryFile:
+    """
+    Чтение тела запроса частями во временный файл: небольшой файл остается
+    в памяти, большой - переносится на диск
+    :param request: запрос
+    :return: временный файл с телом запроса (позиция - начало файла)
+    """
+    max_bytes = upload_config["spool_max_bytes"]
+    file = tempfile.SpooledTemporaryFile(max_size=max_bytes)
+    async for chunk in request.stream():
+        # файл переносится на диск, когда размер превышает max_bytes:
+        # запись на диск (и сам перенос) - вне event loop
+        if file.tell() + len(chunk) > max_bytes:
+            await run_in_threadpool(file.write, chunk)
+        else:
+            file.write(chunk)
+    file.seek(0)
+    return file
+
+
+@app.post("/predict_stream")
+async def prediction_stream(
+    request: Request, output_format: str = "ndjson", scores: bool = False
+):
+    """
+    Потоковое предсказание модели по данным из файла (поле формы file
+    или csv в теле запроса): файл читается частями, все предсказания
+    возвращаются в формате ndjson или csv, при scores=true - вместе со значениями решающей функции и вероятностями
+    """
+    if output_format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="Формат вывода: ndjson или csv")
+
+    artifacts = await run_in_threadpool(route, request)
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        # форма закрывается только после отправки ответа, иначе
+        # файл будет закрыт до того, как его дочитает генератор
+        form = await request.form()
+        file = form.get("file")
+        if file is None or isinstance(file, str):
+            await form.close()
+            raise HTTPException(status_code=400, detail="Не передан файл с данными")
+        file, close = file.file, form.close
+    else:
+        # тело запроса - сам csv файл
+        file = await spool_body(request)
+        close = file.close
+        if not file.readline():
+            close()
+            raise HTTPException(status_code=400, detail="Не передан файл с данными")
+        file.seek(0)
+
+    observe = None
+    if drift_monitor is not None:
+        observe = functools.partial(drift_monitor.observe_frame, artifacts)
+    results = pipeline_evaluate_chunks(
+        data_path=file,
+        artifacts=artifacts,
+        return_scores=scores,
+        observe=observe,
+        validate=validation_config["enabled"],
+    )
+    # заголовок и первая часть файла проверяются до отправки ответа:
+    # при несовпадении признаков - 422, а не 200 с пустым телом
+    try:
+        first = await run_in_threadpool(next, results, None)
+    except (ValueError, KeyError) as exc:
+        close_result = close()
+        if close_result is not None:
+            await close_result
+        raise HTTPException(status_code=422, detail=str(exc))
+    if first is not None:
+        results = itertools.chain([first], results)
+
+    media_type = "text/csv" if output_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_predictions(results, output_format=output_format, scores=scores),
+        media_type=media_type,
+        headers={VERSION_HEADER: artifacts.version},
+        background=BackgroundTask(close),
+    )
+
+
+def predict_patients(records: list, artifacts: object = None) -> list:
+    """
+    Предсказание модели по списку записей с введенными данными
+    (кодирование признаков без pandas)
+    :param records: список словарей с признаками Patient
+    :param artifacts: набор артефактов версии модели (по умолчанию - по маршрутизации)
+    :return: список словарей с prediction, score, probability для каждой записи
+    """
+    if artifacts is None:
+        artifacts = registry.get()
+    with stage_timer("encode"):
+        features = artifacts.encoder.transform(records)
+    result = predict_scores(artifacts.model, artifacts.calibrator, features)
+    return [dict(zip(result, values)) for values in zip(*result.values())]
+
+
+def predict_routed(items: list) -> list:
+    """
+    Предсказание по батчу записей, направленных в разные версии модели:
+    записи группируются по версии, порядок ответов сохраняется
+    :param items: список пар (набор артефактов, запись)
+    :return: список словарей с prediction, score, probability для каждой записи
+    """
+    groups = {}
+    for i, (artifacts, record) in enumerate(items):
+        groups.setdefault(artifacts.version, (artifacts, [], []))
+        groups[artifacts.version][1].append(i)
+        groups[artifacts.version][2].append(record)
+
+    results = [None] * len(items)
+    for artifacts, positions, records in groups.values():
+        for position, result in zip(positions, predict_patients(records, artifacts)):
+            results[position] = result
+    return results
+
+
+def shadow_score(shadow: object, records: list, primary: list) -> None:
+    """
+    Теневая оценка: предсказания теневой версии сравниваются с отданными
+    :param shadow: набор артефактов теневой версии
+    :param records: список словарей с признаками Patient
+    :param primary: отданные предсказания
+    """
+    results = predict_patients(records, shadow)
+    registry.record_shadow(
+        shadow.version, primary, [result["prediction"] for result in results]
+    )
+
+
+# объединение одиночных запросов /predict_input в батчи (опционально)
+batcher = None
+batching_config = config["evaluate"]["batching"]
+if batching_config["enabled"]:
+    batcher = MicroBatcher(
+        predict_fn=predict_routed,
+        max_latency_ms=batching_config["max_latency_ms"],
+        max_batch_size=batching_config["max_batch_size"],
+    )
+
+
+@app.post("/predict_input")
+async def prediction_input(
+    patient: Patient,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    scores: bool = False,
+):
+    """
+    Предсказание модели по введенным данным,
+    при scores=true - вместе со значением решающей функции и вероятностью
+    """
+    artifacts = await run_in_threadpool(route, request)
+    record = patient.model_dump()
+    PREDICTION_ROWS.observe(1, path="/predict_input")
+    # запись проверяется по схеме train до кэша, батчинга и мониторинга:
+    # ошибки в значениях признаков - 422 с отчетом, как в /predict_batch
+    if validation_config["enabled"]:
+        _, valid, report = await run_in_threadpool(
+            validate_features,
+            pd.DataFrame([record]),
+            artifacts.schema,
+            **artifacts.config,
+        )
+        if not valid[0]:
+            raise HTTPException(status_code=422, detail=report)
+    if drift_monitor is not None:
+        drift_monitor.observe_records(artifacts, [record])
+
+    result, keys = None, None
+    if prediction_cache is not None:
+        try:
+            keys = canonical_keys(
+                [record], artifacts.schema["columns"], feature_casts(artifacts.config)
+            )
+        except (TypeError, ValueError):
+            # значение не приводится к ключу: ошибку с названием признака
+            # вернет кодирование записи
+            pass
+        else:
+            result = prediction_cache.get_many(artifacts.version, keys)[0]
+
+    if result is None:
+        try:
+            if batcher is not None:
+                result = await batcher.submit((artifacts, record))
+            else:
+                results = await run_in_threadpool(predict_patients, [record], artifacts)
+                result = results[0]
+        except EncodingError as exc:
+            # значение, не прошедшее кодирование (при отключенной проверке)
+            raise HTTPException(
+                status_code=422,
+                detail={"column": exc.column, "value": exc.value, "error": str(exc)},
+            )
+        if keys is not None:
+            prediction_cache.put_many(artifacts.version, keys, [result])
+
+    response.headers[VERSION_HEADER] = artifacts.version
+    shadow = registry.get_shadow()
+    if shadow is not None and shadow.version != artifacts.version:
+        background_tasks.add_task(
+            shadow_score, shadow, [record], [result["prediction"]]
+        )
+
+    return result if scores else result["prediction"]
+
+
+def validate_batch(body: bytes) -> pd.DataFrame:
+    """
+    Проверка пакета пациентов: JSON-массив объектов Patient
+    или колоночный JSON (массив значений для каждого признака)
+    :param body: тело запроса
+    :return: датасет с признаками в порядке поступления
+    """
+    if body.lstrip()[:1] == b"[":
+        patients = PATIENT_LIST.validate_json(body)
+        data = pd.DataFrame.from_records(
+            [patient.model_dump() for patient in patients],
+            columns=list(Patient.model_fields),
+        )
+    else:
+        columns = PatientColumns.model_validate_json(body).model_dump()
+        if len({len(values) for values in columns.values()}) > 1:
+            raise HTTPException(
+                status_code=422, detail="Признаки должны быть одинаковой длины"
+            )
+        data = pd.DataFrame(columns)
+
+    if len(data) > batch_config["max_rows"]:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Не больше {batch_config['max_rows']} пациентов в запросе",
+        )
+    # бинарные признаки Patient передаются строками (Yes/No, как в форме UI,
+    # или коды): Yes/No заменяются на коды так же, как в FeatureEncoder,
+    # к числам значения приводятся при проверке по схеме train
+    for column in config["preprocessing"]["passthrough_columns"]:
+        data[column] = encode_binary(data[column])
+    return data
+
+
+@app.post("/predict_batch", response_class=BatchResponse)
+async def prediction_batch(request: Request, scores: bool = False):
+    """
+    Предсказание модели по пакету пациентов (JSON-массив Patient или
+    колоночный JSON) за один векторизованный проход. Ответ в колоночном
+    виде в порядке поступления (null для пациентов с ошибками в значениях
+    признаков, ошибки - в validation), при scores=true - вместе
+    со значениями решающей функции и вероятностями
+    """
+    body = await request.body()
+    try:
+        data = validate_batch(body)
+    except ValidationError as exc:
+        # входные значения не возвращаются: в ошибке разбора JSON это bytes
+        raise HTTPException(
+            status_code=422,
+            detail=exc.errors(include_url=False, include_input=False)[:20],
+        )
+
+    artifacts = await run_in_threadpool(route, request)
+    PREDICTION_ROWS.observe(len(data), path="/predict_batch")
+    result = await run_in_threadpool(predict_dataset, data, artifacts)
+    if not scores:
+        result = {"prediction": result["prediction"], "validation": result["validation"]}
+    return BatchResponse(result, headers={VERSION_HEADER: artifacts.version})
+
+
+@app.get("/predict_input/stats")
+def prediction_input_stats():
+    """
+    Статистика по размерам батчей, собранных для /predict_input,
+    и попаданиям в кэш предсказаний
+    """
+    others = worker_states.others()
+    stats = {"enabled": batcher is not None}
+    if batcher is not None:
+        stats.update(batcher.stats([state["batching"] for state in others]))
+    if prediction_cache is not None:
+        stats["cache"] = prediction_cache.stats([state["cache"] for state in others])
+    return stats
+
+
+@app.get("/monitoring/drift")
+def data_drift(version: str = None):
+    """
+    Сдвиг распределений признаков в запросах на предсказание относительно
+    train по версиям модели: PSI (и KS для числовых признаков), доли
+    пропусков, значений вне диапазона train и неизвестных категорий
+    """
+    if drift_monitor is None:
+        raise HTTPException(status_code=404, detail="Мониторинг сдвига выключен")
+    try:
+        others = [state["drift"] for state in worker_states.others()]
+        return drift_monitor.report(version, others)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Нет запросов к версии модели")
 
 
 if __name__ == "__main__":
     # Запустите сервер, используя заданный хост и порт
-    uvicorn.run(app, host="127.0.0.1", port=80)
+    # (количество воркеров - переменная окружения WEB_CONCURRENCY)
+    uvicorn.run("main:app", host="127.0.0.1", port=80)
@@ -0,0 +1,181 @@
+import json
+import numpy as np
+
+from .get_data import get_dataset_chunks
+
+# доля межквартильного размаха для усов boxplot (как в seaborn)
+WHISKER = 1.5
+# ширина сетки плотности в ширинах окна за пределами данных (cut в seaborn)
+KDE_CUT = 3
+
+
+def scan_ranges(data_path: str, chunk_size: int, columns: list, target: str) -> dict:
+    """
+    Первый проход по частям файла: минимум, максимум, количество, сумма
+    и сумма квадратов числовых признаков по классам целевой переменной
+    :param data_path: путь до данных
+    :param chunk_size: количество строк в одной части
+    :param columns: числовые признаки
+    :param target: целевая переменная
+    :return: словарь признак -> класс -> статистики
+    """
+    stats = {column: {} for column in columns}
+    for chunk in get_dataset_chunks(data_path, chunk_size=chunk_size):
+        for label, group in chunk.groupby(target):
+            for column in columns:
+                values = group[column].dropna().to_numpy(dtype=np.float64)
+                if not len(values):
+                    continue
+                item = stats[column].setdefault(
+                    label,
+                    {"min": np.inf, "max": -np.inf, "n": 0, "sum": 0.0, "sq": 0.0},
+                )
+                item["min"] = min(item["min"], values.min())
+                item["max"] = max(item["max"], values.max())
+                item["n"] += len(values)
+                item["sum"] += values.sum()
+                item["sq"] += np.square(values).sum()
+    return stats
+
+
+def histogram_quantiles(counts: np.ndarray, edges: np.ndarray, levels: list) -> list:
+    """
+    Квантили по гистограмме (линейная интерполяция внутри ячейки)
+    :param counts: количество объектов в ячейках
+    :param edges: границы ячеек
+    :param levels: уровни квантилей
+    :return: список квантилей
+    """
+    cumulative = np.concatenate([[0], np.cumsum(counts)]) / counts.sum()
+    return np.interp(levels, cumulative, edges).tolist()
+
+
+def box_stats(counts: np.ndarray, edges: np.ndarray, max_fliers: int) -> dict:
+    """
+    Статистики boxplot по гистограмме: квартили, медиана, усы
+    (крайние значения в пределах 1.5 IQR) и выбросы (центры ячеек)
+    :param counts: количество объектов в ячейках
+    :param edges: границы ячеек
+    :param max_fliers: максимальное количество выбросов
+    :return: словарь в формате matplotlib Axes.bxp
+    """
+    q1, median, q3 = histogram_quantiles(counts, edges, [0.25, 0.5, 0.75])
+    low, high = q1 - WHISKER * (q3 - q1), q3 + WHISKER * (q3 - q1)
+    centers = (edges[:-1] + edges[1:]) / 2
+    occupied = centers[counts > 0]
+    inside = occupied[(occupied >= low) & (occupied <= high)]
+    fliers = occupied[(occupied < low) | (occupied > high)]
+    return {
+        "q1": q1,
+        "med": median,
+        "q3": q3,
+        "whislo": float(inside.min()) if len(inside) else q1,
+        "whishi": float(inside.max()) if len(inside) else q3,
+        "fliers": fliers[:max_fliers].tolist(),
+    }
+
+
+def kde_from_histogram(
+    counts: np.ndarray, edges: np.ndarray, bandwidth: float, grid: np.ndarray
+) -> list:
+    """
+    Гауссова оценка плотности по гистограмме (объекты ячейки - в ее центре):
+    сложность зависит от количества ячеек, а не строк
+    :param counts: количество объектов в ячейках
+    :param edges: границы ячеек
+    :param bandwidth: ширина окна
+    :param grid: точки, в которых считается плотность
+    :return: значения плотности
+    """
+    centers = (edges[:-1] + edges[1:]) / 2
+    distances = (grid[:, None] - centers[None, :]) / bandwidth
+    kernel = np.exp(-0.5 * np.square(distances)) / np.sqrt(2 * np.pi)
+    return np.round(kernel @ counts / (counts.sum() * bandwidth), 6).tolist()
+
+
+def build_eda_summary(data_path: str, **kwargs) -> dict:
+    """
+    Агрегаты для страницы EDA за два прохода по частям файла (память
+    не зависит от размера данных): плотности и статистики boxplot
+    числовых признаков, нормированные таблицы сопряженности категориальных
+    признаков с целевой переменной и первые строки датасета
+    :param data_path: путь до исходных данных train
+    :return: словарь с агрегатами
+    """
+    preproc = kwargs["preprocessing"]
+    eda = kwargs["eda"]
+    target = preproc["target_column"]
+    numeric = eda["numeric_columns"]
+    categorical = eda["categorical_columns"]
+
+    stats = scan_ranges(data_path, eda["chunk_size"], numeric, target)
+    edges = {}
+    for column in numeric:
+        low = min(item["min"] for item in stats[column].values())
+        high = max(item["max"] for item in stats[column].values())
+        high = high if high > low else low + 1
+        edges[column] = np.linspace(low, high, eda["n_bins"] + 1)
+    counts = {column: {} for column in numeric + categorical}
+
+    # второй проход: гистограммы и частоты по классам
+    head = None
+    for chunk in get_dataset_chunks(data_path, chunk_size=eda["chunk_size"]):
+        if head is None:
+            head = chunk.head(eda["head_rows"])
+        for label, group in chunk.groupby(target):
+            for column in numeric:
+                values = group[column].dropna().to_numpy(dtype=np.float64)
+                hist = np.histogram(values, bins=edges[column])[0]
+                counts[column][label] = counts[column].get(label, 0) + hist
+            for column in categorical:
+                frequencies = counts[column].setdefault(label, {})
+                for value, count in group[column].value_counts().items():
+                    frequencies[value] = frequencies.get(value, 0) + int(count)
+
+    summary = {"target": target, "numeric": {}, "categorical": {}}
+    for column in numeric:
+        # общая сетка для классов, ширина окна - правило Скотта (как в seaborn)
+        bandwidths = {}
+        for label, item in stats[column].items():
+            mean = item["sum"] / item["n"]
+            std = np.sqrt(max(item["sq"] / item["n"] - mean**2, 0))
+            bandwidths[label] = max(std * item["n"] ** (-1 / 5), 1e-12)
+        cut = KDE_CUT * max(bandwidths.values())
+        grid = np.linspace(
+            edges[column][0] - cut, edges[column][-1] + cut, eda["grid_size"]
+        )
+        summary["numeric"][column] = {
+            "grid": np.round(grid, 6).tolist(),
+            "classes": {
+                str(label): {
+                    "density": kde_from_histogram(
+                        hist, edges[column], bandwidths[label], grid
+                    ),
+                    "box": box_stats(hist, edges[column], eda["max_fliers"]),
+                    "n": int(hist.sum()),
+                }
+                for label, hist in sorted(counts[column].items())
+            },
+        }
+    for column in categorical:
+        summary["categorical"][column] = {
+            str(label): {
+                str(value): round(100 * count / sum(frequencies.values()), 4)
+                for value, count in sorted(frequencies.items())
+            }
+            for label, frequencies in sorted(counts[column].items())
+        }
+    summary["head"] = json.loads(head.to_json(orient="split", index=False))
+    return summary
+
+
+def save_eda_summary(data_path: str, **kwargs) -> None:
+    """
+    Сохранение агрегатов для страницы EDA (после обучения
+    или обновления данных)
+    :param data_path: путь до исходных данных train
+    """
+    summary = build_eda_summary(data_path, **kwargs)
+    with open(kwargs["eda"]["eda_path"], "w") as file:
+        json.dump(summary, file)
+
@@ -1,9 +1,289 @@
+import io
+import os
+import csv
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from typing import Iterator
 
-def get_dataset(data_path: str) -> pd.DataFrame:
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def get_data_format(data_path: object) -> str:
+    """
+    Определение формата данных по расширению файла
+    (файловые объекты считаются csv)
+    :param data_path: путь до данных или файловый объект
+    :return: формат данных (csv, parquet или arrow)
+    """
+    if not isinstance(data_path, str):
+        return "csv"
+    suffix = os.path.splitext(data_path)[1].lower()
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    return "csv"
+
+
+def apply_dtypes(data: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """
+    Приведение признаков к заданным типам (только для имеющихся признаков)
+    :param data: датасет
+    :param dtypes: словарь признак -> тип
+    :return: датасет
+    """
+    dtypes = {
+        column: dtype
+        for column, dtype in dtypes.items()
+        if column in data.columns and data[column].dtype != dtype
+    }
+    return data.astype(dtypes) if dtypes else data
+
+
+def csv_header(file: object) -> list:
+    """
+    Названия признаков из первой строки csv (позиция в файле не меняется)
+    :param file: файловый объект с данными
+    :return: список признаков
+    """
+    position = file.tell()
+    line = file.readline()
+    file.seek(position)
+    if isinstance(line, bytes):
+        line = line.decode("utf-8-sig")
+    return next(csv.reader([line]), [])
+
+
+def csv_convert_options(
+    header: list, drop_columns: set, dtypes: dict, lenient: bool = False
+) -> pa_csv.ConvertOptions:
+    """
+    Явная схема чтения csv: ненужные признаки не разбираются,
+    типы признаков из dtypes не выводятся по данным
+    :param header: признаки файла
+    :param drop_columns: признаки, которые не нужно читать
+    :param dtypes: словарь признак -> тип
+    :param lenient: признаки из dtypes читаются строками (пустые - пропуски),
+    чтобы некорректные значения не прерывали чтение всего файла
+    :return: настройки конвертации pyarrow
+    """
+    columns = [column for column in header if column not in drop_columns]
+    if lenient:
+        column_types = {column: pa.string() for column in dtypes if column in columns}
+        return pa_csv.ConvertOptions(
+            column_types=column_types,
+            include_columns=columns,
+            strings_can_be_null=True,
+        )
+    # категории приводятся после чтения (как и в pandas)
+    column_types = {
+        column: pa.from_numpy_dtype(np.dtype(dtype))
+        for column, dtype in dtypes.items()
+        if column in columns and dtype != "category"
+    }
+    return pa_csv.ConvertOptions(column_types=column_types, include_columns=columns)
+
+
+def lenient_frame(table: pa.Table) -> pd.DataFrame:
+    """
+    Датасет из прочитанных строками признаков: признак без нечисловых
+    значений приводится к float64 (пропуски - NaN), остальные остаются
+    строками для проверки значений по схеме train
+    :param table: таблица pyarrow
+    :return: датасет
+    """
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_string(column.type):
+            try:
+                column = pc.cast(column, pa.float64())
+            except pa.ArrowInvalid:
+                pass
+        columns[name] = column
+    return pa.table(columns).to_pandas()
+
+
+def arrow_source(file: object) -> object:
+    """
+    Источник для pyarrow: BytesIO читается без копирования через memoryview
+    его буфера, остальные файловые объекты (в том числе SpooledTemporaryFile
+    в памяти или на диске) - блоками через их read (в обоих случаях
+    с текущей позиции)
+    :param file: файловый объект с данными
+    :return: источник для pyarrow.csv
     """
-    Получение данных по заданному пути
-    :param dataset_path: путь до данных 
+    if isinstance(file, io.BytesIO):
+        return pa.BufferReader(pa.py_buffer(file.getbuffer()[file.tell() :]))
+    return file
+
+
+def read_csv_buffer(
+    file: object,
+    drop_columns: set,
+    dtypes: dict,
+    chunk_size: int = None,
+    lenient: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Многопоточное чтение загруженного csv с помощью pyarrow
+    :param file: файловый объект с данными
+    :param drop_columns: признаки, которые не нужно читать
+    :param dtypes: словарь признак -> тип
+    :param chunk_size: количество строк в одной части (None - весь файл)
+    :param lenient: не приводить признаки к dtypes (см. lenient_frame)
+    :return: итератор по частям датасета
+    """
+    convert_options = csv_convert_options(
+        csv_header(file), drop_columns, dtypes, lenient
+    )
+
+    def to_frame(table: pa.Table) -> pd.DataFrame:
+        if lenient:
+            return lenient_frame(table)
+        return apply_dtypes(table.to_pandas(), dtypes)
+
+    source = arrow_source(file)
+    try:
+        if chunk_size is None:
+            yield to_frame(pa_csv.read_csv(source, convert_options=convert_options))
+            return
+
+        # блоки pyarrow собираются в части по chunk_size строк (срезы без копий)
+        pending = []
+        with pa_csv.open_csv(source, convert_options=convert_options) as reader:
+            for batch in reader:
+                pending.append(batch)
+                n_rows = sum(part.num_rows for part in pending)
+                if n_rows < chunk_size:
+                    continue
+                table = pa.Table.from_batches(pending)
+                for start in range(0, n_rows - chunk_size + 1, chunk_size):
+                    yield to_frame(table.slice(start, chunk_size))
+                pending = table.slice(n_rows - n_rows % chunk_size).to_batches()
+        if pending:
+            yield to_frame(pa.Table.from_batches(pending))
+    finally:
+        # освобождаем memoryview, иначе буфер файла нельзя будет закрыть
+        if source is not file:
+            source.close()
+
+
+def get_dataset(
+    data_path: str,
+    drop_columns: list = None,
+    dtypes: dict = None,
+    memory_map: bool = False,
+    lenient: bool = False,
+) -> pd.DataFrame:
+    """
+    Получение данных по заданному пути (csv, parquet или arrow ipc)
+    или из загруженного csv файла
+    :param dataset_path: путь до данных (или файловый объект)
+    :param drop_columns: признаки, которые не нужно читать
+    :param dtypes: словарь признак -> тип
+    :param memory_map: читать файл через memory-mapping
+    :param lenient: не приводить признаки csv к dtypes (типы выводятся
+    по данным), чтобы некорректные значения проверялись по строкам
     :return: датасет
     """
-    return pd.read_csv(data_path)
\ No newline at end of file
+    drop_columns = set(drop_columns or [])
+    dtypes = dtypes or {}
+    data_format = get_data_format(data_path)
+
+    if data_format == "csv" and not isinstance(data_path, str):
+        # загруженный файл: многопоточный разбор без копии буфера
+        [dataset] = read_csv_buffer(data_path, drop_columns, dtypes, lenient=lenient)
+        return dataset
+
+    if data_format == "csv":
+        # категориальные признаки приводятся после чтения, чтобы категории
+        # имели исходный тип (а не строки)
+        dataset = pd.read_csv(
+            data_path,
+            usecols=lambda column: column not in drop_columns,
+            dtype=None if lenient else {k: v for k, v in dtypes.items() if v != "category"},
+            memory_map=memory_map,
+        )
+        return dataset if lenient else apply_dtypes(dataset, dtypes)
+
+    if data_format == "parquet":
+        names = pq.read_schema(data_path, memory_map=memory_map).names
+        columns = [column for column in names if column not in drop_columns]
+        table = pq.read_table(data_path, columns=columns, memory_map=memory_map)
+    else:
+        names = pa.ipc.open_file(data_path).schema.names
+        columns = [column for column in names if column not in drop_columns]
+        table = feather.read_table(data_path, columns=columns, memory_map=memory_map)
+
+    return apply_dtypes(table.to_pandas(), dtypes)
+
+
+def get_dataset_chunks(
+    data_path: str,
+    chunk_size: int,
+    drop_columns: list = None,
+    dtypes: dict = None,
+    lenient: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Получение данных по заданному пути частями фиксированного размера
+    :param data_path: путь до данных (или файловый объект)
+    :param chunk_size: количество строк в одной части
+    :param drop_columns: признаки, которые не нужно читать
+    :param dtypes: словарь признак -> тип
+    :param lenient: не приводить признаки csv к dtypes
+    :return: итератор по частям датасета
+    """
+    drop_columns = set(drop_columns or [])
+    dtypes = dtypes or {}
+
+    if get_data_format(data_path) == "parquet":
+        parquet_file = pq.ParquetFile(data_path)
+        columns = [
+            column
+            for column in parquet_file.schema_arrow.names
+            if column not in drop_columns
+        ]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield apply_dtypes(batch.to_pandas(), dtypes)
+        return
+
+    if not isinstance(data_path, str):
+        yield from read_csv_buffer(
+            data_path, drop_columns, dtypes, chunk_size, lenient=lenient
+        )
+        return
+
+    with pd.read_csv(
+        data_path,
+        chunksize=chunk_size,
+        usecols=lambda column: column not in drop_columns,
+        dtype=None if lenient else {k: v for k, v in dtypes.items() if v != "category"},
+    ) as reader:
+        for chunk in reader:
+            yield chunk if lenient else apply_dtypes(chunk, dtypes)
+
+
+def convert_to_parquet(data_path: str, dtypes: dict = None) -> str:
+    """
+    Однократная конвертация csv в parquet рядом с исходным файлом
+    (повторно - только если csv изменился)
+    :param data_path: путь до csv
+    :param dtypes: словарь признак -> тип
+    :return: путь до parquet
+    """
+    parquet_path = os.path.splitext(data_path)[0] + ".parquet"
+    if (
+        not os.path.exists(parquet_path)
+        or os.path.getmtime(parquet_path) < os.path.getmtime(data_path)
+    ):
+        data = get_dataset(data_path, dtypes=dtypes)
+        data.to_parquet(f"{parquet_path}.tmp", index=False)
+        os.replace(f"{parquet_path}.tmp", parquet_path)
+    return parquet_path
@@ -0,0 +1,148 @@
+import asyncio
+from collections import Counter
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+
+class MicroBatcher:
+    """
+    Динамическое объединение одиночных запросов в батчи: запросы копятся
+    не дольше max_latency_ms или до max_batch_size строк, затем по всему
+    батчу выполняется одно векторизованное предсказание
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[list], list],
+        max_latency_ms: float,
+        max_batch_size: int,
+    ):
+        """
+        :param predict_fn: функция предсказания по списку записей
+        :param max_latency_ms: максимальное время ожидания батча в миллисекундах
+        :param max_batch_size: максимальный размер батча
+        """
+        self.predict_fn = predict_fn
+        self.max_latency = max_latency_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.batch_sizes = Counter()
+        self._queue = None
+        self._task = None
+
+    async def start(self) -> None:
+        """
+        Запуск фонового сборщика батчей в текущем event loop
+        """
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Остановка фонового сборщика батчей
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, record: object) -> object:
+        """
+        Постановка записи в очередь и ожидание предсказания для нее
+        :param record: запись в формате, который принимает predict_fn
+        :return: предсказание
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """
+        Сбор батча: ждем первую запись, затем добираем остальные,
+        пока не истечет время ожидания или не наберется max_batch_size
+        :return: список пар (запись, future)
+        """
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_latency
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        """
+        Цикл сбора батчей и раздачи результатов ожидающим запросам
+        """
+        while True:
+            batch = await self._collect()
+            records = [record for record, _ in batch]
+            try:
+                predictions = await run_in_threadpool(self.predict_fn, records)
+            except Exception as exc:
+                if len(batch) == 1:
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(exc)
+                    continue
+                # ошибка одной записи не должна ронять остальные:
+                # записи батча предсказываются по одной
+                await self._run_one_by_one(batch)
+                continue
+
+            self.batch_sizes[len(batch)] += 1
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+    async def _run_one_by_one(self, batch: list) -> None:
+        """
+        Предсказание записей батча по одной: ошибка передается
+        только запросу с этой записью
+        :param batch: список пар (запись, future)
+        """
+        for record, future in batch:
+            try:
+                [prediction] = await run_in_threadpool(self.predict_fn, [record])
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            self.batch_sizes[1] += 1
+            if not future.done():
+                future.set_result(prediction)
+
+    def state(self) -> dict:
+        """
+        Размеры батчей для объединения с другими воркерами
+        :return: словарь размер батча -> количество батчей
+        """
+        return dict(self.batch_sizes)
+
+    def stats(self, others: list = ()) -> dict:
+        """
+        Статистика по размерам собранных батчей
+        :param others: состояния (state) сборщиков других воркеров
+        :return: словарь со статистикой
+        """
+        batch_sizes = Counter(self.batch_sizes)
+        for state in others:
+            # ключи json - строки
+            batch_sizes.update({int(size): count for size, count in state.items()})
+        n_batches = sum(batch_sizes.values())
+        n_rows = sum(size * count for size, count in batch_sizes.items())
+        return {
+            "batches": n_batches,
+            "rows": n_rows,
+            "mean_batch_size": round(n_rows / n_batches, 3) if n_batches else 0.0,
+            "max_batch_size": max(batch_sizes, default=0),
+            "batch_sizes": dict(sorted(batch_sizes.items())),
+        }
@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from ..monitoring.metrics import CACHE_LOOKUPS
+from ..transform.encoder import BINARY_MAP
+
+
+def binary_code(value: object) -> int:
+    """
+    Код бинарного признака: Yes/No из формы приводятся к кодам train,
+    как в FeatureEncoder
+    :param value: значение (Yes/No, 0/1 или строка "0"/"1")
+    :return: код 0 или 1
+    """
+    return int(BINARY_MAP.get(value, value))
+
+
+# приведения, которые для датасета выполняются векторно
+FRAME_DTYPES = {float: float, int: int, binary_code: int}
+
+
+def feature_casts(config: dict) -> dict:
+    """
+    Приведение признаков к каноническому виду: одинаковые пациенты
+    из формы (Patient) и из файла дают одинаковый ключ
+    :param config: словарь с конфигурациями
+    :return: словарь признак -> функция приведения значения
+    """
+    preproc = config["preprocessing"]
+    casts = {}
+    for column in preproc["one_hot_columns"]:
+        mapping = preproc["map_change_columns"].get(column, {})
+        casts[column] = lambda value, mapping=mapping: str(mapping.get(value, value))
+    for column in preproc["scale_columns"]:
+        casts[column] = float
+    for column in preproc["passthrough_columns"]:
+        casts[column] = binary_code
+    return casts
+
+
+def canonical_keys(records: list, columns: list, casts: dict) -> list:
+    """
+    Канонические ключи записей с введенными данными
+    :param records: список словарей с признаками Patient
+    :param columns: признаки в порядке train
+    :param casts: функции приведения значений
+    :return: список ключей
+    """
+    return [
+        tuple(casts[column](record[column]) for column in columns) for record in records
+    ]
+
+
+def canonical_frame_keys(data: pd.DataFrame, columns: list, casts: dict) -> list:
+    """
+    Канонические ключи строк датасета в формате исходного файла
+    (числовые и бинарные признаки приводятся векторно, поэтому бинарные
+    признаки датасета должны быть уже закодированы - см. validate_features)
+    :param data: датасет
+    :param columns: признаки в порядке train
+    :param casts: функции приведения значений
+    :return: список ключей
+    """
+    frame = pd.DataFrame(
+        {
+            column: data[column].astype(FRAME_DTYPES[casts[column]])
+            if casts[column] in FRAME_DTYPES
+            else data[column].map(casts[column])
+            for column in columns
+        }
+    )
+    return list(frame.itertuples(index=False, name=None))
+
+
+class PredictionCache:
+    """
+    LRU кэш предсказаний с ограничением времени жизни. Ключ - версия модели
+    и канонические значения признаков, поэтому после обучения новой модели
+    старые предсказания не используются, а записи неактивных версий удаляются
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        :param max_entries: максимальное количество записей
+        :param ttl_seconds: время жизни записи в секундах
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get_many(self, version: str, keys: list) -> list:
+        """
+        Поиск предсказаний в кэше
+        :param version: версия модели
+        :param keys: канонические ключи записей
+        :return: список предсказаний (None для отсутствующих)
+        """
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get((version, key))
+                if entry is not None and entry[0] < now:
+                    del self._entries[(version, key)]
+                    self._stats["expired"] += 1
+                    entry = None
+                if entry is None:
+                    self._stats["misses"] += 1
+                    results.append(None)
+                else:
+                    self._entries.move_to_end((version, key))
+                    self._stats["hits"] += 1
+                    results.append(entry[1])
+        hits = sum(result is not None for result in results)
+        CACHE_LOOKUPS.inc(hits, result="hit")
+        CACHE_LOOKUPS.inc(len(results) - hits, result="miss")
+        return results
+
+    def put_many(self, version: str, keys: list, values: list) -> None:
+        """
+        Сохранение предсказаний
+        :param version: версия модели
+        :param keys: канонические ключи записей
+        :param values: предсказания
+        """
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[(version, key)] = (expires_at, value)
+                self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def retain(self, versions: set) -> None:
+        """
+        Удаление записей версий, на которые больше не идет трафик
+        :param versions: активные версии
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] not in versions]
+            for key in stale:
+                del self._entries[key]
+
+    def state(self) -> dict:
+        """
+        Счетчики и размер кэша для объединения с другими воркерами
+        :return: словарь со счетчиками и размером
+        """
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+    def stats(self, others: list = ()) -> dict:
+        """
+        Статистика попаданий в кэш (у каждого воркера свой кэш, счетчики
+        и размеры суммируются)
+        :param others: состояния (state) кэшей других воркеров
+        :return: словарь со счетчиками, размером и долей попаданий
+        """
+        stats = self.state()
+        for state in others:
+            for key, value in state.items():
+                stats[key] += value
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / total, 4) if total else 0.0
+        return stats
@@ -1,34 +1,176 @@
-import os
-import yaml
-import joblib
+import numpy as np
 import pandas as pd
-from ..data.get_data import get_dataset
+from typing import Callable, Iterator, Tuple, Union
+from ..data.get_data import apply_dtypes, get_dataset, get_dataset_chunks
 from ..transform.transform import test_preprocess
+from ..transform.validation import expand_rows, validate_features
+from ..registry.registry import Artifacts, load_artifacts
+from ..monitoring.metrics import stage_timer, timed
 
 
+@timed("predict")
+def predict_scores(model: object, calibrator: object, features: object) -> dict:
+    """
+    Получение меток, значений решающей функции и калиброванных вероятностей
+    за один проход модели
+    :param model: модель с методом decision_function
+    :param calibrator: калибровка значений решающей функции
+    :param features: объект-признаки после трансформации
+    :return: словарь со списками prediction, score, probability
+    """
+    scores = model.decision_function(features)
+    labels = model.classes_[(scores > 0).astype(int)]
+    probability = calibrator.predict_proba(scores)[:, 1]
+    return {
+        "prediction": labels.tolist(),
+        "score": np.round(scores, 6).tolist(),
+        "probability": np.round(probability, 6).tolist(),
+    }
+
+
+@timed("pipeline_evaluate")
 def pipeline_evaluate(
-    config_path, dataset: pd.DataFrame = None, data_path: str = None
-) -> list:
+    config_path: str = None,
+    dataset: pd.DataFrame = None,
+    data_path: str = None,
+    artifacts: Artifacts = None,
+    return_scores: bool = False,
+) -> Union[list, dict]:
     """
     Предобработка входных данных и получение предсказаний
     :param dataset: датасет
     :param config_path: путь до конфигурационного файла
     :param data_path: путь до файла с данными
-    :return: предсказания
+    :param artifacts: загруженные заранее артефакты (из реестра),
+    если не заданы - загружаются по config_path
+    :param return_scores: вернуть также значения решающей функции и вероятности
+    :return: предсказания (или словарь со списками prediction, score, probability)
     """
-    # get params
-    with open(config_path) as file:
-        config = yaml.load(file, Loader=yaml.FullLoader)
-
-    train_config = config["train"]
+    # get params and artifacts
+    if artifacts is None:
+        artifacts = load_artifacts(config_path)
 
     # preprocessing
+    preproc = artifacts.config["preprocessing"]
     if data_path:
-        dataset = get_dataset(data_path=data_path)
+        with stage_timer("get_dataset"):
+            dataset = get_dataset(
+                data_path=data_path,
+                drop_columns=preproc["drop_columns"],
+                dtypes=preproc["dtypes"],
+                memory_map=preproc["memory_map"] and isinstance(data_path, str),
+            )
 
-    dataset = test_preprocess(test_data=dataset, **config)
+    dataset = test_preprocess(
+        test_data=dataset,
+        schema=artifacts.schema,
+        column_transformer=artifacts.column_transformer,
+        **artifacts.config,
+    )
 
-    model = joblib.load(os.path.join(train_config["model_path"]))
-    prediction = model.predict(dataset).tolist()
+    if return_scores:
+        return predict_scores(artifacts.model, artifacts.calibrator, dataset)
+
+    with stage_timer("predict"):
+        prediction = artifacts.model.predict(dataset).tolist()
 
     return prediction
+
+
+def validate_dataset(
+    dataset: pd.DataFrame, artifacts: Artifacts, row_offset: int = 0
+) -> Tuple[pd.DataFrame, np.ndarray, dict]:
+    """
+    Проверка датасета по схеме признаков train: корректные строки
+    приводятся к типам train, строки с ошибками попадают в отчет
+    :param dataset: датасет в формате исходного файла
+    :param artifacts: загруженные заранее артефакты (из реестра)
+    :param row_offset: номер первой строки датасета
+    :return: корректные строки, маска корректных строк и отчет
+    """
+    dataset, valid, report = validate_features(
+        dataset, artifacts.schema, row_offset, **artifacts.config
+    )
+    if not valid.all():
+        dataset = dataset[valid]
+    return apply_dtypes(dataset, artifacts.config["preprocessing"]["dtypes"]), valid, report
+
+
+def pipeline_evaluate_validated(
+    dataset: pd.DataFrame,
+    artifacts: Artifacts,
+    return_scores: bool = False,
+    row_offset: int = 0,
+) -> dict:
+    """
+    Предсказания по корректным строкам датасета за один проход модели,
+    строки с ошибками в значениях признаков не прерывают предсказание
+    :param dataset: датасет в формате исходного файла
+    :param artifacts: загруженные заранее артефакты (из реестра)
+    :param return_scores: вернуть также значения решающей функции и вероятности
+    :param row_offset: номер первой строки датасета
+    :return: словарь со списками prediction (и score, probability)
+    по всем строкам (None для строк с ошибками) и отчетом validation
+    """
+    dataset, valid, report = validate_dataset(dataset, artifacts, row_offset)
+    fields = ("prediction", "score", "probability") if return_scores else ("prediction",)
+    if len(dataset) == 0:
+        result = {field: [] for field in fields}
+    elif return_scores:
+        result = pipeline_evaluate(dataset=dataset, artifacts=artifacts, return_scores=True)
+    else:
+        result = {"prediction": pipeline_evaluate(dataset=dataset, artifacts=artifacts)}
+    return {**expand_rows(result, valid), "validation": report}
+
+
+def pipeline_evaluate_chunks(
+    data_path: str,
+    artifacts: Artifacts,
+    chunk_size: int = None,
+    return_scores: bool = False,
+    observe: Callable[[pd.DataFrame], None] = None,
+    validate: bool = False,
+) -> Iterator[Union[list, dict]]:
+    """
+    Получение предсказаний по файлу частями фиксированного размера,
+    чтобы потребление памяти не зависело от размера файла
+    :param data_path: путь до файла с данными (или файловый объект)
+    :param artifacts: загруженные заранее артефакты (из реестра)
+    :param chunk_size: количество строк в одной части,
+    по умолчанию берется из конфигурационного файла
+    :param return_scores: вернуть также значения решающей функции и вероятности
+    :param observe: функция, получающая каждую часть исходных данных
+    (мониторинг сдвига)
+    :param validate: проверять значения признаков по схеме train
+    (см. pipeline_evaluate_validated)
+    :return: итератор по предсказаниям для каждой части
+    """
+    if chunk_size is None:
+        chunk_size = artifacts.config["evaluate"]["chunk_size"]
+
+    preproc = artifacts.config["preprocessing"]
+    row_offset = 0
+    for chunk in get_dataset_chunks(
+        data_path=data_path,
+        chunk_size=chunk_size,
+        drop_columns=preproc["drop_columns"],
+        dtypes=preproc["dtypes"],
+        lenient=validate,
+    ):
+        if validate:
+            result = pipeline_evaluate_validated(
+                dataset=chunk,
+                artifacts=artifacts,
+                return_scores=return_scores,
+                row_offset=row_offset,
+            )
+        else:
+            result = pipeline_evaluate(
+                dataset=chunk, artifacts=artifacts, return_scores=return_scores
+            )
+        # часть учитывается после проверки признаков (и вместе со строками
+        # с ошибками)
+        if observe is not None:
+            observe(chunk)
+        row_offset += len(chunk)
+        yield result
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class SVCKernel:
+    """
+    Вычисление решающей функции обученного SVC по выгруженным массивам
+    (только numpy, без sklearn): f(x) = sum_i a_i * K(sv_i, x) + b
+    """
+
+    def __init__(
+        self,
+        support_vectors: np.ndarray,
+        dual_coef: np.ndarray,
+        intercept: np.ndarray,
+        classes: np.ndarray,
+        kernel: str,
+        gamma: float,
+        coef0: float,
+        degree: int,
+        dtype: str = "float64",
+    ):
+        """
+        :param support_vectors: опорные векторы
+        :param dual_coef: двойственные коэффициенты
+        :param intercept: сдвиг решающей функции
+        :param classes: метки классов
+        :param kernel: ядро (rbf, linear, poly, sigmoid)
+        :param gamma: коэффициент ядра
+        :param coef0: свободный член ядра
+        :param degree: степень полиномиального ядра
+        :param dtype: точность вычислений (float32 или float64)
+        """
+        assert kernel in ("rbf", "linear", "poly", "sigmoid"), f"Ядро {kernel}"
+        self.dtype = np.dtype(dtype)
+        self.support_vectors = np.ascontiguousarray(support_vectors, dtype=self.dtype)
+        self.dual_coef = np.asarray(dual_coef, dtype=self.dtype)
+        self.intercept = self.dtype.type(intercept[0])
+        self.classes_ = np.asarray(classes)
+        self.kernel = kernel
+        self.gamma = self.dtype.type(gamma)
+        self.coef0 = self.dtype.type(coef0)
+        self.degree = int(degree)
+        self._sv_sq_norms = np.einsum(
+            "ij,ij->i", self.support_vectors, self.support_vectors
+        )
+
+    @classmethod
+    def load(cls, kernel_path: str, dtype: str = "float64") -> "SVCKernel":
+        """
+        Загрузка выгруженной модели
+        :param kernel_path: путь до .npz артефакта
+        :param dtype: точность вычислений
+        :return: модель
+        """
+        with np.load(kernel_path) as arrays:
+            return cls(
+                support_vectors=arrays["support_vectors"],
+                dual_coef=arrays["dual_coef"],
+                intercept=arrays["intercept"],
+                classes=arrays["classes"],
+                kernel=str(arrays["kernel"]),
+                gamma=float(arrays["gamma"]),
+                coef0=float(arrays["coef0"]),
+                degree=int(arrays["degree"]),
+                dtype=dtype,
+            )
+
+    def _kernel_matrix(self, X: np.ndarray) -> np.ndarray:
+        """
+        Матрица ядра между объектами и опорными векторами
+        :param X: объект-признаки
+        :return: матрица размера (n_samples, n_support_vectors)
+        """
+        dot = X @ self.support_vectors.T
+        if self.kernel == "linear":
+            return dot
+        if self.kernel == "poly":
+            return (self.gamma * dot + self.coef0) ** self.degree
+        if self.kernel == "sigmoid":
+            return np.tanh(self.gamma * dot + self.coef0)
+
+        # rbf: ||x - sv||^2 = ||x||^2 - 2 x.sv + ||sv||^2
+        sq_dist = np.einsum("ij,ij->i", X, X)[:, None] - 2 * dot + self._sv_sq_norms
+        np.maximum(sq_dist, 0, out=sq_dist)
+        sq_dist *= -self.gamma
+        return np.exp(sq_dist, out=sq_dist)
+
+    def decision_function(self, X: object) -> np.ndarray:
+        """
+        Значения решающей функции
+        :param X: объект-признаки (массив или датафрейм)
+        :return: значения решающей функции
+        """
+        X = np.asarray(X, dtype=self.dtype)
+        return self._kernel_matrix(X) @ self.dual_coef + self.intercept
+
+    def predict(self, X: object) -> np.ndarray:
+        """
+        Предсказание меток классов
+        :param X: объект-признаки (массив или датафрейм)
+        :return: метки классов
+        """
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ..pipeline.pipeline import pipeline_training
+from ..registry.registry import load_config
+from ..monitoring.metrics import STAGE_SECONDS, TRAINING_STAGE_SECONDS
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+def write_job(job_path: str, job: dict) -> None:
+    """
+    Атомарная запись состояния задачи (через временный файл)
+    :param job_path: путь до json с состоянием задачи
+    :param job: состояние задачи
+    """
+    tmp_path = f"{job_path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(job, file)
+    os.replace(tmp_path, job_path)
+
+
+def read_job(job_path: str) -> dict:
+    """
+    Чтение состояния задачи
+    :param job_path: путь до json с состоянием задачи
+    :return: состояние задачи
+    """
+    with open(job_path) as file:
+        return json.load(file)
+
+
+def is_process_alive(pid: int) -> bool:
+    """
+    Проверка, что процесс с заданным pid еще существует
+    :param pid: идентификатор процесса
+    :return: жив ли процесс
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def run_training_job(config_path: str, job_path: str, search: bool = None) -> None:
+    """
+    Обучение модели в отдельном процессе с записью прогресса в файл задачи
+    :param config_path: путь до конфигурационного файла
+    :param job_path: путь до json с состоянием задачи
+    :param search: подбирать ли гиперпараметры
+    """
+    job = read_job(job_path)
+    job.update(
+        status=STATUS_RUNNING, started_at=time.time(), pid=os.getpid(), stage_timings={}
+    )
+    write_job(job_path, job)
+    # метрики процесса накапливаются между задачами (воркер пула
+    # переиспользуется), поэтому время функций считается от снимка до задачи
+    timings_before = STAGE_SECONDS.totals()
+    # время этапа - от его начала до начала следующего этапа
+    stage_start = [None, time.perf_counter()]
+
+    def finish_stage() -> None:
+        now = time.perf_counter()
+        if stage_start[0] is not None:
+            job["stage_timings"][stage_start[0]] = round(now - stage_start[1], 3)
+        stage_start[1] = now
+
+    def callback(stage: str, progress: float) -> None:
+        finish_stage()
+        stage_start[0] = stage
+        job.update(stage=stage, progress=progress)
+        write_job(job_path, job)
+
+    try:
+        version = pipeline_training(
+            config_path=config_path, callback=callback, search=search
+        )
+        with open(load_config(config_path)["train"]["metrics_path"]) as json_file:
+            metrics = json.load(json_file)
+        job.update(
+            status=STATUS_DONE,
+            stage="done",
+            progress=1.0,
+            metrics=metrics,
+            version=version,
+        )
+    except Exception as exc:
+        job.update(status=STATUS_FAILED, error=repr(exc))
+    finally:
+        finish_stage()
+        # суммарное время функций предобработки и предсказания внутри обучения
+        job["function_timings"] = {}
+        for key, (total, count) in STAGE_SECONDS.totals().items():
+            total_before, count_before = timings_before.get(key, (0.0, 0))
+            if count > count_before:
+                job["function_timings"][key[0]] = {
+                    "seconds": round(total - total_before, 3),
+                    "calls": count - count_before,
+                }
+        job["finished_at"] = time.time()
+        write_job(job_path, job)
+
+
+class TrainingJobs:
+    """
+    Фоновые задачи обучения модели: обучение выполняется в пуле процессов,
+    состояние задач хранится в json-файлах, одновременно может выполняться
+    только одна задача - повторные запросы получают уже запущенную задачу
+    """
+
+    def __init__(self, config_path: str, jobs_dir: str, max_workers: int = 1):
+        """
+        :param config_path: путь до конфигурационного файла
+        :param jobs_dir: папка для хранения состояний задач
+        :param max_workers: количество процессов для обучения
+        """
+        self.config_path = config_path
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._recorded = set()
+        # задачи, отправленные в пул этим процессом: job_id -> future
+        self._futures = {}
+
+    def _job_path(self, job_id: str) -> str:
+        """
+        Путь до json с состоянием задачи
+        :param job_id: идентификатор задачи
+        :return: путь до файла
+        """
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _active_job(self) -> dict:
+        """
+        Поиск незавершенной задачи, задачи с завершившимися процессами
+        помечаются как упавшие
+        :return: состояние незавершенной задачи или None
+        """
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(".json"):
+                continue
+            job_path = os.path.join(self.jobs_dir, name)
+            job = read_job(job_path)
+            if job["status"] not in ACTIVE_STATUSES:
+                continue
+
+            if job["status"] == STATUS_QUEUED and job["owner_pid"] == os.getpid():
+                # задача этого процесса жива, пока ее future не завершился
+                # (иначе задача потеряна пулом или прежним экземпляром TrainingJobs)
+                future = self._futures.get(job["job_id"])
+                if future is not None and not future.done():
+                    return job
+            elif is_process_alive(job.get("pid", job["owner_pid"])):
+                return job
+
+            job.update(status=STATUS_FAILED, error="Процесс обучения был прерван")
+            write_job(job_path, job)
+        return None
+
+    def submit(self, search: bool = None) -> dict:
+        """
+        Запуск обучения, если оно еще не запущено
+        :param search: подбирать ли гиперпараметры (по умолчанию - search.enabled)
+        :return: состояние новой или уже выполняющейся задачи
+        """
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.jobs_dir, ".lock"), "w") as lock:
+            # блокировка на файле защищает и от запуска из других воркеров
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            job = self._active_job()
+            if job is not None:
+                return self._with_elapsed(job)
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "status": STATUS_QUEUED,
+                "stage": None,
+                "progress": 0.0,
+                "created_at": time.time(),
+                "owner_pid": os.getpid(),
+                "search": search,
+            }
+            job_path = self._job_path(job["job_id"])
+            write_job(job_path, job)
+
+            if self._executor is None:
+                self._executor = self._new_executor()
+            try:
+                future = self._executor.submit(
+                    run_training_job, self.config_path, job_path, search
+                )
+            except BrokenProcessPool:
+                # процесс пула был убит во время прошлой задачи
+                self._executor = self._new_executor()
+                future = self._executor.submit(
+                    run_training_job, self.config_path, job_path, search
+                )
+            self._futures[job["job_id"]] = future
+            future.add_done_callback(
+                lambda future: self._finish_future(job_path, future)
+            )
+        return self._with_elapsed(job)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        """
+        Пул процессов для обучения
+        :return: пул процессов
+        """
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    @staticmethod
+    def _finish_future(job_path: str, future: Future) -> None:
+        """
+        Задача, future которой завершился без записи итогового состояния
+        (отменена при остановке или процесс пула убит), помечается упавшей
+        :param job_path: путь до json с состоянием задачи
+        :param future: future задачи в пуле
+        """
+        job = read_job(job_path)
+        if job["status"] not in ACTIVE_STATUSES:
+            return
+        if future.cancelled():
+            error = "Задача обучения отменена"
+        elif future.exception() is not None:
+            error = repr(future.exception())
+        else:
+            error = "Процесс обучения был прерван"
+        job.update(status=STATUS_FAILED, error=error)
+        write_job(job_path, job)
+
+    def get(self, job_id: str) -> dict:
+        """
+        Получение состояния задачи
+        :param job_id: идентификатор задачи
+        :return: состояние задачи или None, если задача не найдена
+        """
+        job_path = self._job_path(job_id)
+        if not job_id.isalnum() or not os.path.exists(job_path):
+            return None
+        return self._with_elapsed(read_job(job_path))
+
+    @staticmethod
+    def _with_elapsed(job: dict) -> dict:
+        """
+        Добавление времени выполнения задачи в секундах
+        :param job: состояние задачи
+        :return: состояние задачи
+        """
+        started_at = job.get("started_at")
+        if started_at is None:
+            job["elapsed"] = 0.0
+        else:
+            job["elapsed"] = round(job.get("finished_at", time.time()) - started_at, 3)
+        return job
+
+    def collect_timings(self) -> None:
+        """
+        Учет времени этапов завершившихся задач в метриках процесса
+        (обучение выполняется в дочернем процессе и возвращает их с результатом)
+        """
+        if not os.path.isdir(self.jobs_dir):
+            return
+        for name in os.listdir(self.jobs_dir):
+            job_id = name[: -len(".json")]
+            if not name.endswith(".json") or job_id in self._recorded:
+                continue
+            job = read_job(os.path.join(self.jobs_dir, name))
+            if job["status"] in ACTIVE_STATUSES:
+                continue
+            self._recorded.add(job_id)
+            for stage, seconds in job.get("stage_timings", {}).items():
+                TRAINING_STAGE_SECONDS.observe(seconds, stage=stage)
+
+    def shutdown(self) -> None:
+        """
+        Остановка пула процессов (выполняющееся обучение дорабатывает)
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
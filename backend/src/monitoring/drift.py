@@ -0,0 +1,471 @@
+import bisect
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ..evaluate.cache import feature_casts
+
+# служебные ячейки категориальных признаков
+MISSING = "__missing__"
+OTHER = "__other__"
+
+
+def psi(expected: np.ndarray, actual: np.ndarray, eps: float = 1e-4) -> float:
+    """
+    Population Stability Index между двумя распределениями по одним ячейкам
+    :param expected: частоты эталонного распределения
+    :param actual: частоты текущего распределения
+    :param eps: минимальная доля ячейки (пустые ячейки не дают бесконечность)
+    :return: значение PSI
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.sum() == 0 or actual.sum() == 0:
+        return float("nan")
+    p = np.clip(expected / expected.sum(), eps, None)
+    q = np.clip(actual / actual.sum(), eps, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_binned(expected: np.ndarray, actual: np.ndarray) -> float:
+    """
+    Статистика Колмогорова-Смирнова по гистограммам с общими границами
+    (максимум разности функций распределения на границах ячеек)
+    :param expected: частоты эталонного распределения
+    :param actual: частоты текущего распределения
+    :return: значение KS
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.sum() == 0 or actual.sum() == 0:
+        return float("nan")
+    cdf_expected = np.cumsum(expected) / expected.sum()
+    cdf_actual = np.cumsum(actual) / actual.sum()
+    return float(np.max(np.abs(cdf_expected - cdf_actual)))
+
+
+class FeatureSketch:
+    """
+    Сжатое описание распределений признаков фиксированного размера:
+    гистограммы по заданным границам для числовых признаков и частоты
+    категорий (неизвестные значения - в отдельной ячейке). Обновляется
+    частями, память не зависит от количества объектов
+    """
+
+    def __init__(self, edges: dict, ranges: dict, categories: dict, casts: dict):
+        """
+        :param edges: числовой признак -> внутренние границы ячеек
+        :param ranges: числовой признак -> [минимум, максимум] в train
+        :param categories: категориальный признак -> известные значения
+        :param casts: функции приведения значений (feature_casts)
+        """
+        self.edges = {
+            column: np.asarray(value, dtype=np.float64)
+            for column, value in edges.items()
+        }
+        self.ranges = ranges
+        self.casts = casts
+        self.n_rows = 0
+        self.numeric = {
+            column: np.zeros(len(value) + 1, dtype=np.int64)
+            for column, value in self.edges.items()
+        }
+        self.categorical = {
+            column: dict.fromkeys(list(values) + [OTHER], 0)
+            for column, values in categories.items()
+        }
+        self.missing = dict.fromkeys(list(self.numeric) + list(self.categorical), 0)
+        self.out_of_range = dict.fromkeys(self.numeric, 0)
+
+    @classmethod
+    def fit(
+        cls,
+        data: pd.DataFrame,
+        numeric_columns: list,
+        categorical_columns: list,
+        casts: dict,
+        n_bins: int,
+    ) -> "FeatureSketch":
+        """
+        Эталонное описание: границы ячеек - квантили данных, категории -
+        значения из данных
+        :param data: датасет (после замены значений)
+        :param numeric_columns: числовые признаки
+        :param categorical_columns: категориальные признаки
+        :param casts: функции приведения значений
+        :param n_bins: количество ячеек гистограммы
+        :return: описание, заполненное по data
+        """
+        levels = np.linspace(0, 1, n_bins + 1)[1:-1]
+        edges, ranges = {}, {}
+        for column in numeric_columns:
+            values = pd.to_numeric(data[column], errors="coerce").to_numpy(
+                dtype=np.float64
+            )
+            edges[column] = np.unique(np.nanquantile(values, levels)).tolist()
+            ranges[column] = [float(np.nanmin(values)), float(np.nanmax(values))]
+        categories = {
+            column: sorted(
+                str(casts[column](value)) for value in data[column].dropna().unique()
+            )
+            for column in categorical_columns
+        }
+        sketch = cls(edges, ranges, categories, casts)
+        sketch.update_frame(data)
+        return sketch
+
+    @classmethod
+    def from_dict(cls, sketch_dict: dict, casts: dict) -> "FeatureSketch":
+        """
+        Загрузка описания из словаря (json артефакта)
+        :param sketch_dict: словарь из to_dict
+        :param casts: функции приведения значений
+        :return: описание
+        """
+        numeric = sketch_dict["numeric"]
+        categorical = sketch_dict["categorical"]
+        sketch = cls(
+            edges={column: value["edges"] for column, value in numeric.items()},
+            ranges={column: value["range"] for column, value in numeric.items()},
+            categories={
+                column: [key for key in value["counts"] if key != OTHER]
+                for column, value in categorical.items()
+            },
+            casts=casts,
+        )
+        sketch.n_rows = sketch_dict["n_rows"]
+        for column, value in numeric.items():
+            sketch.numeric[column] += np.asarray(value["counts"], dtype=np.int64)
+            sketch.missing[column] = value["missing"]
+            sketch.out_of_range[column] = value["out_of_range"]
+        for column, value in categorical.items():
+            sketch.categorical[column].update(value["counts"])
+            sketch.missing[column] = value["missing"]
+        return sketch
+
+    def to_dict(self) -> dict:
+        """
+        Словарь для сохранения в json
+        :return: словарь с границами и частотами
+        """
+        return {
+            "n_rows": self.n_rows,
+            "numeric": {
+                column: {
+                    "edges": self.edges[column].tolist(),
+                    "range": self.ranges[column],
+                    "counts": counts.tolist(),
+                    "missing": self.missing[column],
+                    "out_of_range": self.out_of_range[column],
+                }
+                for column, counts in self.numeric.items()
+            },
+            "categorical": {
+                column: {"counts": dict(counts), "missing": self.missing[column]}
+                for column, counts in self.categorical.items()
+            },
+        }
+
+    def empty_like(self) -> "FeatureSketch":
+        """
+        Пустое описание с теми же ячейками
+        :return: описание без объектов
+        """
+        return FeatureSketch(
+            self.edges,
+            self.ranges,
+            {column: list(counts)[:-1] for column, counts in self.categorical.items()},
+            self.casts,
+        )
+
+    def _category(self, column: str, value: object) -> str:
+        """
+        Ячейка категориального признака для значения: значение приводится
+        к каноническому виду train (Yes/No бинарных признаков из формы -
+        к кодам 1/0, как в FeatureEncoder), иначе попадает в OTHER
+        :param column: признак
+        :param value: значение
+        :return: каноническое значение, MISSING или OTHER
+        """
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return MISSING
+        try:
+            key = str(self.casts[column](value))
+        except (TypeError, ValueError):
+            return OTHER
+        return key if key in self.categorical[column] else OTHER
+
+    def update_frame(self, data: pd.DataFrame) -> None:
+        """
+        Добавление датасета: гистограммы векторно, категории - по частотам
+        :param data: датасет с признаками
+        """
+        self.n_rows += len(data)
+        for column, edges in self.edges.items():
+            values = pd.to_numeric(data[column], errors="coerce").to_numpy(
+                dtype=np.float64
+            )
+            missing = np.isnan(values)
+            values = values[~missing]
+            self.numeric[column] += np.bincount(
+                np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1
+            )
+            low, high = self.ranges[column]
+            self.missing[column] += int(missing.sum())
+            self.out_of_range[column] += int(
+                np.count_nonzero((values < low) | (values > high))
+            )
+        for column, counts in self.categorical.items():
+            for value, count in data[column].value_counts(dropna=False).items():
+                if count:
+                    key = self._category(column, value)
+                    if key == MISSING:
+                        self.missing[column] += int(count)
+                    else:
+                        counts[key] += int(count)
+
+    def update_records(self, records: list) -> None:
+        """
+        Добавление записей с введенными данными (без pandas)
+        :param records: список словарей с признаками
+        """
+        self.n_rows += len(records)
+        for record in records:
+            for column, edges in self.edges.items():
+                value = record.get(column)
+                if value is None or np.isnan(float(value)):
+                    self.missing[column] += 1
+                    continue
+                value = float(value)
+                self.numeric[column][bisect.bisect_right(edges, value)] += 1
+                low, high = self.ranges[column]
+                self.out_of_range[column] += not low <= value <= high
+            for column, counts in self.categorical.items():
+                key = self._category(column, record.get(column))
+                if key == MISSING:
+                    self.missing[column] += 1
+                else:
+                    counts[key] += 1
+
+    def merge(self, other: "FeatureSketch") -> None:
+        """
+        Добавление частот другого описания с теми же ячейками
+        :param other: описание
+        """
+        self.n_rows += other.n_rows
+        for column, counts in other.numeric.items():
+            self.numeric[column] += counts
+            self.out_of_range[column] += other.out_of_range[column]
+        for column, counts in other.categorical.items():
+            for key, count in counts.items():
+                self.categorical[column][key] += count
+        for column, count in other.missing.items():
+            self.missing[column] += count
+
+    def drift(self, reference: "FeatureSketch") -> dict:
+        """
+        Сдвиг распределений относительно эталона по каждому признаку
+        :param reference: эталонное описание (train)
+        :return: словарь признак -> psi, ks (для числовых), доли пропусков,
+        значений вне диапазона train и неизвестных категорий
+        """
+        rate = lambda count: round(count / self.n_rows, 4) if self.n_rows else 0.0
+        features = {}
+        for column, counts in self.numeric.items():
+            expected = reference.numeric[column]
+            features[column] = {
+                "psi": round(psi(expected, counts), 4),
+                "ks": round(ks_binned(expected, counts), 4),
+                "missing_rate": rate(self.missing[column]),
+                "out_of_range_rate": rate(self.out_of_range[column]),
+            }
+        for column, counts in self.categorical.items():
+            keys = list(counts)
+            expected = [reference.categorical[column][key] for key in keys]
+            features[column] = {
+                "psi": round(psi(expected, [counts[key] for key in keys]), 4),
+                "missing_rate": rate(self.missing[column]),
+                "unseen_rate": rate(counts[OTHER]),
+            }
+        return features
+
+    def save(self, path: str) -> None:
+        """
+        Сохранение описания в json
+        :param path: путь до файла
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+
+def fit_reference(data: pd.DataFrame, **kwargs) -> FeatureSketch:
+    """
+    Эталонное описание признаков train: гистограммы для scale_columns,
+    частоты категорий для one_hot_columns и passthrough_columns
+    :param data: трейн (после удаления признаков и замены значений)
+    :return: описание
+    """
+    preproc = kwargs["preprocessing"]
+    return FeatureSketch.fit(
+        data,
+        numeric_columns=preproc["scale_columns"],
+        categorical_columns=(
+            preproc["one_hot_columns"] + preproc["passthrough_columns"]
+        ),
+        casts=feature_casts(kwargs),
+        n_bins=kwargs["monitoring"]["drift"]["n_bins"],
+    )
+
+
+def save_drift_reference(data: pd.DataFrame, **kwargs) -> None:
+    """
+    Сохранение эталонного описания признаков train
+    :param data: трейн (после удаления признаков и замены значений)
+    """
+    sketch = fit_reference(data, **kwargs)
+    sketch.save(kwargs["preprocessing"]["drift_reference_path"])
+
+
+class DriftMonitor:
+    """
+    Мониторинг сдвига данных в запросах на предсказание: для каждой версии
+    модели текущее описание признаков обновляется частями и сравнивается
+    с эталоном из train. Хранятся только частоты по ячейкам, поэтому
+    ни запросы, ни train для расчета сдвига не перечитываются
+    """
+
+    def __init__(self, min_rows: int, psi_warning: float, psi_alert: float):
+        """
+        :param min_rows: минимум объектов для оценки сдвига
+        :param psi_warning: порог PSI для предупреждения
+        :param psi_alert: порог PSI для сигнала о сдвиге
+        """
+        self.min_rows = min_rows
+        self.psi_warning = psi_warning
+        self.psi_alert = psi_alert
+        self._sketches = {}
+        self._lock = threading.Lock()
+
+    def _sketches_for(self, artifacts: object) -> tuple:
+        """
+        Эталонное и текущее описания версии (создаются при первом запросе)
+        :param artifacts: набор артефактов версии модели
+        :return: (эталон, текущее описание) или None, если эталона нет
+        """
+        if artifacts.drift_reference is None:
+            return None
+        with self._lock:
+            if artifacts.version not in self._sketches:
+                reference = FeatureSketch.from_dict(
+                    artifacts.drift_reference, feature_casts(artifacts.config)
+                )
+                self._sketches[artifacts.version] = (reference, reference.empty_like())
+            return self._sketches[artifacts.version]
+
+    def observe_frame(self, artifacts: object, data: pd.DataFrame) -> None:
+        """
+        Учет датасета из запроса (в формате исходного файла)
+        :param artifacts: набор артефактов версии модели
+        :param data: датасет
+        """
+        sketches = self._sketches_for(artifacts)
+        if sketches is None:
+            return
+        # частоты части считаются без блокировки, затем добавляются
+        part = sketches[1].empty_like()
+        part.update_frame(data)
+        with self._lock:
+            sketches[1].merge(part)
+
+    def observe_records(self, artifacts: object, records: list) -> None:
+        """
+        Учет записей с введенными данными
+        :param artifacts: набор артефактов версии модели
+        :param records: список словарей с признаками Patient
+        """
+        sketches = self._sketches_for(artifacts)
+        if sketches is None:
+            return
+        with self._lock:
+            sketches[1].update_records(records)
+
+    def retain(self, versions: set) -> None:
+        """
+        Удаление описаний версий, на которые больше не идет трафик
+        :param versions: активные версии
+        """
+        with self._lock:
+            for version in [key for key in self._sketches if key not in versions]:
+                del self._sketches[version]
+
+    def _status(self, value: float) -> str:
+        """
+        Статус признака по PSI
+        :param value: значение PSI
+        :return: ok, warning или drift
+        """
+        if value >= self.psi_alert:
+            return "drift"
+        if value >= self.psi_warning:
+            return "warning"
+        return "ok"
+
+    def state(self) -> dict:
+        """
+        Описания версий для объединения с другими воркерами
+        :return: словарь версия -> эталонное и текущее описания (to_dict)
+        """
+        with self._lock:
+            return {
+                version: {
+                    "reference": reference.to_dict(),
+                    "current": current.to_dict(),
+                }
+                for version, (reference, current) in self._sketches.items()
+            }
+
+    def report(self, version: str = None, others: list = ()) -> dict:
+        """
+        Сдвиг данных по версиям модели
+        :param version: версия (None - все версии с запросами)
+        :param others: состояния (state) мониторинга других воркеров
+        :return: словарь версия -> количество объектов, статус
+        и оценки по признакам
+        """
+        with self._lock:
+            sketches = {}
+            for key, (reference, current) in self._sketches.items():
+                sketches[key] = (reference, current.empty_like())
+                sketches[key][1].merge(current)
+        # частоты других воркеров добавляются к текущим описаниям
+        # (приведение значений для объединения не нужно)
+        for state in others:
+            for key, item in state.items():
+                if key not in sketches:
+                    reference = FeatureSketch.from_dict(item["reference"], casts={})
+                    sketches[key] = (reference, reference.empty_like())
+                current = FeatureSketch.from_dict(item["current"], casts={})
+                sketches[key][1].merge(current)
+
+        if version is not None and version not in sketches:
+            raise KeyError(version)
+        versions = [version] if version is not None else list(sketches)
+        reports = {}
+        for key in versions:
+            reference, current = sketches[key]
+            reports[key] = (current.n_rows, current.drift(reference))
+
+        result = {}
+        for key, (n_rows, features) in reports.items():
+            enough = n_rows >= self.min_rows
+            for scores in features.values():
+                scores["status"] = self._status(scores["psi"]) if enough else None
+            statuses = {scores["status"] for scores in features.values()}
+            status = next(
+                (name for name in ("drift", "warning", "ok") if name in statuses),
+                "insufficient_data",
+            )
+            result[key] = {"n_rows": n_rows, "status": status, "features": features}
+        return result
@@ -0,0 +1,306 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+# границы бакетов гистограмм по умолчанию (секунды)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+ROWS_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+def format_labels(labels: tuple, values: tuple) -> str:
+    """
+    Метки метрики в формате Prometheus
+    :param labels: названия меток
+    :param values: значения меток
+    :return: строка вида {name="value",...}
+    """
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in zip(labels, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """
+    Счетчик с метками (название метрики - с суффиксом _total, как у значений)
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labels: tuple = (), shared: bool = False
+    ):
+        """
+        :param name: название метрики (без суффикса _total)
+        :param documentation: описание метрики
+        :param labels: названия меток
+        :param shared: значения одинаковы во всех воркерах (не суммируются)
+        """
+        self.name = f"{name}_total"
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.shared = shared
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """
+        Увеличение счетчика
+        :param amount: на сколько увеличить
+        :param labels: значения меток
+        """
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def state(self) -> list:
+        """
+        Значения для объединения с другими воркерами (сериализуемые в json)
+        :return: список [значения меток, значение]
+        """
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def samples(self, others: list = ()) -> list:
+        """
+        Строки с текущими значениями
+        :param others: состояния (state) этой метрики в других воркерах
+        :return: список строк
+        """
+        with self._lock:
+            values = dict(self._values)
+        for state in others:
+            for key, value in state:
+                key = tuple(key)
+                values[key] = values.get(key, 0.0) + value
+        return [
+            f"{self.name}{format_labels(self.labels, key)} {value}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram:
+    """
+    Гистограмма с метками (накопительные бакеты, сумма и количество)
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+        shared: bool = False,
+    ):
+        """
+        :param name: название метрики
+        :param documentation: описание метрики
+        :param labels: названия меток
+        :param buckets: верхние границы бакетов
+        :param shared: значения одинаковы во всех воркерах (не суммируются)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.shared = shared
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Учет наблюдения
+        :param value: значение
+        :param labels: значения меток
+        """
+        key = tuple(labels[name] for name in self.labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][position] += 1
+            state[1] += value
+            state[2] += 1
+
+    def totals(self) -> dict:
+        """
+        Сумма и количество наблюдений для каждого набора меток
+        :return: словарь значения меток -> (сумма, количество)
+        """
+        with self._lock:
+            return {key: (state[1], state[2]) for key, state in self._values.items()}
+
+    def state(self) -> list:
+        """
+        Значения для объединения с другими воркерами (сериализуемые в json)
+        :return: список [значения меток, бакеты, сумма, количество]
+        """
+        with self._lock:
+            return [
+                [list(key), [*state[0]], state[1], state[2]]
+                for key, state in self._values.items()
+            ]
+
+    def samples(self, others: list = ()) -> list:
+        """
+        Строки с текущими значениями
+        :param others: состояния (state) этой метрики в других воркерах
+        :return: список строк
+        """
+        with self._lock:
+            values = {key: ([*state[0]], state[1], state[2]) for key, state in self._values.items()}
+        for state in others:
+            for key, counts, total, count in state:
+                key = tuple(key)
+                if key in values:
+                    own_counts, own_total, own_count = values[key]
+                    counts = [a + b for a, b in zip(own_counts, counts)]
+                    total, count = own_total + total, own_count + count
+                values[key] = (counts, total, count)
+
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                labels = format_labels(self.labels + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Метрики процесса и их вывод в текстовом формате Prometheus
+    (без внешнего сервера и сторонних библиотек)
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: object) -> object:
+        """
+        Регистрация метрики
+        :param metric: Counter или Histogram
+        :return: та же метрика
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def state(self) -> dict:
+        """
+        Значения метрик процесса для объединения с другими воркерами
+        (кроме метрик, одинаковых во всех воркерах)
+        :return: словарь название -> состояние метрики
+        """
+        return {
+            metric.name: metric.state() for metric in self._metrics if not metric.shared
+        }
+
+    def render(self, others: list = ()) -> str:
+        """
+        Текстовое представление всех метрик
+        :param others: состояния (state) метрик других воркеров
+        :return: текст в формате Prometheus exposition
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(
+                metric.samples([state.get(metric.name, []) for state in others])
+            )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REQUESTS = REGISTRY.register(
+    Counter("http_requests", "Количество запросов", ("method", "path", "status"))
+)
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Время обработки запроса (до отправки заголовков ответа)",
+        ("method", "path"),
+    )
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "stage_duration_seconds", "Время выполнения этапов инференса", ("stage",)
+    )
+)
+PREDICTION_ROWS = REGISTRY.register(
+    Histogram(
+        "prediction_rows",
+        "Количество строк в запросе на предсказание",
+        ("path",),
+        buckets=ROWS_BUCKETS,
+    )
+)
+ARTIFACT_LOADS = REGISTRY.register(
+    Counter("artifact_loads", "Загрузки версий модели", ("version", "status"))
+)
+CACHE_LOOKUPS = REGISTRY.register(
+    Counter("prediction_cache_lookups", "Поиск предсказаний в кэше", ("result",))
+)
+VALIDATION_ERRORS = REGISTRY.register(
+    Counter(
+        "validation_errors",
+        "Ошибки в значениях признаков запросов на предсказание",
+        ("column", "kind"),
+    )
+)
+TRAINING_STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "training_stage_duration_seconds",
+        "Время выполнения этапов обучения",
+        ("stage",),
+        buckets=LATENCY_BUCKETS + (30.0, 60.0, 300.0, 900.0),
+        # каждый воркер считает время по общим файлам задач
+        shared=True,
+    )
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    Замер времени этапа
+    :param stage: название этапа
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def timed(stage: str) -> Callable:
+    """
+    Декоратор для замера времени функции как этапа
+    :param stage: название этапа
+    :return: декоратор
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
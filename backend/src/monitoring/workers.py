@@ -0,0 +1,113 @@
+import os
+import json
+import asyncio
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from ..jobs.jobs import is_process_alive
+
+
+class WorkerStates:
+    """
+    Объединение мониторинга воркеров uvicorn: каждый воркер раз
+    в flush_seconds пишет свое состояние (метрики, описания сдвига,
+    статистику) в файл state_dir/<group>/<pid>.json, а endpoints мониторинга
+    добавляют к состоянию своего процесса файлы остальных живых воркеров
+    той же группы
+    """
+
+    def __init__(
+        self,
+        collect: Callable[[], dict],
+        state_dir: str,
+        flush_seconds: float,
+        group: str = None,
+    ):
+        """
+        :param collect: функция, возвращающая состояние процесса (json)
+        :param state_dir: папка с файлами состояний воркеров
+        :param flush_seconds: период записи состояния
+        :param group: подпапка воркеров одного приложения (по умолчанию -
+        pid родительского процесса, общего для воркеров одного запуска uvicorn)
+        """
+        self.collect = collect
+        # приложения на одном хосте не читают состояния друг друга
+        self.state_dir = os.path.join(state_dir, str(group or os.getppid()))
+        self.flush_seconds = flush_seconds
+        self.path = os.path.join(state_dir, f"{os.getpid()}.json")
+        self._task = None
+
+    def flush(self) -> None:
+        """
+        Атомарная запись состояния процесса (через временный файл)
+        """
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(f"{self.path}.tmp", "w") as file:
+            json.dump(self.collect(), file)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def others(self) -> list:
+        """
+        Состояния других живых воркеров (файлы завершившихся удаляются)
+        :return: список состояний
+        """
+        if not os.path.isdir(self.state_dir):
+            return []
+        states = []
+        for name in os.listdir(self.state_dir):
+            path = os.path.join(self.state_dir, name)
+            pid = name[: -len(".json")]
+            # посторонние файлы (не <pid>.json) пропускаются
+            if not name.endswith(".json") or not pid.isdigit() or path == self.path:
+                continue
+            if not is_process_alive(int(pid)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                with open(path) as file:
+                    states.append(json.load(file))
+            except FileNotFoundError:
+                # воркер завершился между проверкой и чтением
+                continue
+        return states
+
+    async def start(self) -> None:
+        """
+        Запись состояния при старте и запуск периодической записи
+        в текущем event loop
+        """
+        await run_in_threadpool(self.flush)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Остановка периодической записи и удаление файла состояния
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        try:
+            # папка группы удаляется последним воркером
+            os.rmdir(self.state_dir)
+        except OSError:
+            pass
+
+    async def _run(self) -> None:
+        """
+        Периодическая запись состояния
+        """
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await run_in_threadpool(self.flush)
@@ -0,0 +1,99 @@
+import os
+import glob
+import shutil
+import hashlib
+import joblib
+from typing import Callable, Iterable
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Хэш содержимого файла
+    :param path: путь до файла
+    :param block_size: размер блока для чтения
+    :return: hex-строка хэша
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StepCache:
+    """
+    Кэш этапов пайплайна по хэшу входов (по аналогии с DVC): результат этапа
+    и его выходные файлы сохраняются под ключом, зависящим от ключей
+    предыдущих этапов и нужной этапу части params.yaml
+    """
+
+    def __init__(self, cache_dir: str, enabled: bool = True, max_entries: int = 3):
+        """
+        :param cache_dir: папка для хранения результатов этапов
+        :param enabled: использовать ли кэш
+        :param max_entries: сколько последних результатов хранить для каждого этапа
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(step: str, *inputs) -> str:
+        """
+        Ключ этапа по его названию и входам
+        :param step: название этапа
+        :param inputs: входы этапа (ключи предыдущих этапов, параметры)
+        :return: ключ
+        """
+        return joblib.hash((step,) + inputs)
+
+    def run(
+        self, step: str, key: str, fn: Callable[[], object], outs: Iterable[str] = ()
+    ) -> object:
+        """
+        Выполнение этапа или загрузка его результата из кэша
+        :param step: название этапа
+        :param key: ключ этапа
+        :param fn: функция, выполняющая этап
+        :param outs: пути до файлов, которые записывает этап
+        :return: результат этапа
+        """
+        if not self.enabled:
+            return fn()
+
+        entry_dir = os.path.join(self.cache_dir, f"{step}-{key}")
+        result_path = os.path.join(entry_dir, "result.joblib")
+        if os.path.exists(result_path):
+            # восстановление выходных файлов этапа
+            for i, out in enumerate(outs):
+                shutil.copyfile(os.path.join(entry_dir, f"out_{i}"), out)
+            os.utime(entry_dir)
+            return joblib.load(result_path)
+
+        result = fn()
+
+        tmp_dir = f"{entry_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for i, out in enumerate(outs):
+            shutil.copyfile(out, os.path.join(tmp_dir, f"out_{i}"))
+        joblib.dump(result, os.path.join(tmp_dir, "result.joblib"))
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+
+        self._prune(step)
+        return result
+
+    def _prune(self, step: str) -> None:
+        """
+        Удаление старых результатов этапа сверх max_entries
+        :param step: название этапа
+        """
+        entries = [
+            path
+            for path in glob.glob(os.path.join(self.cache_dir, f"{step}-*"))
+            if not path.endswith(".tmp")
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[self.max_entries :]:
+            shutil.rmtree(path, ignore_errors=True)
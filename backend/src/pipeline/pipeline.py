@@ -3,18 +3,39 @@ import os
 import joblib
 import yaml
 import json
+from typing import Callable
 
-from ..train.train import train_model, save_feature_importances
-from ..data.get_data import get_dataset
-from ..transform.transform import train_preprocess
+from ..train.train import make_model, fit_model, save_feature_importances
+from ..train.metrics import save_metrics
+from ..train.export import export_svc
+from ..train.calibration import fit_calibrator
+from ..train.search import search_params
+from ..data.get_data import get_dataset, convert_to_parquet
+from ..data.eda import save_eda_summary
+from ..transform.transform import split_preprocess, transform_columns
+from ..transform.schema import save_train_schema
+from ..transform.streaming import streaming_preprocess
+from ..registry.store import publish_version
+from ..monitoring.drift import save_drift_reference
+from .cache import StepCache, file_hash
 
 
-def pipeline_training(config_path: str) -> None:
+def pipeline_training(
+    config_path: str,
+    callback: Callable[[str, float], None] = None,
+    search: bool = None,
+) -> str:
     """
-    Полный цикл получения данных, предобработки и тренировки модели
+    Полный цикл получения данных, предобработки и тренировки модели.
+    Этапы с неизменившимися входами загружаются из кэша
     :param config_path: путь до файла с конфигурациями
-    :return: None
+    :param callback: функция для передачи прогресса (этап, доля выполнения)
+    :param search: подбирать ли гиперпараметры (по умолчанию - search.enabled)
+    :return: идентификатор опубликованной версии модели
     """
+    if callback is None:
+        callback = lambda stage, progress: None
+
     # get params
     with open(config_path) as file:
         config = yaml.load(file, Loader=yaml.FullLoader)
@@ -22,29 +43,231 @@ def pipeline_training(config_path: str) -> None:
     train_config = config["train"]
     feature_imp_config = config["permutation_importances"]
 
+    cache = StepCache(
+        cache_dir=train_config["cache_dir"], enabled=train_config["cache_enabled"]
+    )
+
     # get data
-    train_data = get_dataset(data_path=preprocessing_config["raw_train_path"])
+    callback("get data", 0.0)
+    raw_train_path = preprocessing_config["raw_train_path"]
+    if preprocessing_config["data_format"] == "parquet":
+        raw_train_path = convert_to_parquet(
+            raw_train_path, dtypes=preprocessing_config["dtypes"]
+        )
+    # агрегаты для страницы EDA (по частям файла, только при изменении данных)
+    cache.run(
+        "eda",
+        cache.key("eda", file_hash(raw_train_path), config["eda"]),
+        lambda: save_eda_summary(raw_train_path, **config),
+        outs=[config["eda"]["eda_path"]],
+    )
+    split_params = {
+        name: preprocessing_config[name]
+        for name in (
+            "drop_columns",
+            "map_change_columns",
+            "target_column",
+            "test_size",
+            "random_state",
+        )
+    }
+    transform_params = {
+        name: preprocessing_config[name]
+        for name in ("one_hot_columns", "scale_columns", "passthrough_columns")
+    }
+    streaming_config = preprocessing_config["streaming"]
+    if streaming_config["enabled"]:
+        # данные больше оперативной памяти: два прохода по частям файла,
+        # признаки записываются в матрицы на диске (этап всегда выполняется,
+        # ключ нужен для кэширования следующих этапов)
+        callback("preprocessing", 0.1)
+        transform_key = cache.key(
+            "streaming",
+            file_hash(raw_train_path),
+            preprocessing_config["dtypes"],
+            split_params,
+            transform_params,
+            streaming_config["chunk_size"],
+        )
+        X_train, X_test, y_train, y_test = streaming_preprocess(
+            data_path=raw_train_path, **config
+        )
+    else:
+        data_key = cache.key(
+            "data",
+            file_hash(raw_train_path),
+            preprocessing_config["drop_columns"],
+            preprocessing_config["dtypes"],
+        )
+        train_data = cache.run(
+            "data",
+            data_key,
+            lambda: get_dataset(
+                data_path=raw_train_path,
+                drop_columns=preprocessing_config["drop_columns"],
+                dtypes=preprocessing_config["dtypes"],
+                memory_map=preprocessing_config["memory_map"],
+            ),
+        )
+
+        # splitting data and preprocessing
+        callback("preprocessing", 0.1)
+        split_key = cache.key(
+            "split",
+            data_key,
+            split_params,
+            preprocessing_config["scale_columns"],
+            config["monitoring"]["drift"]["n_bins"],
+        )
+
+        def split_step():
+            # сохранение схемы признаков из train
+            save_train_schema(
+                data=train_data,
+                drop_columns=preprocessing_config["drop_columns"],
+                map_change_columns=preprocessing_config["map_change_columns"],
+                target_column=preprocessing_config["target_column"],
+                scale_columns=preprocessing_config["scale_columns"],
+                schema_path=preprocessing_config["schema_path"],
+            )
+            split = split_preprocess(data=train_data, **config)
+            # эталонные распределения признаков train для мониторинга сдвига
+            save_drift_reference(data=split[0], **config)
+            return split
+
+        X_train, X_test, y_train, y_test = cache.run(
+            "split",
+            split_key,
+            split_step,
+            outs=[
+                preprocessing_config["schema_path"],
+                preprocessing_config["drift_reference_path"],
+            ],
+        )
+
+        # трансформация колонок(масштабирование, one-hot-encoding)
+        transform_key = cache.key("transform", split_key, transform_params)
+        X_train, X_test = cache.run(
+            "transform",
+            transform_key,
+            lambda: (
+                transform_columns(X_train, flg_fit=True, **config),
+                transform_columns(X_test, **config),
+            ),
+            outs=[train_config["col_transform_path"]],
+        )
 
-    # splitting data and preprocessing
-    X_train, X_test, y_train, y_test = train_preprocess(data=train_data, **config)
+    # подбор гиперпараметров (иначе - параметры из исследовательской части)
+    if search is None:
+        search = config["search"]["enabled"]
+    if search:
+        callback("search", 0.15)
+        search_key = cache.key(
+            "search", transform_key, config["search"], train_config["n_folds"]
+        )
+        cache.run(
+            "search",
+            search_key,
+            lambda: search_params(X_train=X_train, y_train=y_train, **config),
+            outs=[train_config["params_path"], config["search"]["results_path"]],
+        )
 
-    # подобранные в исследовательской части гиперпараметры
     best_params_path = train_config["params_path"]
     with open(best_params_path) as json_file:
         best_params = json.load(json_file)
 
+    # svc - точный SVC, approx - приближенный SVM для больших данных
+    engine = train_config["engine"]
+    model_params = (
+        {"engine": engine, **train_config["approx"]}
+        if engine == "approx"
+        else best_params
+    )
+
+    # калибровка вероятностей на out-of-fold значениях решающей функции
+    callback("calibration", 0.2)
+    calibration_params = {
+        name: train_config[name]
+        for name in ("n_folds", "calibration_method", "random_state")
+    }
+    calibration_key = cache.key(
+        "calibration", transform_key, model_params, calibration_params
+    )
+    calibrator = cache.run(
+        "calibration",
+        calibration_key,
+        lambda: fit_calibrator(
+            X_train=X_train,
+            y_train=y_train,
+            estimator=make_model(
+                best_params, engine=engine, approx_params=train_config["approx"]
+            ),
+            n_folds=train_config["n_folds"],
+            method=train_config["calibration_method"],
+            random_state=train_config["random_state"],
+        ),
+    )
+    joblib.dump(calibrator, train_config["calibrator_path"])
+
     # тренировка с лучшими гиперпараметрами
-    svc = train_model(
-        X_train=X_train,
-        X_test=X_test,
-        y_train=y_train,
-        y_test=y_test,
-        best_params=best_params,
-        metric_path=train_config["metrics_path"],
+    callback("training", 0.3)
+    fit_key = cache.key("fit", transform_key, model_params)
+    model = cache.run(
+        "fit",
+        fit_key,
+        lambda: fit_model(
+            X_train=X_train,
+            y_train=y_train,
+            best_params=best_params,
+            engine=engine,
+            approx_params=train_config["approx"],
+        ),
+    )
+
+    # сохранение метрик
+    callback("evaluate", 0.4)
+    cache.run(
+        "evaluate",
+        cache.key("evaluate", fit_key, calibration_key, train_config["bootstrap"]),
+        lambda: save_metrics(
+            X_test=X_test,
+            y_test=y_test,
+            model=model,
+            calibrator=calibrator,
+            metric_path=train_config["metrics_path"],
+            curves_path=train_config["curves_path"],
+            chunk_size=config["evaluate"]["chunk_size"],
+            **train_config["bootstrap"],
+        ),
+        outs=[train_config["metrics_path"], train_config["curves_path"]],
     )
 
     # сохранение feature importances
-    save_feature_importances(svc, X_test, y_test, **feature_imp_config)
+    callback("feature importances", 0.5)
+    groups = {}
+    if feature_imp_config["group_one_hot"]:
+        # one-hot колонки одного признака перемешиваются вместе
+        groups = {
+            column: [name for name in X_test.columns if name.startswith(f"{column}_")]
+            for column in preprocessing_config["one_hot_columns"]
+        }
+    save_feature_importances(model, X_test, y_test, groups=groups, **feature_imp_config)
 
     # сохранение обученной модели
-    joblib.dump(svc, os.path.join(train_config["model_path"]))
+    callback("saving model", 0.9)
+    if engine == "approx":
+        # numpy ядро есть только у точного SVC, устаревший файл удаляется
+        if os.path.exists(train_config["kernel_path"]):
+            os.remove(train_config["kernel_path"])
+    else:
+        export_svc(
+            model,
+            X_test,
+            kernel_path=train_config["kernel_path"],
+            chunk_size=config["evaluate"]["chunk_size"],
+        )
+    joblib.dump(model, os.path.join(train_config["model_path"]))
+
+    # публикация неизменяемой версии артефактов для сервиса
+    callback("publishing", 0.95)
+    return publish_version(config_path)
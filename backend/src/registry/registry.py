@@ -0,0 +1,386 @@
+import os
+import json
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import NamedTuple
+
+import yaml
+import joblib
+
+from ..transform.encoder import FeatureEncoder
+from ..transform.schema import load_schema, schema_from_unique_values
+from ..evaluate.kernel import SVCKernel
+from ..monitoring.metrics import ARTIFACT_LOADS, stage_timer
+from .store import (
+    ROUTING_FILE,
+    list_versions,
+    version_config_path,
+    read_routing,
+    publish_version,
+    promote_version,
+    rollback_version,
+    set_routing,
+)
+
+
+class Artifacts(NamedTuple):
+    """
+    Неизменяемый набор артефактов, необходимых для получения предсказаний
+    """
+
+    config: dict
+    column_transformer: object
+    model: object
+    calibrator: object
+    schema: dict
+    encoder: FeatureEncoder
+    version: str
+    drift_reference: dict
+
+
+def load_config(config_path: str) -> dict:
+    """
+    Чтение конфигурационного файла
+    :param config_path: путь до конфигурационного файла
+    :return: словарь с конфигурациями
+    """
+    with open(config_path) as file:
+        config = yaml.load(file, Loader=yaml.FullLoader)
+    return config
+
+
+def load_model(config: dict) -> object:
+    """
+    Загрузка модели: sklearn SVC или выгруженная numpy-версия.
+    При evaluate.mmap_mode массивы модели отображаются из файла версии,
+    а не копируются: воркеры делят одни страницы памяти
+    :param config: словарь с конфигурациями
+    :return: модель с методами predict и decision_function
+    """
+    evaluate_config = config["evaluate"]
+    # numpy-версия выгружается только для точного SVC (train.engine: svc)
+    if (
+        evaluate_config["model_engine"] == "kernel"
+        and config["train"]["engine"] == "svc"
+    ):
+        return SVCKernel.load(
+            config["train"]["kernel_path"], dtype=evaluate_config["kernel_dtype"]
+        )
+    return joblib.load(
+        config["train"]["model_path"], mmap_mode=evaluate_config["mmap_mode"]
+    )
+
+
+def load_artifacts(
+    config_path: str, evaluate_config: dict = None, version: str = None
+) -> Artifacts:
+    """
+    Загрузка конфигураций, column transformer, модели, калибровки,
+    схемы признаков и эталона распределений из train, сборка быстрого
+    кодировщика признаков
+    :param config_path: путь до конфигурационного файла (версии)
+    :param evaluate_config: настройки инференса из текущей конфигурации сервиса
+    :param version: идентификатор версии
+    :return: набор артефактов
+    """
+    config = load_config(config_path)
+    if evaluate_config is not None:
+        config["evaluate"] = evaluate_config
+
+    preproc = config["preprocessing"]
+    if "schema_path" in preproc:
+        schema = load_schema(preproc["schema_path"])
+    else:
+        # версии, опубликованные до появления схемы признаков
+        with open(preproc["unique_values_path"]) as json_file:
+            schema = schema_from_unique_values(
+                json.load(json_file), preproc["scale_columns"]
+            )
+
+    # файлы версий неизменяемы, поэтому их можно отображать в память
+    mmap_mode = config["evaluate"]["mmap_mode"]
+    column_transformer = joblib.load(
+        config["train"]["col_transform_path"], mmap_mode=mmap_mode
+    )
+
+    # эталон для мониторинга сдвига (у версий, опубликованных до его
+    # появления, эталона нет)
+    drift_reference = None
+    drift_reference_path = config["preprocessing"].get("drift_reference_path")
+    if drift_reference_path and os.path.exists(drift_reference_path):
+        with open(drift_reference_path) as json_file:
+            drift_reference = json.load(json_file)
+    encoder = FeatureEncoder(
+        column_transformer=column_transformer,
+        map_change_columns=config["preprocessing"]["map_change_columns"],
+    )
+
+    return Artifacts(
+        config=config,
+        column_transformer=column_transformer,
+        model=load_model(config),
+        calibrator=joblib.load(
+            config["train"]["calibrator_path"], mmap_mode=mmap_mode
+        ),
+        schema=schema,
+        encoder=encoder,
+        version=version,
+        drift_reference=drift_reference,
+    )
+
+
+class ArtifactRegistry:
+    """
+    Реестр версий модели на уровне процесса: несколько неизменяемых версий
+    держатся загруженными, запросы распределяются между ними по долям
+    трафика или по заголовку с версией. Новая маршрутизация применяется
+    только после загрузки всех нужных ей версий, поэтому переключение
+    (в том числе перевод в основную и откат) происходит мгновенно.
+    Запросы, уже получившие набор артефактов, дорабатывают на нем
+    """
+
+    def __init__(self, config_path: str, refresh_interval: float = 1.0):
+        """
+        :param config_path: путь до конфигурационного файла
+        :param refresh_interval: как часто (в секундах) проверять маршрутизацию
+        """
+        self.config_path = config_path
+        self.refresh_interval = refresh_interval
+        config = load_config(config_path)
+        self.evaluate_config = config["evaluate"]
+        self.serving = config["serving"]
+        self.versions_dir = self.serving["versions_dir"]
+        self._versions = OrderedDict()
+        self._routing = None
+        self._routing_stamp = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._shadow_stats = Counter()
+        # вызываются с множеством активных версий после смены маршрутизации
+        self.listeners = []
+
+    def _routing_file_stamp(self) -> tuple:
+        """
+        Отпечаток файла маршрутизации по mtime и размеру
+        :return: отпечаток (None, если файла нет)
+        """
+        try:
+            stat = os.stat(os.path.join(self.versions_dir, ROUTING_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _routed(self, routing: dict) -> set:
+        """
+        Версии, на которые направляется трафик
+        :param routing: маршрутизация
+        :return: множество версий
+        """
+        return ({routing["production"], routing["shadow"]} | set(routing["weights"])) - {
+            None
+        }
+
+    def load_version(self, version: str) -> Artifacts:
+        """
+        Загруженная версия (из памяти или с диска). Версии вне маршрутизации
+        вытесняются из памяти сверх serving.max_warm
+        :param version: идентификатор версии
+        :return: набор артефактов
+        """
+        artifacts = self._versions.get(version)
+        if artifacts is not None:
+            return artifacts
+        if version not in list_versions(self.versions_dir):
+            raise KeyError(version)
+
+        with self._load_lock:
+            artifacts = self._versions.get(version)
+            if artifacts is None:
+                try:
+                    with stage_timer("artifact_load"):
+                        artifacts = load_artifacts(
+                            version_config_path(self.versions_dir, version),
+                            evaluate_config=self.evaluate_config,
+                            version=version,
+                        )
+                except Exception:
+                    ARTIFACT_LOADS.inc(version=version, status="error")
+                    raise
+                ARTIFACT_LOADS.inc(version=version, status="ok")
+            with self._lock:
+                versions = OrderedDict(self._versions)
+                versions[version] = artifacts
+                versions.move_to_end(version)
+                routed = self._routed(self._routing) if self._routing else set()
+                for name in list(versions):
+                    if len(versions) <= self.serving["max_warm"]:
+                        break
+                    if name not in routed and name != version:
+                        del versions[name]
+                self._versions = versions
+        return artifacts
+
+    def apply_routing(self, routing: dict) -> None:
+        """
+        Загрузка всех версий маршрутизации, затем атомарная подмена
+        :param routing: маршрутизация
+        """
+        for version in self._routed(routing):
+            self.load_version(version)
+        with self._lock:
+            self._routing = routing
+        for listener in self.listeners:
+            listener(self._routed(routing))
+
+    def reload(self) -> dict:
+        """
+        Чтение и применение маршрутизации с диска
+        :return: маршрутизация
+        """
+        stamp = self._routing_file_stamp()
+        routing = read_routing(self.versions_dir)
+        self.apply_routing(routing)
+        self._routing_stamp = stamp
+        self._checked_at = time.monotonic()
+        return routing
+
+    def try_load(self) -> bool:
+        """
+        Загрузка версий при старте приложения (модель может быть еще не обучена).
+        Артефакты, обученные до появления версий, публикуются как первая версия
+        :return: удалось ли загрузить артефакты
+        """
+        try:
+            publish_version(self.config_path, only_if_empty=True)
+            return self.reload()["production"] is not None
+        except FileNotFoundError:
+            return False
+
+    def _refresh(self) -> None:
+        """
+        Периодическая проверка маршрутизации (ее меняют обучение и другие
+        воркеры). Новые версии загружаются в фоне, до этого запросы
+        обслуживает текущая маршрутизация
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval or self._refreshing:
+            return
+        self._checked_at = now
+        if self._routing_file_stamp() == self._routing_stamp:
+            return
+
+        def refresh():
+            try:
+                self.reload()
+            except Exception:
+                # версия может быть удалена между чтением и загрузкой -
+                # продолжаем работать на текущей маршрутизации
+                pass
+            finally:
+                self._refreshing = False
+
+        self._refreshing = True
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def get(self, version: str = None) -> Artifacts:
+        """
+        Набор артефактов для запроса: явно запрошенная версия
+        или случайная по долям трафика (остаток - основная версия)
+        :param version: идентификатор версии (например, из заголовка запроса)
+        :return: набор артефактов
+        """
+        if self._routing is None:
+            self.reload()
+        self._refresh()
+        if version:
+            return self.load_version(version)
+
+        routing = self._routing
+        if routing["production"] is None:
+            raise FileNotFoundError("Нет обученной модели")
+        chosen = routing["production"]
+        threshold = random.random()
+        for name, weight in routing["weights"].items():
+            threshold -= weight
+            if threshold < 0:
+                chosen = name
+                break
+        return self._versions.get(chosen) or self.load_version(chosen)
+
+    def get_shadow(self) -> Artifacts:
+        """
+        Теневая версия: получает копию трафика, ответы не возвращаются
+        :return: набор артефактов или None
+        """
+        routing = self._routing
+        if routing is None or routing["shadow"] is None:
+            return None
+        return self._versions.get(routing["shadow"])
+
+    def record_shadow(self, version: str, primary: list, shadow: list) -> None:
+        """
+        Учет совпадения ответов теневой версии с отданными ответами
+        :param version: идентификатор теневой версии
+        :param primary: отданные предсказания
+        :param shadow: предсказания теневой версии
+        """
+        agreed = sum(a == b for a, b in zip(primary, shadow))
+        with self._lock:
+            self._shadow_stats[(version, "total")] += len(primary)
+            self._shadow_stats[(version, "agreed")] += agreed
+
+    def promote(self, version: str) -> dict:
+        """
+        Перевод версии в основную (версия загружается до переключения)
+        :param version: идентификатор версии
+        :return: маршрутизация
+        """
+        self.load_version(version)
+        promote_version(self.versions_dir, version)
+        return self.reload()
+
+    def rollback(self) -> dict:
+        """
+        Откат на предыдущую основную версию
+        :return: маршрутизация
+        """
+        rollback_version(self.versions_dir)
+        return self.reload()
+
+    def set_routing(self, weights: dict, shadow: str = None) -> dict:
+        """
+        Изменение долей трафика и теневой версии
+        :param weights: словарь версия -> доля трафика
+        :param shadow: теневая версия
+        :return: маршрутизация
+        """
+        for version in list(weights) + [shadow]:
+            if version:
+                self.load_version(version)
+        set_routing(self.versions_dir, weights, shadow)
+        return self.reload()
+
+    def describe(self) -> dict:
+        """
+        Опубликованные версии с метриками, маршрутизация и статистика
+        теневой оценки
+        :return: словарь с описанием
+        """
+        versions = []
+        for version in list_versions(self.versions_dir):
+            metrics_path = os.path.join(self.versions_dir, version, "metrics.json")
+            metrics = None
+            if os.path.exists(metrics_path):
+                with open(metrics_path) as json_file:
+                    metrics = json.load(json_file)
+            versions.append(
+                {"version": version, "warm": version in self._versions, "metrics": metrics}
+            )
+        shadow = {}
+        for (version, name), value in self._shadow_stats.items():
+            shadow.setdefault(version, {})[name] = value
+        return {"routing": self._routing, "versions": versions, "shadow_stats": shadow}
@@ -0,0 +1,279 @@
+import os
+import copy
+import json
+import time
+import fcntl
+import itertools
+import shutil
+from contextlib import contextmanager
+
+import yaml
+
+from ..pipeline.cache import file_hash
+
+# артефакты версии: раздел и ключ конфигурации -> имя файла в папке версии
+VERSION_FILES = {
+    ("train", "col_transform_path"): "column_transformer.joblib",
+    ("train", "model_path"): "model.joblib",
+    ("train", "kernel_path"): "model_kernel.npz",
+    ("train", "calibrator_path"): "calibrator.joblib",
+    ("preprocessing", "schema_path"): "schema.json",
+    ("preprocessing", "drift_reference_path"): "drift_reference.json",
+    ("train", "metrics_path"): "metrics.json",
+    ("train", "params_path"): "best_params.json",
+}
+VERSION_CONFIG = "params.yaml"
+ROUTING_FILE = "routing.json"
+# сколько предыдущих основных версий помнить для отката
+MAX_HISTORY = 10
+
+
+def version_config_path(versions_dir: str, version: str) -> str:
+    """
+    Путь до конфигурационного файла версии
+    :param versions_dir: папка с версиями
+    :param version: идентификатор версии
+    :return: путь до params.yaml версии
+    """
+    return os.path.join(versions_dir, version, VERSION_CONFIG)
+
+
+def version_sort_key(version: str) -> tuple:
+    """
+    Ключ сортировки версий v<дата>-<время>-<хэш>[-<попытка>]: номер попытки
+    публикации в ту же секунду сравнивается как число (-2 раньше -10)
+    :param version: идентификатор версии
+    :return: ключ сортировки
+    """
+    base, _, attempt = version.rpartition("-")
+    if base.count("-") == 2 and attempt.isdigit():
+        return base, int(attempt)
+    return version, 1
+
+
+def list_versions(versions_dir: str) -> list:
+    """
+    Опубликованные версии (от старых к новым)
+    :param versions_dir: папка с версиями
+    :return: список идентификаторов версий
+    """
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        (
+            name
+            for name in os.listdir(versions_dir)
+            if not name.startswith(".")
+            and os.path.exists(version_config_path(versions_dir, name))
+        ),
+        key=version_sort_key,
+    )
+
+
+def read_routing(versions_dir: str) -> dict:
+    """
+    Маршрутизация запросов: основная версия, история для отката,
+    доли трафика дополнительных версий и теневая версия
+    :param versions_dir: папка с версиями
+    :return: словарь с маршрутизацией
+    """
+    try:
+        with open(os.path.join(versions_dir, ROUTING_FILE)) as json_file:
+            return json.load(json_file)
+    except FileNotFoundError:
+        return {"production": None, "history": [], "weights": {}, "shadow": None}
+
+
+def write_routing(versions_dir: str, routing: dict) -> None:
+    """
+    Атомарная запись маршрутизации
+    :param versions_dir: папка с версиями
+    :param routing: словарь с маршрутизацией
+    """
+    path = os.path.join(versions_dir, ROUTING_FILE)
+    with open(f"{path}.tmp", "w") as json_file:
+        json.dump(routing, json_file)
+    os.replace(f"{path}.tmp", path)
+
+
+@contextmanager
+def routing_lock(versions_dir: str):
+    """
+    Блокировка на файле: маршрутизацию меняют обучение и все воркеры
+    :param versions_dir: папка с версиями
+    """
+    os.makedirs(versions_dir, exist_ok=True)
+    with open(os.path.join(versions_dir, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def same_files(dir_a: str, dir_b: str) -> bool:
+    """
+    Совпадают ли файлы двух папок (по именам и содержимому)
+    :param dir_a: первая папка
+    :param dir_b: вторая папка
+    :return: True, если совпадают
+    """
+    names = sorted(os.listdir(dir_a))
+    if names != sorted(os.listdir(dir_b)):
+        return False
+    return all(
+        file_hash(os.path.join(dir_a, name)) == file_hash(os.path.join(dir_b, name))
+        for name in names
+    )
+
+
+def publish_version(config_path: str, only_if_empty: bool = False) -> str:
+    """
+    Публикация артефактов обучения как неизменяемой версии: файлы копируются
+    во временную папку, которая затем атомарно переименовывается.
+    Конфигурация версии ссылается на файлы внутри ее папки. Повторная
+    публикация тех же артефактов в ту же секунду (обучение целиком из кэша)
+    возвращает уже опубликованную версию, другие артефакты с тем же
+    идентификатором получают суффикс
+    :param config_path: путь до конфигурационного файла
+    :param only_if_empty: публиковать, только если версий еще нет
+    :return: идентификатор версии (None, если публикация не понадобилась)
+    """
+    with open(config_path) as file:
+        config = yaml.load(file, Loader=yaml.FullLoader)
+    serving = config["serving"]
+    versions_dir = serving["versions_dir"]
+
+    with routing_lock(versions_dir):
+        if only_if_empty and list_versions(versions_dir):
+            return None
+
+        model_path = config["train"]["model_path"]
+        base = time.strftime("v%Y%m%d-%H%M%S-") + file_hash(model_path)[:8]
+        for attempt in itertools.count(1):
+            version = base if attempt == 1 else f"{base}-{attempt}"
+            version_dir = os.path.join(versions_dir, version)
+            tmp_dir = os.path.join(versions_dir, f".{version}.tmp")
+            stage_version(tmp_dir, version_dir, config)
+            if not os.path.exists(version_dir):
+                os.replace(tmp_dir, version_dir)
+                break
+            same = same_files(tmp_dir, version_dir)
+            shutil.rmtree(tmp_dir)
+            if same:
+                # те же артефакты уже опубликованы
+                return version
+
+        routing = read_routing(versions_dir)
+        if serving["auto_promote"] or routing["production"] is None:
+            routing = _promote(routing, version)
+        write_routing(versions_dir, routing)
+        prune_versions(versions_dir, routing, serving["keep_versions"])
+    return version
+
+
+def stage_version(tmp_dir: str, version_dir: str, config: dict) -> None:
+    """
+    Копирование артефактов и конфигурации версии во временную папку
+    :param tmp_dir: временная папка
+    :param version_dir: папка версии (на нее ссылается конфигурация)
+    :param config: конфигурация обучения
+    """
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    config = copy.deepcopy(config)
+    for (section, key), name in VERSION_FILES.items():
+        path = config[section][key]
+        # numpy ядро есть только у точного SVC
+        if os.path.exists(path):
+            shutil.copyfile(path, os.path.join(tmp_dir, name))
+            os.chmod(os.path.join(tmp_dir, name), 0o444)
+        config[section][key] = os.path.join(version_dir, name)
+
+    with open(os.path.join(tmp_dir, VERSION_CONFIG), "w") as file:
+        yaml.safe_dump(config, file, allow_unicode=True, sort_keys=False)
+    os.chmod(os.path.join(tmp_dir, VERSION_CONFIG), 0o444)
+
+
+def _promote(routing: dict, version: str) -> dict:
+    """
+    Новая маршрутизация с версией в роли основной
+    :param routing: текущая маршрутизация
+    :param version: идентификатор версии
+    :return: новая маршрутизация
+    """
+    if routing["production"] == version:
+        return routing
+    history = routing["history"]
+    if routing["production"] is not None:
+        history = (history + [routing["production"]])[-MAX_HISTORY:]
+    weights = {key: value for key, value in routing["weights"].items() if key != version}
+    return {**routing, "production": version, "history": history, "weights": weights}
+
+
+def promote_version(versions_dir: str, version: str) -> dict:
+    """
+    Перевод версии в основную
+    :param versions_dir: папка с версиями
+    :param version: идентификатор версии
+    :return: новая маршрутизация
+    """
+    with routing_lock(versions_dir):
+        if version not in list_versions(versions_dir):
+            raise KeyError(version)
+        routing = _promote(read_routing(versions_dir), version)
+        write_routing(versions_dir, routing)
+    return routing
+
+
+def rollback_version(versions_dir: str) -> dict:
+    """
+    Возврат предыдущей основной версии
+    :param versions_dir: папка с версиями
+    :return: новая маршрутизация
+    """
+    with routing_lock(versions_dir):
+        routing = read_routing(versions_dir)
+        history = [
+            version
+            for version in routing["history"]
+            if version in list_versions(versions_dir)
+        ]
+        if not history:
+            raise KeyError("Нет предыдущей версии для отката")
+        routing = {**routing, "production": history[-1], "history": history[:-1]}
+        write_routing(versions_dir, routing)
+    return routing
+
+
+def set_routing(versions_dir: str, weights: dict, shadow: str = None) -> dict:
+    """
+    Доли трафика дополнительных версий (остаток - основной версии)
+    и теневая версия
+    :param versions_dir: папка с версиями
+    :param weights: словарь версия -> доля трафика
+    :param shadow: теневая версия (None - без теневой оценки)
+    :return: новая маршрутизация
+    """
+    with routing_lock(versions_dir):
+        versions = list_versions(versions_dir)
+        unknown = [v for v in list(weights) + [shadow] if v and v not in versions]
+        if unknown:
+            raise KeyError(", ".join(unknown))
+        if any(value < 0 for value in weights.values()) or sum(weights.values()) > 1:
+            raise ValueError("Доли трафика должны быть неотрицательны, сумма - не больше 1")
+        routing = {**read_routing(versions_dir), "weights": weights, "shadow": shadow}
+        write_routing(versions_dir, routing)
+    return routing
+
+
+def prune_versions(versions_dir: str, routing: dict, keep: int) -> None:
+    """
+    Удаление старых версий сверх keep (кроме участвующих в маршрутизации)
+    :param versions_dir: папка с версиями
+    :param routing: текущая маршрутизация
+    :param keep: сколько последних версий хранить
+    """
+    used = set(routing["history"]) | set(routing["weights"])
+    used |= {routing["production"], routing["shadow"]}
+    versions = list_versions(versions_dir)
+    for version in versions[: max(len(versions) - keep, 0)]:
+        if version not in used:
+            shutil.rmtree(os.path.join(versions_dir, version), ignore_errors=True)
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDClassifier
+
+
+class ApproxKernelClassifier(BaseEstimator, ClassifierMixin):
+    """
+    Приближенный SVM с RBF ядром для больших данных: аппроксимация ядра
+    (Nystroem или random Fourier features) и линейный SVM (SGD, hinge loss),
+    обучаемый через partial_fit по частям данных
+    """
+
+    def __init__(
+        self,
+        method: str = "nystroem",
+        n_components: int = 300,
+        gamma: float = 0.01,
+        alpha: float = 1e-4,
+        class_weight: str = None,
+        chunk_size: int = 10000,
+        n_epochs: int = 5,
+        sample_size: int = 5000,
+        random_state: int = None,
+    ):
+        """
+        :param method: аппроксимация ядра (nystroem или rff)
+        :param n_components: размерность пространства признаков ядра
+        :param gamma: коэффициент RBF ядра
+        :param alpha: коэффициент регуляризации линейной модели
+        :param class_weight: веса классов (None или balanced)
+        :param chunk_size: количество строк в одной части для partial_fit
+        :param n_epochs: количество проходов по данным
+        :param sample_size: размер выборки для обучения аппроксимации ядра
+        :param random_state: random_state
+        """
+        self.method = method
+        self.n_components = n_components
+        self.gamma = gamma
+        self.alpha = alpha
+        self.class_weight = class_weight
+        self.chunk_size = chunk_size
+        self.n_epochs = n_epochs
+        self.sample_size = sample_size
+        self.random_state = random_state
+
+    def fit(self, X: object, y: object) -> "ApproxKernelClassifier":
+        """
+        Обучение: аппроксимация ядра на подвыборке, затем partial_fit
+        линейной модели по частям данных
+        :param X: объект-признаки (массив, датафрейм или memmap)
+        :param y: ответы
+        :return: обученная модель
+        """
+        X = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+        y = np.asarray(y)
+        n_samples = len(X)
+        rng = np.random.RandomState(self.random_state)
+
+        if self.method == "nystroem":
+            feature_map = Nystroem(
+                gamma=self.gamma,
+                n_components=min(self.n_components, n_samples),
+                random_state=self.random_state,
+            )
+        elif self.method == "rff":
+            feature_map = RBFSampler(
+                gamma=self.gamma,
+                n_components=self.n_components,
+                random_state=self.random_state,
+            )
+        else:
+            raise ValueError(f"Неизвестная аппроксимация ядра: {self.method}")
+
+        sample = np.sort(
+            rng.choice(n_samples, min(n_samples, self.sample_size), replace=False)
+        )
+        feature_map.fit(X[sample])
+
+        self.classes_ = np.unique(y)
+        class_weights = np.ones(len(self.classes_))
+        if self.class_weight == "balanced":
+            counts = np.array([np.sum(y == label) for label in self.classes_])
+            class_weights = n_samples / (len(self.classes_) * counts)
+
+        classifier = SGDClassifier(
+            loss="hinge", alpha=self.alpha, random_state=self.random_state
+        )
+        starts = np.arange(0, n_samples, self.chunk_size)
+        for _ in range(self.n_epochs):
+            for start in rng.permutation(starts):
+                X_chunk = feature_map.transform(X[start : start + self.chunk_size])
+                y_chunk = y[start : start + self.chunk_size]
+                classifier.partial_fit(
+                    X_chunk,
+                    y_chunk,
+                    classes=self.classes_,
+                    sample_weight=class_weights[np.searchsorted(self.classes_, y_chunk)],
+                )
+
+        self.feature_map_ = feature_map
+        self.classifier_ = classifier
+        return self
+
+    def decision_function(self, X: object) -> np.ndarray:
+        """
+        Значения решающей функции
+        :param X: объект-признаки
+        :return: значения решающей функции
+        """
+        X = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+        return self.classifier_.decision_function(self.feature_map_.transform(X))
+
+    def predict(self, X: object) -> np.ndarray:
+        """
+        Предсказание меток классов
+        :param X: объект-признаки
+        :return: метки классов
+        """
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
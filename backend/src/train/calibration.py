@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.isotonic import IsotonicRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+
+class ScoreCalibrator:
+    """
+    Калибровка значений решающей функции в вероятности: сигмоида (Платт)
+    или изотоническая регрессия. После обучения хранит только numpy-массивы,
+    применение векторизовано и не требует sklearn
+    """
+
+    def __init__(self, method: str = "sigmoid"):
+        """
+        :param method: метод калибровки (sigmoid или isotonic)
+        """
+        assert method in ("sigmoid", "isotonic"), f"Метод калибровки {method}"
+        self.method = method
+        self.coef = None
+        self.intercept = None
+        self.x_thresholds = None
+        self.y_thresholds = None
+
+    def fit(self, scores: np.ndarray, y: np.ndarray) -> "ScoreCalibrator":
+        """
+        Обучение калибровки
+        :param scores: значения решающей функции
+        :param y: целевая переменная (0/1)
+        :return: обученная калибровка
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        if self.method == "sigmoid":
+            logreg = LogisticRegression(C=1e6).fit(scores.reshape(-1, 1), y)
+            self.coef = float(logreg.coef_[0, 0])
+            self.intercept = float(logreg.intercept_[0])
+        else:
+            isotonic = IsotonicRegression(
+                y_min=0.0, y_max=1.0, out_of_bounds="clip"
+            ).fit(scores, y)
+            self.x_thresholds = isotonic.X_thresholds_
+            self.y_thresholds = isotonic.y_thresholds_
+        return self
+
+    def predict_proba(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Калиброванные вероятности классов
+        :param scores: значения решающей функции
+        :return: матрица вероятностей размера (n_samples, 2)
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        if self.method == "sigmoid":
+            positive = 1.0 / (1.0 + np.exp(-(self.coef * scores + self.intercept)))
+        else:
+            positive = np.interp(scores, self.x_thresholds, self.y_thresholds)
+        return np.column_stack([1.0 - positive, positive])
+
+
+def fit_calibrator(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    estimator: object,
+    n_folds: int,
+    method: str,
+    random_state: int,
+) -> ScoreCalibrator:
+    """
+    Обучение калибровки на out-of-fold значениях решающей функции модели
+    :param X_train: объект-признаки трейн
+    :param y_train: ответы трейн
+    :param estimator: необученная модель с методом decision_function
+    :param n_folds: количество фолдов
+    :param method: метод калибровки (sigmoid или isotonic)
+    :param random_state: random_state для разбиения на фолды
+    :return: обученная калибровка
+    """
+    cv = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    scores = cross_val_predict(
+        estimator, X_train, y_train, cv=cv, method="decision_function"
+    )
+    return ScoreCalibrator(method=method).fit(scores, y_train)
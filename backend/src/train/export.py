@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from sklearn.svm import SVC
+
+from ..evaluate.kernel import SVCKernel
+
+
+def export_svc(
+    model: SVC, X_check: pd.DataFrame, kernel_path: str, chunk_size: int = None
+) -> None:
+    """
+    Выгрузка обученного SVC в компактный numpy-артефакт (опорные векторы,
+    двойственные коэффициенты, сдвиг и параметры ядра) с проверкой, что
+    предсказания совпадают с sklearn
+    :param model: обученная модель
+    :param X_check: объект-признаки для проверки (холдаут)
+    :param kernel_path: путь для сохранения артефакта
+    :param chunk_size: количество строк в одной части при проверке
+    (матрица ядра - строки части на опорные векторы)
+    """
+    assert len(model.classes_) == 2, "Поддерживается только бинарная классификация"
+
+    np.savez_compressed(
+        kernel_path,
+        support_vectors=model.support_vectors_,
+        dual_coef=model.dual_coef_[0],
+        intercept=model.intercept_,
+        classes=model.classes_,
+        kernel=np.array(model.kernel),
+        gamma=np.array(model._gamma),
+        coef0=np.array(model.coef0),
+        degree=np.array(model.degree),
+    )
+
+    kernel_model = SVCKernel.load(kernel_path)
+    chunk_size = chunk_size or max(len(X_check), 1)
+    for start in range(0, len(X_check), chunk_size):
+        X_chunk = X_check.iloc[start : start + chunk_size]
+        assert np.array_equal(
+            kernel_model.predict(X_chunk), model.predict(X_chunk)
+        ), "Предсказания выгруженной модели не совпадают с sklearn"
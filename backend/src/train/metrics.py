@@ -1,15 +1,153 @@
 import pandas as pd
 import numpy as np
-from sklearn.metrics import (
-    roc_auc_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    log_loss,
-)
-import pandas as pd
 import json
 
+METRIC_NAMES = ("roc_auc", "precision", "recall", "f1", "logloss")
+# массивов float64/int64 длины n на одну бутстрэп-выборку (индексы, веса
+# и промежуточные произведения в metrics) - для оценки памяти батча
+BOOTSTRAP_ARRAYS = 12
+
+
+class ScoreOrder:
+    """
+    Однократная сортировка ответов по вероятности: из нее считаются ROC-AUC
+    (с учетом совпадающих значений), кривые по порогам и метрики
+    для любых весов объектов (в том числе для бутстрэп-выборок)
+    """
+
+    def __init__(
+        self, y_test: np.ndarray, y_predict: np.ndarray, y_probability: np.ndarray
+    ):
+        """
+        :param y_test: реальные данные
+        :param y_predict: предсказанные значения
+        :param y_probability: предсказанные вероятности (n, 2)
+        """
+        y_test = np.asarray(y_test).astype(bool)
+        y_predict = np.asarray(y_predict).astype(bool)
+        probability = np.asarray(y_probability, dtype=np.float64)[:, 1]
+
+        order = np.argsort(probability, kind="mergesort")
+        self.n_samples = len(order)
+        self.order = order
+        self.positive = y_test[order]
+        self.predicted = y_predict[order]
+        self.probability = probability[order]
+        # начала групп с одинаковой вероятностью (для учета совпадений в AUC)
+        self.group_starts = np.flatnonzero(
+            np.r_[True, np.diff(self.probability) != 0]
+        )
+
+        # logloss каждого объекта, как в sklearn (обрезка на eps)
+        eps = np.finfo(self.probability.dtype).eps
+        clipped = np.clip(self.probability, eps, 1 - eps)
+        self.losses = -np.where(self.positive, np.log(clipped), np.log1p(-clipped))
+
+    def metrics(self, weights: np.ndarray) -> dict:
+        """
+        Метрики для матрицы весов объектов (вес - число вхождений объекта
+        в выборку), по строке матрицы на выборку
+        :param weights: матрица весов (n_samples_matrix, n) в порядке self.order
+        :return: словарь метрика -> массив значений по строкам
+        """
+        positive = self.positive.astype(np.float64)
+        predicted = self.predicted.astype(np.float64)
+
+        tp = weights @ (positive * predicted)
+        n_predicted = weights @ predicted
+        n_positive = weights @ positive
+        n_total = weights.sum(axis=1)
+        n_negative = n_total - n_positive
+
+        # ROC-AUC: для каждой группы с одинаковой вероятностью - число
+        # отрицательных объектов ниже группы плюс половина внутри нее
+        positive_groups = np.add.reduceat(weights * positive, self.group_starts, axis=1)
+        negative_groups = np.add.reduceat(
+            weights * (1 - positive), self.group_starts, axis=1
+        )
+        negative_below = np.cumsum(negative_groups, axis=1) - negative_groups
+        auc_sum = np.sum(positive_groups * (negative_below + 0.5 * negative_groups), axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(n_predicted > 0, tp / n_predicted, 0.0)
+            recall = np.where(n_positive > 0, tp / n_positive, 0.0)
+            f1 = np.where(
+                precision + recall > 0,
+                2 * precision * recall / (precision + recall),
+                0.0,
+            )
+            roc_auc = auc_sum / (n_positive * n_negative)
+        return {
+            "roc_auc": roc_auc,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+            "logloss": (weights @ self.losses) / n_total,
+        }
+
+    def bootstrap(
+        self,
+        n_resamples: int,
+        confidence: float = 0.95,
+        random_state: int = None,
+        memory_mb: float = 256,
+    ) -> dict:
+        """
+        Бутстрэп доверительные интервалы: выборки задаются матрицей индексов,
+        которая превращается в матрицу весов объектов. Количество выборок
+        в одной матрице подбирается по размеру холдаута и бюджету памяти
+        :param n_resamples: количество бутстрэп-выборок
+        :param confidence: уровень доверия
+        :param random_state: random_state
+        :param memory_mb: память на матрицы одного батча выборок в мегабайтах
+        :return: словарь метрика -> [нижняя граница, верхняя граница]
+        """
+        rng = np.random.RandomState(random_state)
+        n = self.n_samples
+        values = {name: [] for name in METRIC_NAMES}
+        batch_size = max(int(memory_mb * 2**20 // (BOOTSTRAP_ARRAYS * 8 * n)), 1)
+
+        for start in range(0, n_resamples, batch_size):
+            size = min(batch_size, n_resamples - start)
+            index = rng.randint(0, n, size=(size, n))
+            flat = index + np.arange(size)[:, None] * n
+            weights = np.bincount(flat.ravel(), minlength=size * n).reshape(size, n)
+            for name, value in self.metrics(weights.astype(np.float64)).items():
+                values[name].append(value)
+
+        tail = (1 - confidence) / 2 * 100
+        intervals = {}
+        for name in METRIC_NAMES:
+            value = np.concatenate(values[name])
+            low, high = np.nanpercentile(value, [tail, 100 - tail])
+            intervals[name] = [round(float(low), 3), round(float(high), 3)]
+        return intervals
+
+    def curves(self) -> pd.DataFrame:
+        """
+        ROC и precision-recall кривые по всем порогам вероятности
+        :return: датафрейм threshold, fpr, tpr, precision, recall
+        """
+        # порог t: положительный класс при вероятности >= t, идем по убыванию
+        ends = np.r_[self.group_starts[1:], self.n_samples]
+        positive_above = np.cumsum(self.positive[::-1])[::-1]
+        negative_above = np.cumsum(~self.positive[::-1])[::-1]
+        tp = positive_above[self.group_starts][::-1]
+        fp = negative_above[self.group_starts][::-1]
+        n_positive = self.positive.sum()
+        n_negative = self.n_samples - n_positive
+
+        return pd.DataFrame(
+            {
+                "threshold": self.probability[self.group_starts][::-1],
+                "fpr": fp / max(n_negative, 1),
+                "tpr": tp / max(n_positive, 1),
+                "precision": tp / (tp + fp),
+                "recall": tp / max(n_positive, 1),
+                "count": (ends - self.group_starts)[::-1],
+            }
+        )
+
 
 def create_dict_metrics(
     y_test: pd.Series, y_predict: np.ndarray, y_probability: np.ndarray
@@ -21,30 +159,76 @@ def create_dict_metrics(
     :param y_probability: предсказанные вероятности
     :return: словарь с метриками
     """
-    dict_metrics = {
-        "roc_auc": round(roc_auc_score(y_test, y_probability[:, 1]), 3),
-        "precision": round(precision_score(y_test, y_predict), 3),
-        "recall": round(recall_score(y_test, y_predict), 3),
-        "f1": round(f1_score(y_test, y_predict), 3),
-        "logloss": round(log_loss(y_test, y_probability), 3),
-    }
+    score_order = ScoreOrder(y_test, y_predict, y_probability)
+    values = score_order.metrics(np.ones((1, score_order.n_samples)))
+    dict_metrics = {name: round(float(values[name][0]), 3) for name in METRIC_NAMES}
     return dict_metrics
 
 
+def decision_scores(
+    model: object, X_data: pd.DataFrame, chunk_size: int = None
+) -> np.ndarray:
+    """
+    Значения решающей функции по частям: в память копируется только
+    часть объект-признаков (холдаут может лежать в memmap на диске)
+    :param model: модель
+    :param X_data: объект-признаки
+    :param chunk_size: количество строк в одной части (None - все строки сразу)
+    :return: значения решающей функции
+    """
+    chunk_size = chunk_size or max(len(X_data), 1)
+    return np.concatenate(
+        [
+            model.decision_function(X_data.iloc[start : start + chunk_size])
+            for start in range(0, len(X_data), chunk_size)
+        ]
+    )
+
+
 def save_metrics(
-    X_test: pd.DataFrame, y_test: pd.Series, model: object, metric_path: str
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    model: object,
+    calibrator: object,
+    metric_path: str,
+    curves_path: str = None,
+    n_resamples: int = 0,
+    confidence: float = 0.95,
+    random_state: int = None,
+    memory_mb: float = 256,
+    chunk_size: int = None,
 ) -> None:
     """
-    Получение и сохранение метрик
+    Получение и сохранение метрик, доверительных интервалов и кривых по порогам
     :param X_test: объект-признаки
     :param y_test: целевая переменная
     :param model: модель
+    :param calibrator: калибровка значений решающей функции в вероятности
     :param metric_path: путь для сохранения метрик
+    :param curves_path: путь для сохранения кривых по порогам
+    :param n_resamples: количество бутстрэп-выборок (0 - без интервалов)
+    :param confidence: уровень доверия для интервалов
+    :param random_state: random_state для бутстрэпа
+    :param memory_mb: память на один батч бутстрэп-выборок в мегабайтах
+    :param chunk_size: количество строк холдаута в одной части
     """
-    result_metrics = create_dict_metrics(
-        y_test=y_test,
-        y_predict=model.predict(X_test),
-        y_probability=model.predict_proba(X_test),
-    )
+    # метки и вероятности получаем за один проход модели
+    scores = decision_scores(model, X_test, chunk_size)
+    y_predict = model.classes_[(scores > 0).astype(int)]
+    y_probability = calibrator.predict_proba(scores)
+    result_metrics = create_dict_metrics(y_test, y_predict, y_probability)
+    if n_resamples or curves_path is not None:
+        score_order = ScoreOrder(y_test, y_predict, y_probability)
+    if n_resamples:
+        result_metrics["confidence"] = confidence
+        result_metrics["intervals"] = score_order.bootstrap(
+            n_resamples,
+            confidence=confidence,
+            random_state=random_state,
+            memory_mb=memory_mb,
+        )
     with open(metric_path, "w") as file:
         json.dump(result_metrics, file)
+
+    if curves_path is not None:
+        score_order.curves().to_csv(curves_path, index=False)
@@ -0,0 +1,95 @@
+import json
+import math
+import pandas as pd
+from sklearn.svm import SVC
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    RandomizedSearchCV,
+    HalvingGridSearchCV,
+    StratifiedKFold,
+)
+
+# минимум объектов меньшего класса в тестовой части каждого фолда
+# на первой итерации successive halving (иначе roc_auc не определен)
+MIN_CLASS_ROWS = 10
+
+
+def search_params(X_train: pd.DataFrame, y_train: pd.Series, **kwargs) -> dict:
+    """
+    Подбор гиперпараметров SVC (grid, random или successive halving)
+    с кросс-валидацией на n_folds фолдах в пуле процессов.
+    Сохраняет лучшие параметры и таблицу с оценками и временем по кандидатам
+    :param X_train: объект-признаки трейн
+    :param y_train: ответы трейн
+    :return: лучшие параметры
+    """
+    search = kwargs["search"]
+    train = kwargs["train"]
+
+    cv = StratifiedKFold(
+        n_splits=train["n_folds"], shuffle=True, random_state=train["random_state"]
+    )
+    common = dict(
+        estimator=SVC(**search["fixed_params"]),
+        scoring=search["scoring"],
+        cv=cv,
+        n_jobs=search["n_jobs"],
+    )
+
+    if search["method"] == "grid":
+        searcher = GridSearchCV(param_grid=search["param_grid"], **common)
+    elif search["method"] == "random":
+        searcher = RandomizedSearchCV(
+            param_distributions=search["param_grid"],
+            n_iter=search["n_iter"],
+            random_state=train["random_state"],
+            **common,
+        )
+    elif search["method"] == "halving":
+        # плохие кандидаты отсеиваются на малой доле данных, но не меньше,
+        # чем нужно для обоих классов в каждом фолде (подвыборки
+        # стратифицированы по целевой переменной)
+        minority = y_train.value_counts(normalize=True).min()
+        min_resources = max(
+            search["min_resources"],
+            math.ceil(train["n_folds"] * MIN_CLASS_ROWS / minority),
+        )
+        searcher = HalvingGridSearchCV(
+            param_grid=search["param_grid"],
+            factor=search["factor"],
+            min_resources=min(min_resources, len(y_train)),
+            aggressive_elimination=search["aggressive_elimination"],
+            random_state=train["random_state"],
+            **common,
+        )
+    else:
+        raise ValueError(f"Неизвестный метод подбора: {search['method']}")
+
+    searcher.fit(X_train, y_train)
+
+    # таблица с оценками и временем обучения по каждому кандидату
+    results = pd.DataFrame(searcher.cv_results_)
+    columns = [
+        column
+        for column in (
+            "iter",
+            "n_resources",
+            "params",
+            "mean_fit_time",
+            "mean_score_time",
+            "mean_test_score",
+            "std_test_score",
+            "rank_test_score",
+        )
+        if column in results.columns
+    ]
+    results[columns].sort_values(by="rank_test_score").to_csv(
+        search["results_path"], index=False
+    )
+
+    best_params = {**searcher.best_params_, **search["fixed_params"]}
+    with open(train["params_path"], "w") as file:
+        json.dump(best_params, file)
+
+    return best_params
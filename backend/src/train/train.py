@@ -1,58 +1,155 @@
+import os
+import json
+import joblib
 import pandas as pd
 import numpy as np
+from joblib import Parallel, delayed
 from sklearn.svm import SVC
-from sklearn.inspection import permutation_importance
 
-from ..train.metrics import save_metrics
+from ..train.approx import ApproxKernelClassifier
 
 
-def train_model(
+def make_model(
+    best_params: dict, engine: str = "svc", approx_params: dict = None
+) -> object:
+    """
+    Создание необученной модели. Вероятности дает отдельная калибровка,
+    поэтому внутренняя калибровка SVC (probability=True) не нужна
+    :param best_params: параметры SVC
+    :param engine: svc - точный SVC, approx - приближенный SVM для больших данных
+    :param approx_params: параметры приближенного SVM
+    :return: необученная модель
+    """
+    if engine == "approx":
+        return ApproxKernelClassifier(**approx_params)
+    return SVC(**{**best_params, "probability": False})
+
+
+def fit_model(
     X_train: pd.DataFrame,
-    X_test: pd.DataFrame,
     y_train: pd.Series,
-    y_test: pd.Series,
     best_params: dict,
-    metric_path: str,
-) -> SVC:
+    engine: str = "svc",
+    approx_params: dict = None,
+) -> object:
     """
-    Обучение модели на лучших параметрах
+    Обучение модели на заданных параметрах
     :param X_train: объект-признаки трейн
-    :param X_test: объект-признаки холдаут
     :param y_train: ответы трейн
-    :param y_test: ответы холдаут
-    :param best_params: лучшие параметры, найденные GridSearchCV
-    :param metric_path: путь до папки с метриками
-    :return: SVC
+    :param best_params: параметры SVC
+    :param engine: svc - точный SVC, approx - приближенный SVM для больших данных
+    :param approx_params: параметры приближенного SVM
+    :return: обученная модель
     """
-    # тренировка на лучших параметрах
-    svc = SVC(**best_params)
-    svc.fit(X_train, y_train)
+    model = make_model(best_params, engine=engine, approx_params=approx_params)
+    model.fit(X_train, y_train)
+    return model
+
 
-    # сохранение метрик
-    save_metrics(X_test=X_test, y_test=y_test, model=svc, metric_path=metric_path)
-    return svc
+def permutation_scores(
+    model: object,
+    X_data: pd.DataFrame,
+    y_data: np.ndarray,
+    columns: list,
+    n_repeats: int,
+    random_state: int,
+) -> np.ndarray:
+    """
+    Accuracy модели при совместном перемешивании группы признаков
+    :param model: обученная модель
+    :param X_data: матрица объект-признаки
+    :param y_data: целевая переменная
+    :param columns: признаки, перемешиваемые вместе
+    :param n_repeats: количество перемешиваний
+    :param random_state: random_state
+    :return: массив accuracy для каждого перемешивания
+    """
+    rng = np.random.RandomState(random_state)
+    values = X_data.to_numpy()
+    permuted = values.copy()
+    idx = [X_data.columns.get_loc(column) for column in columns]
+
+    scores = np.empty(n_repeats)
+    for i in range(n_repeats):
+        permuted[:, idx] = values[rng.permutation(len(values))][:, idx]
+        predict = model.predict(pd.DataFrame(permuted, columns=X_data.columns))
+        scores[i] = np.mean(predict == y_data)
+    return scores
 
 
 def save_feature_importances(
-    model: object, X_data: pd.DataFrame, y_data: pd.Series, **kwargs
+    model: object,
+    X_data: pd.DataFrame,
+    y_data: pd.Series,
+    groups: dict = None,
+    **kwargs
 ) -> None:
     """
-    Сохранение датафрейма с permutation importances
+    Сохранение датафрейма с permutation importances. Перемешивания признаков
+    считаются параллельно, расчет пропускается, если модель и данные
+    не изменились с прошлого запуска
     :param model: обученная модель
     :param X_data: матрица объект-признаки
     :param y_data: целевая переменная
+    :param groups: группы признаков, перемешиваемых вместе
+    (например, one-hot колонки одного признака)
     """
-    # вычисление и сортировка permutation importances
-    perm = permutation_importance(
-        model,
-        X_data,
-        y_data,
-        random_state=kwargs["random_state"],
-        n_repeats=kwargs["n_repeats"],
+    groups = groups or {}
+    # большой холдаут (например, memmap при потоковой предобработке)
+    # заменяется подвыборкой из max_rows строк: в память, в хэш
+    # и в каждую параллельную задачу попадает только она
+    if len(X_data) > kwargs["max_rows"]:
+        rows = np.sort(
+            np.random.RandomState(kwargs["random_state"]).choice(
+                len(X_data), kwargs["max_rows"], replace=False
+            )
+        )
+        X_data, y_data = X_data.iloc[rows], y_data.iloc[rows]
+    output_paths = [kwargs["permutation_importances_path"]]
+    if groups:
+        output_paths.append(kwargs["grouped_importances_path"])
+
+    # проверка, что результат для этих модели и данных уже посчитан
+    data_hash = joblib.hash(
+        (model, X_data, y_data, groups, kwargs["n_repeats"], kwargs["random_state"])
+    )
+    cache_path = kwargs["cache_path"]
+    if os.path.exists(cache_path) and all(map(os.path.exists, output_paths)):
+        with open(cache_path) as json_file:
+            if json.load(json_file)["hash"] == data_hash:
+                return
+
+    # каждый признак и каждая группа перемешиваются в отдельной задаче
+    column_sets = [[column] for column in X_data.columns] + list(groups.values())
+    seeds = np.random.RandomState(kwargs["random_state"]).randint(
+        np.iinfo(np.int32).max, size=len(column_sets)
+    )
+    y_values = np.asarray(y_data)
+    baseline = np.mean(model.predict(X_data) == y_values)
+    scores = Parallel(n_jobs=kwargs["n_jobs"])(
+        delayed(permutation_scores)(
+            model, X_data, y_values, columns, kwargs["n_repeats"], seed
+        )
+        for columns, seed in zip(column_sets, seeds)
     )
+    importances = [baseline - score.mean() for score in scores]
+
+    # сортировка и сохранение датафрейма с permutation importances
+    n_columns = X_data.shape[1]
     perm_df = pd.DataFrame(
-        {"feature": X_data.columns, "value": perm["importances_mean"]}
+        {"feature": X_data.columns, "value": importances[:n_columns]}
     ).sort_values(by="value", ascending=False)
-
-    # сохранение датафрейма с permutation importances
     perm_df.to_csv(kwargs["permutation_importances_path"], index=False)
+
+    if groups:
+        grouped_columns = {column for columns in groups.values() for column in columns}
+        grouped_df = pd.concat(
+            [
+                pd.DataFrame({"feature": list(groups), "value": importances[n_columns:]}),
+                perm_df[~perm_df["feature"].isin(grouped_columns)],
+            ]
+        ).sort_values(by="value", ascending=False)
+        grouped_df.to_csv(kwargs["grouped_importances_path"], index=False)
+
+    with open(cache_path, "w") as file:
+        json.dump({"hash": data_hash}, file)
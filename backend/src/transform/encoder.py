@@ -0,0 +1,172 @@
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from typing import Union
+
+# значения бинарных признаков из формы UI -> коды train
+BINARY_MAP = {"Yes": 1, "No": 0}
+
+
+class EncodingError(ValueError):
+    """
+    Ошибка кодирования записи: нет признака или его значение
+    не приводится к категории/числу
+    """
+
+    def __init__(self, column: str, value: object = None, missing: bool = False):
+        """
+        :param column: признак
+        :param value: значение признака
+        :param missing: признака нет в записи
+        """
+        self.column = column
+        self.value = value
+        if missing:
+            message = f"Нет признака {column}"
+        else:
+            message = f"Некорректное значение {value!r} признака {column}"
+        super().__init__(message)
+
+
+class FeatureEncoder:
+    """
+    Скомпилированный из обученного ColumnTransformer кодировщик признаков:
+    записи (словари) переводятся сразу в numpy-массив без pandas.
+    Результат совпадает с ColumnTransformer.transform
+    """
+
+    def __init__(
+        self,
+        column_transformer: ColumnTransformer,
+        map_change_columns: dict = None,
+        binary_map: dict = None,
+    ):
+        """
+        :param column_transformer: обученный column transformer
+        :param map_change_columns: замена кодов категориальных признаков на названия
+        :param binary_map: замена значений бинарных признаков (Yes/No -> 1/0)
+        """
+        self.map_change_columns = map_change_columns or {}
+        self.binary_map = binary_map or BINARY_MAP
+        self.feature_names = list(column_transformer.get_feature_names_out())
+        self.n_features = len(self.feature_names)
+
+        # для каждой категории - индекс выходной колонки (None - отброшенная)
+        self.one_hot = []
+        self.scale_columns, self.mean, self.scale = [], None, None
+        self.passthrough_columns = []
+        self._scale_slice, self._passthrough_slice = slice(0, 0), slice(0, 0)
+
+        offset = 0
+        for _, transformer, columns in column_transformer.transformers_:
+            if isinstance(transformer, OneHotEncoder):
+                for i, (column, categories) in enumerate(
+                    zip(columns, transformer.categories_)
+                ):
+                    drop_idx = None
+                    if transformer.drop_idx_ is not None:
+                        drop_idx = transformer.drop_idx_[i]
+                    lookup = {}
+                    for j, category in enumerate(categories):
+                        if j == drop_idx:
+                            lookup[category] = None
+                        else:
+                            lookup[category] = offset
+                            offset += 1
+                    self.one_hot.append((column, lookup))
+            elif isinstance(transformer, StandardScaler):
+                self.scale_columns = list(columns)
+                self.mean = transformer.mean_
+                self.scale = transformer.scale_
+                self._scale_slice = slice(offset, offset + len(columns))
+                offset += len(columns)
+            elif transformer == "passthrough":
+                self.passthrough_columns = list(columns)
+                self._passthrough_slice = slice(offset, offset + len(columns))
+                offset += len(columns)
+            elif transformer != "drop":
+                raise ValueError(f"Неподдерживаемый трансформер: {transformer}")
+
+        assert offset == self.n_features, "Число признаков не совпадает с трансформером"
+
+    def _category(self, column: str, value: object) -> object:
+        """
+        Приведение значения категориального признака к названию категории
+        :param column: признак
+        :param value: значение
+        :return: категория
+        """
+        return self.map_change_columns.get(column, {}).get(value, value)
+
+    @staticmethod
+    def _numeric(records: list, columns: list, value_map: dict = None) -> np.ndarray:
+        """
+        Матрица числовых признаков записей
+        :param records: список записей
+        :param columns: признаки
+        :param value_map: замена значений перед приведением к числу
+        :return: матрица значений
+        :raises EncodingError: нет признака или значение не приводится к числу
+        """
+        value_map = value_map or {}
+        try:
+            return np.array(
+                [
+                    [value_map.get(record[name], record[name]) for name in columns]
+                    for record in records
+                ],
+                dtype=np.float64,
+            )
+        except (KeyError, TypeError, ValueError):
+            pass
+        # поиск первого некорректного значения для сообщения об ошибке
+        for record in records:
+            for column in columns:
+                if column not in record:
+                    raise EncodingError(column, missing=True)
+                value = record[column]
+                try:
+                    float(value_map.get(value, value))
+                except (TypeError, ValueError):
+                    raise EncodingError(column, value) from None
+        raise EncodingError(columns[0])
+
+    def transform(self, records: Union[dict, list]) -> np.ndarray:
+        """
+        Кодирование записей в матрицу признаков
+        :param records: запись или список записей (словари признак -> значение)
+        :return: матрица признаков
+        :raises EncodingError: нет признака, неизвестная категория
+        или нечисловое значение
+        """
+        if isinstance(records, dict):
+            records = [records]
+
+        result = np.zeros((len(records), self.n_features), dtype=np.float64)
+
+        for column, lookup in self.one_hot:
+            for i, record in enumerate(records):
+                if column not in record:
+                    raise EncodingError(column, missing=True)
+                try:
+                    category = self._category(column, record[column])
+                    idx = lookup[category]
+                except (KeyError, TypeError):
+                    # неизвестная или нехешируемая категория
+                    raise EncodingError(column, record[column]) from None
+                if idx is not None:
+                    result[i, idx] = 1.0
+
+        if self.scale_columns:
+            scaled = self._numeric(records, self.scale_columns)
+            scaled -= self.mean
+            if self.scale is not None:
+                scaled /= self.scale
+            result[:, self._scale_slice] = scaled
+
+        if self.passthrough_columns:
+            result[:, self._passthrough_slice] = self._numeric(
+                records, self.passthrough_columns, self.binary_map
+            )
+
+        return result
@@ -0,0 +1,118 @@
+import json
+import pandas as pd
+
+# уровни квантилей непрерывных признаков в схеме
+QUANTILE_LEVELS = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def build_schema(data: pd.DataFrame, scale_columns: list) -> dict:
+    """
+    Компактная схема признаков за один векторный проход: порядок и типы
+    признаков, минимум, максимум и квантили непрерывных признаков,
+    категории остальных признаков. Размер не зависит от количества строк
+    :param data: датасет (без целевой переменной, после замены значений)
+    :param scale_columns: непрерывные признаки
+    :return: словарь со схемой
+    """
+    numeric = data[[column for column in data.columns if column in scale_columns]]
+    quantiles = numeric.quantile(list(QUANTILE_LEVELS))
+
+    features = {}
+    for column in data.columns:
+        feature = {"dtype": str(data[column].dtype)}
+        if column in scale_columns:
+            # минимум и максимум в исходном типе признака (int для Age)
+            feature["min"] = data[column].min().item()
+            feature["max"] = data[column].max().item()
+            feature["quantiles"] = quantiles[column].tolist()
+        else:
+            feature["categories"] = sorted(data[column].dropna().unique().tolist())
+        features[column] = feature
+    return {
+        "columns": list(data.columns),
+        "quantile_levels": list(QUANTILE_LEVELS),
+        "n_rows": len(data),
+        "features": features,
+    }
+
+
+def merge_schema(schema: dict, other: dict) -> dict:
+    """
+    Объединение схем частей датасета: минимум, максимум и категории точные,
+    квантили остаются от первой части
+    :param schema: схема, накопленная по предыдущим частям
+    :param other: схема очередной части
+    :return: объединенная схема
+    """
+    assert schema["columns"] == other["columns"], "Разные признаки"
+    features = {}
+    for column, feature in schema["features"].items():
+        part = other["features"][column]
+        feature = dict(feature)
+        if "categories" in feature:
+            feature["categories"] = sorted(
+                set(feature["categories"]) | set(part["categories"])
+            )
+        else:
+            feature["min"] = min(feature["min"], part["min"])
+            feature["max"] = max(feature["max"], part["max"])
+        features[column] = feature
+    n_rows = schema["n_rows"] + other["n_rows"]
+    return {**schema, "n_rows": n_rows, "features": features}
+
+
+def save_train_schema(
+    data: pd.DataFrame,
+    drop_columns: list,
+    map_change_columns: dict,
+    target_column: str,
+    scale_columns: list,
+    schema_path: str,
+) -> None:
+    """
+    Сохранение схемы признаков из train
+    :param data: датасет
+    :param drop_columns: список с признаками для удаления
+    :param map_change_columns: список с признаками для замены значений
+    :param target_column: целевая переменная
+    :param scale_columns: непрерывные признаки
+    :param schema_path: путь до файла со схемой
+    """
+    df = data.drop(columns=drop_columns + [target_column], errors="ignore")
+    df = df.replace(map_change_columns)
+    with open(schema_path, "w") as file:
+        json.dump(build_schema(df, scale_columns), file)
+
+
+def load_schema(schema_path: str) -> dict:
+    """
+    Чтение схемы признаков
+    :param schema_path: путь до файла со схемой
+    :return: словарь со схемой
+    """
+    with open(schema_path) as json_file:
+        return json.load(json_file)
+
+
+def schema_from_unique_values(unique_values: dict, scale_columns: list) -> dict:
+    """
+    Схема по словарю уникальных значений (unique_values.json версий,
+    опубликованных до появления схемы)
+    :param unique_values: словарь признак -> уникальные значения
+    :param scale_columns: непрерывные признаки
+    :return: словарь со схемой
+    """
+    # признаки разной длины, поэтому схема строится по каждому отдельно
+    # (квантили - по уникальным значениям, а не по данным)
+    features = {
+        column: build_schema(pd.DataFrame({column: values}), scale_columns)[
+            "features"
+        ][column]
+        for column, values in unique_values.items()
+    }
+    return {
+        "columns": list(unique_values),
+        "quantile_levels": list(QUANTILE_LEVELS),
+        "n_rows": None,
+        "features": features,
+    }
@@ -0,0 +1,234 @@
+import os
+import json
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.compose import ColumnTransformer
+from sklearn.model_selection import train_test_split
+from typing import Iterator, Tuple
+
+from ..data.get_data import get_dataset_chunks
+from ..monitoring.drift import fit_reference
+from .schema import build_schema, merge_schema
+
+
+def iter_split_chunks(
+    data_path: str, chunk_size: int, **kwargs
+) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]]:
+    """
+    Чтение данных по частям, удаление ненужных признаков, замена значений
+    и разбиение каждой части на трейн и холдаут. Разбиение детерминировано,
+    поэтому повторный проход дает те же части
+    :param data_path: путь до данных
+    :param chunk_size: количество строк в одной части
+    :return: итератор по трейн/холдаут частям и ответам
+    """
+    preproc = kwargs["preprocessing"]
+    target_column = preproc["target_column"]
+
+    for chunk in get_dataset_chunks(
+        data_path,
+        chunk_size,
+        drop_columns=preproc["drop_columns"],
+        dtypes=preproc["dtypes"],
+    ):
+        chunk = chunk.replace(preproc["map_change_columns"])
+        X = chunk.drop(target_column, axis=1)
+        y = chunk[target_column]
+        # в маленькой последней части может не хватить объектов для стратификации
+        stratify = y if y.value_counts().min() >= 2 else None
+        yield train_test_split(
+            X,
+            y,
+            test_size=preproc["test_size"],
+            stratify=stratify,
+            random_state=preproc["random_state"],
+        )
+
+
+def fit_column_transformer_chunks(
+    data_path: str, chunk_size: int, **kwargs
+) -> Tuple[ColumnTransformer, int, int]:
+    """
+    Обучение column transformer за один проход по частям трейна:
+    статистики StandardScaler через partial_fit, категории OneHotEncoder
+    объединением по частям. Сохраняет column transformer, схему признаков
+    (квантили - по первой части) и эталонные распределения признаков из train
+    (границы гистограмм - по первой части, частоты - по всем частям)
+    :param data_path: путь до данных
+    :param chunk_size: количество строк в одной части
+    :return: column transformer, размеры трейна и холдаута
+    """
+    preproc = kwargs["preprocessing"]
+    train = kwargs["train"]
+
+    scaler = StandardScaler()
+    categories = {column: set() for column in preproc["one_hot_columns"]}
+    schema = None
+    reference = None
+    first_chunk = None
+    n_train, n_test = 0, 0
+
+    for X_train, X_test, _, _ in iter_split_chunks(data_path, chunk_size, **kwargs):
+        if first_chunk is None:
+            first_chunk = X_train
+            reference = fit_reference(X_train, **kwargs)
+        else:
+            reference.update_frame(X_train)
+        scaler.partial_fit(X_train[preproc["scale_columns"]])
+        for column in categories:
+            categories[column].update(X_train[column].dropna().unique().tolist())
+        chunk_schema = build_schema(X_train, preproc["scale_columns"])
+        schema = chunk_schema if schema is None else merge_schema(schema, chunk_schema)
+        n_train += len(X_train)
+        n_test += len(X_test)
+
+    # категории заданы явно, поэтому column transformer можно обучить
+    # на первой части, а статистики масштабирования подменить полными
+    transformers_list = [
+        (
+            "encode",
+            OneHotEncoder(
+                categories=[sorted(categories[column]) for column in categories],
+                dtype="int",
+                drop="first",
+            ),
+            preproc["one_hot_columns"],
+        ),
+        ("scale", StandardScaler(), preproc["scale_columns"]),
+        ("skip", "passthrough", preproc["passthrough_columns"]),
+    ]
+    column_transformer = ColumnTransformer(
+        transformers_list, verbose_feature_names_out=False
+    )
+    column_transformer.fit(first_chunk)
+    for i, (name, _, columns) in enumerate(column_transformer.transformers_):
+        if name == "scale":
+            column_transformer.transformers_[i] = (name, scaler, columns)
+
+    joblib.dump(column_transformer, train["col_transform_path"])
+    with open(preproc["schema_path"], "w") as file:
+        json.dump(schema, file)
+    reference.save(preproc["drift_reference_path"])
+
+    return column_transformer, n_train, n_test
+
+
+def transform_columns_memmap(
+    data_path: str,
+    chunk_size: int,
+    column_transformer: ColumnTransformer,
+    n_train: int,
+    n_test: int,
+    memmap_dir: str,
+    **kwargs
+) -> dict:
+    """
+    Преобразование колонок по частям с записью в float32 матрицы на диске
+    :param data_path: путь до данных
+    :param chunk_size: количество строк в одной части
+    :param column_transformer: обученный column transformer
+    :param n_train: размер трейна
+    :param n_test: размер холдаута
+    :param memmap_dir: папка для матриц
+    :return: описание матриц (пути, размеры, признаки) и ответы
+    """
+    os.makedirs(memmap_dir, exist_ok=True)
+    columns = column_transformer.get_feature_names_out().tolist()
+    paths = {
+        "X_train": os.path.join(memmap_dir, "X_train.f32"),
+        "X_test": os.path.join(memmap_dir, "X_test.f32"),
+    }
+    X_train_map = np.memmap(
+        paths["X_train"], dtype=np.float32, mode="w+", shape=(n_train, len(columns))
+    )
+    X_test_map = np.memmap(
+        paths["X_test"], dtype=np.float32, mode="w+", shape=(n_test, len(columns))
+    )
+    y_train = np.empty(n_train, dtype=np.int8)
+    y_test = np.empty(n_test, dtype=np.int8)
+
+    train_pos, test_pos = 0, 0
+    for X_train, X_test, y_train_chunk, y_test_chunk in iter_split_chunks(
+        data_path, chunk_size, **kwargs
+    ):
+        X_train_map[train_pos : train_pos + len(X_train)] = (
+            column_transformer.transform(X_train)
+        )
+        X_test_map[test_pos : test_pos + len(X_test)] = column_transformer.transform(
+            X_test
+        )
+        y_train[train_pos : train_pos + len(X_train)] = y_train_chunk
+        y_test[test_pos : test_pos + len(X_test)] = y_test_chunk
+        train_pos += len(X_train)
+        test_pos += len(X_test)
+
+    X_train_map.flush()
+    X_test_map.flush()
+    del X_train_map, X_test_map
+
+    return {
+        "paths": paths,
+        "shapes": {"X_train": (n_train, len(columns)), "X_test": (n_test, len(columns))},
+        "columns": columns,
+        "y_train": y_train,
+        "y_test": y_test,
+    }
+
+
+def load_memmap(
+    matrices: dict,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    """
+    Открытие матриц на диске как датафреймов без копирования в память
+    :param matrices: описание матриц из transform_columns_memmap
+    :return: трейн/холдаут датасеты и ответы
+    """
+    frames = [
+        pd.DataFrame(
+            np.memmap(
+                matrices["paths"][name],
+                dtype=np.float32,
+                mode="r",
+                shape=matrices["shapes"][name],
+            ),
+            columns=matrices["columns"],
+            copy=False,
+        )
+        for name in ("X_train", "X_test")
+    ]
+    return (
+        frames[0],
+        frames[1],
+        pd.Series(matrices["y_train"]),
+        pd.Series(matrices["y_test"]),
+    )
+
+
+def streaming_preprocess(
+    data_path: str, **kwargs
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    """
+    Потоковая предобработка для данных больше оперативной памяти:
+    первый проход обучает column transformer, второй преобразует части
+    в матрицы на диске, из которых обучается модель
+    :param data_path: путь до данных
+    :return: трейн/холдаут датасеты (поверх memmap) и ответы
+    """
+    streaming = kwargs["preprocessing"]["streaming"]
+    chunk_size = streaming["chunk_size"]
+
+    column_transformer, n_train, n_test = fit_column_transformer_chunks(
+        data_path, chunk_size, **kwargs
+    )
+    matrices = transform_columns_memmap(
+        data_path,
+        chunk_size,
+        column_transformer,
+        n_train,
+        n_test,
+        memmap_dir=streaming["memmap_dir"],
+        **kwargs
+    )
+    return load_memmap(matrices)
@@ -1,59 +1,41 @@
 import pandas as pd
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
-import json
 import joblib
 from typing import Tuple
 import warnings
 
 warnings.filterwarnings("ignore")
 from ..data.split_data import split_train_test
+from ..monitoring.metrics import timed
+from .schema import load_schema, save_train_schema
 
 
-def save_unique_train_data(
-    data: pd.DataFrame,
-    drop_columns: list,
-    map_change_columns: dict,
-    target_column: str,
-    unique_values_path: str,
-) -> None:
-    """
-    Сохранение словаря с признаками и уникальными значениями
-    :param drop_columns: список с признаками для удаления
-    :param map_change_columns: список с признаками для замены значений
-    :param data: датасет
-    :param target_column: целевая переменная
-    :param unique_values_path: путь до файла со словарем
-    :return: None
-    """
-    df = data.drop(columns=drop_columns + [target_column], axis=1)
-    df.replace(map_change_columns, inplace=True)
-    # создаем словарь с уникальными значениями
-
-    dict_unique = {key: df[key].unique().tolist() for key in df.columns}
-
-    with open(unique_values_path, "w") as file:
-        json.dump(dict_unique, file)
-
-
-def check_columns_evaluate(data: pd.DataFrame, unique_values_path: str) -> pd.DataFrame:
+def check_columns_evaluate(
+    data: pd.DataFrame, schema_path: str = None, schema: dict = None
+) -> pd.DataFrame:
     """
     Проверка на наличие признаков из train и упорядочивание признаков согласно train
     :param data: датасет test
-    :param unique_values_path: путь до списока с признаками train для сравнения
+    :param schema_path: путь до схемы признаков train для сравнения
+    :param schema: загруженная заранее схема признаков train
     :return: датасет test
     """
-    with open(unique_values_path) as json_file:
-        unique_values = json.load(json_file)
+    if schema is None:
+        schema = load_schema(schema_path)
 
-    column_sequence = unique_values.keys()
+    column_sequence = schema["columns"]
 
     assert set(column_sequence) == set(data.columns), "Разные признаки"
     return data[column_sequence]
 
 
+@timed("transform_columns")
 def transform_columns(
-    data: pd.DataFrame, flg_fit: bool = False, **kwargs
+    data: pd.DataFrame,
+    flg_fit: bool = False,
+    column_transformer: ColumnTransformer = None,
+    **kwargs
 ) -> pd.DataFrame:
     """
     Преобразование колонок: масштабирование для числовых признаков,
@@ -61,6 +43,7 @@ def transform_columns(
     для уже бинаризованных признаков
     :param data: датасет
     :param flg_fit: флаг для тренировочных данных
+    :param column_transformer: загруженный заранее column transformer
     :return: датасет
     """
     preproc = kwargs["preprocessing"]
@@ -86,7 +69,8 @@ def transform_columns(
         joblib.dump(column_transformer, train["col_transform_path"])
 
     else:
-        column_transformer = joblib.load(train["col_transform_path"])
+        if column_transformer is None:
+            column_transformer = joblib.load(train["col_transform_path"])
         transformed_raw = column_transformer.transform(data)
 
     data_transformed = pd.DataFrame(
@@ -96,6 +80,26 @@ def transform_columns(
     return data_transformed
 
 
+def split_preprocess(
+    data: pd.DataFrame, **kwargs
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    """
+    Удаление ненужных признаков, замена значений и разбиение
+    на трейн и холдаут (без трансформации колонок)
+    :param data: датасет
+    :return: трейн/холдаут датасеты и ответы
+    """
+    preproc = kwargs["preprocessing"]
+    # удаление ненужных признаков
+    data = data.drop(preproc["drop_columns"], axis=1, errors="ignore")
+
+    # замена значений
+    data.replace(preproc["map_change_columns"], inplace=True)
+
+    # разделение на тренировочный и тестовый датасеты
+    return split_train_test(data, **preproc)
+
+
 def train_preprocess(
     data: pd.DataFrame, **kwargs
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
@@ -107,22 +111,17 @@ def train_preprocess(
     :return: датасет
     """
     preproc = kwargs["preprocessing"]
-    # сохранение уникальных данных с признаками из train
-    save_unique_train_data(
+    # сохранение схемы признаков из train
+    save_train_schema(
         data=data,
         drop_columns=preproc["drop_columns"],
         map_change_columns=preproc["map_change_columns"],
         target_column=preproc["target_column"],
-        unique_values_path=preproc["unique_values_path"],
+        scale_columns=preproc["scale_columns"],
+        schema_path=preproc["schema_path"],
     )
-    # удаление ненужных признаков
-    data = data.drop(preproc["drop_columns"], axis=1, errors="ignore")
-
-    # замена значений
-    data.replace(preproc["map_change_columns"], inplace=True)
-
-    # разделение на тренировочный и тестовый датасеты
-    X_train, X_test, y_train, y_test = split_train_test(data, **preproc)
+    # удаление ненужных признаков, замена значений и разбиение
+    X_train, X_test, y_train, y_test = split_preprocess(data, **kwargs)
 
     # трансформация колонок(масштабирование, one-hot-encoding)
     X_train_transformed = transform_columns(X_train, flg_fit=True, **kwargs)
@@ -131,10 +130,18 @@ def train_preprocess(
     return X_train_transformed, X_test_transformed, y_train, y_test
 
 
-def test_preprocess(test_data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+@timed("test_preprocess")
+def test_preprocess(
+    test_data: pd.DataFrame,
+    schema: dict = None,
+    column_transformer: ColumnTransformer = None,
+    **kwargs
+) -> pd.DataFrame:
     """
     Пайплайн по предобработке тестовых данных
     :param data: исходный датасет
+    :param schema: загруженная заранее схема признаков train
+    :param column_transformer: загруженный заранее column transformer
     :return: предобработанный датасет
     """
     preproc = kwargs["preprocessing"]
@@ -151,10 +158,14 @@ def test_preprocess(test_data: pd.DataFrame, **kwargs) -> pd.DataFrame:
     # проверка dataset на совпадение с признаками из train
     # и упорядочивание признаков согласно train
     test_data = check_columns_evaluate(
-        data=test_data, unique_values_path=preproc["unique_values_path"]
+        data=test_data,
+        schema_path=preproc["schema_path"],
+        schema=schema,
     )
 
     # трансформация колонок(масштабирование и one-hot encoding)
-    test_data_transformed = transform_columns(test_data, **kwargs)
+    test_data_transformed = transform_columns(
+        test_data, column_transformer=column_transformer, **kwargs
+    )
 
     return test_data_transformed
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+from ..monitoring.metrics import VALIDATION_ERRORS, timed
+from .encoder import BINARY_MAP
+
+# виды ошибок в значениях признаков (у значения - не больше одной)
+ERROR_KINDS = ("missing", "type", "out_of_range", "unknown_category")
+
+
+def encode_binary(values: pd.Series) -> pd.Series:
+    """
+    Замена Yes/No бинарного признака на коды train (как в FeatureEncoder),
+    остальные значения не меняются
+    :param values: значения признака
+    :return: значения признака
+    """
+    if values.dtype != "object":
+        return values
+    # сравнение массива со строкой дешевле Series.map (важно для одной записи)
+    array = values.to_numpy()
+    masks = {answer: array == answer for answer in BINARY_MAP}
+    mapped = np.logical_or.reduce(list(masks.values()))
+    if not mapped.any():
+        return values
+    codes = np.zeros(len(array), dtype=np.int64) if mapped.all() else array.copy()
+    for answer, mask in masks.items():
+        codes[mask] = BINARY_MAP[answer]
+    return pd.Series(codes, index=values.index, name=values.name)
+
+
+@timed("validate_features")
+def validate_features(
+    data: pd.DataFrame, schema: dict, row_offset: int = 0, **kwargs
+) -> Tuple[pd.DataFrame, np.ndarray, dict]:
+    """
+    Векторная проверка датасета в формате исходного файла по схеме признаков
+    train: пропуски, типы (нечисловые значения в числовых признаках
+    и дробные - в целочисленных, Yes/No бинарных признаков - коды train),
+    выход за диапазон train (с запасом range_margin) и неизвестные категории.
+    Каждый вид ошибки - булева маска (признак, строка), поэтому проверка
+    не зависит от количества ошибок и не останавливается на первой
+    :param data: датасет
+    :param schema: схема признаков train
+    :param row_offset: номер первой строки датасета (для чтения частями)
+    :return: датасет с приведенными к числам признаками, маска корректных
+    строк и отчет (количество ошибок по признакам, ошибки первых строк)
+    """
+    preproc = kwargs["preprocessing"]
+    validation = kwargs["evaluate"]["validation"]
+    columns = schema["columns"]
+    n_rows = len(data)
+
+    # несовпадение признаков - ошибка всего запроса
+    absent = [column for column in columns if column not in data.columns]
+    extra = [
+        column
+        for column in data.columns
+        if column not in columns and column not in preproc["drop_columns"]
+    ]
+    if absent or extra:
+        raise ValueError(f"Нет признаков: {absent}, лишние признаки: {extra}")
+
+    report = {"n_rows": n_rows, "n_invalid": 0, "counts": {}, "errors": []}
+    if not validation["enabled"]:
+        return data, np.ones(n_rows, dtype=bool), report
+
+    masks = {kind: np.zeros((len(columns), n_rows), dtype=bool) for kind in ERROR_KINDS}
+    converted = {}
+    for i, column in enumerate(columns):
+        feature = schema["features"][column]
+        values = data[column]
+        missing = values.isna().to_numpy()
+        masks["missing"][i] = missing
+
+        if column in preproc["one_hot_columns"]:
+            # коды заменяются на названия категорий, как в test_preprocess
+            # (в том числе коды в столбце смешанного типа)
+            mapping = preproc["map_change_columns"].get(column)
+            if mapping:
+                names = values.map(mapping)
+                if names.notna().any():
+                    values = names.where(names.notna(), values)
+                    converted[column] = values
+            known = values.isin(feature["categories"]).to_numpy()
+            masks["unknown_category"][i] = ~known & ~missing
+            continue
+
+        if column in preproc["passthrough_columns"]:
+            # Yes/No (как в форме UI) - коды train, а не ошибка типа
+            values = encode_binary(values)
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+        if values is not data[column]:
+            converted[column] = values
+        numbers = values.to_numpy(dtype=np.float64)
+        valid_numbers = ~np.isnan(numbers)
+        wrong_type = ~valid_numbers & ~missing
+        if pd.api.types.is_integer_dtype(feature["dtype"]):
+            # дробные значения целочисленных признаков не округляются
+            # при приведении к типам train, а считаются ошибкой типа
+            fractional = valid_numbers.copy()
+            fractional[valid_numbers] = numbers[valid_numbers] % 1 != 0
+            wrong_type |= fractional
+            valid_numbers &= ~fractional
+        masks["type"][i] = wrong_type
+
+        if "categories" in feature:
+            known = np.isin(numbers, feature["categories"])
+            masks["unknown_category"][i] = ~known & valid_numbers
+        else:
+            margin = validation["range_margin"] * (feature["max"] - feature["min"])
+            with np.errstate(invalid="ignore"):
+                outside = (numbers < feature["min"] - margin) | (
+                    numbers > feature["max"] + margin
+                )
+            masks["out_of_range"][i] = outside & valid_numbers
+
+    invalid = np.zeros(n_rows, dtype=bool)
+    for kind, mask in masks.items():
+        invalid |= mask.any(axis=0)
+        for i in np.flatnonzero(mask.any(axis=1)):
+            count = int(mask[i].sum())
+            report["counts"].setdefault(columns[i], {})[kind] = count
+            VALIDATION_ERRORS.inc(count, column=columns[i], kind=kind)
+
+    # подробный отчет - только для первых max_errors строк с ошибками
+    rows = np.flatnonzero(invalid)
+    report["n_invalid"] = len(rows)
+    for row in rows[: validation["max_errors"]]:
+        errors = {}
+        for kind, mask in masks.items():
+            for i in np.flatnonzero(mask[:, row]):
+                errors[columns[i]] = kind
+        report["errors"].append({"row": int(row) + row_offset, "errors": errors})
+
+    if converted:
+        data = data.assign(**converted)
+    return data, ~invalid, report
+
+
+def expand_rows(values: dict, valid: np.ndarray) -> dict:
+    """
+    Результаты для корректных строк -> списки по всем строкам
+    (None для строк с ошибками)
+    :param values: словарь название -> список значений корректных строк
+    :param valid: маска корректных строк
+    :return: словарь название -> список значений всех строк
+    """
+    if valid.all():
+        return values
+    positions = np.flatnonzero(valid)
+    expanded = {}
+    for key, column in values.items():
+        full = np.full(len(valid), None, dtype=object)
+        full[positions] = column
+        expanded[key] = full.tolist()
+    return expanded
@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# пути в params.yaml заданы относительно папки backend
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from src.registry.registry import load_config  # noqa: E402
+
+CONFIG_PATH = "../config/params.yaml"
+
+
+@pytest.fixture(scope="session")
+def config() -> dict:
+    return load_config(CONFIG_PATH)
+
+
+@pytest.fixture(scope="session")
+def raw_test(config) -> pd.DataFrame:
+    """
+    Исходный тестовый датасет (файл для загрузки в UI)
+    """
+    return pd.read_csv("../data/raw/test.csv")
+
+
+def form_records(data: pd.DataFrame, config: dict) -> list:
+    """
+    Записи в том виде, в котором их отправляет форма Streamlit:
+    названия категорий Ethnicity и Yes/No для бинарных признаков
+    """
+    preproc = config["preprocessing"]
+    ethnicity = preproc["map_change_columns"]["Ethnicity"]
+    records = []
+    for row in data.to_dict("records"):
+        record = {}
+        for column in preproc["scale_columns"]:
+            record[column] = row[column]
+        record["Ethnicity"] = ethnicity[row["Ethnicity"]]
+        for column in preproc["passthrough_columns"]:
+            record[column] = "Yes" if row[column] == 1 else "No"
+        records.append(record)
+    return records
+
+
+def code_records(data: pd.DataFrame, config: dict) -> list:
+    """
+    Те же записи с кодами бинарных признаков "0"/"1"
+    """
+    records = form_records(data, config)
+    for record in records:
+        for column in config["preprocessing"]["passthrough_columns"]:
+            record[column] = "1" if record[column] == "Yes" else "0"
+    return records
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,172 @@
+import pytest
+
+from conftest import code_records, form_records
+
+
+def test_predict_input_form_payload(client, raw_test, config):
+    """
+    Запись из формы UI (Yes/No) предсказывается так же, как запись
+    с кодами 0/1, и попадает в кэш под тем же ключом
+    """
+    rows = raw_test.head(20)
+    for form, codes in zip(form_records(rows, config), code_records(rows, config)):
+        response = client.post("/predict_input", json=form, params={"scores": True})
+        assert response.status_code == 200, response.text
+        expected = client.post("/predict_input", json=codes, params={"scores": True})
+        assert expected.status_code == 200, expected.text
+        assert response.json() == expected.json()
+        # повторный запрос - из кэша
+        cached = client.post("/predict_input", json=form, params={"scores": True})
+        assert cached.json() == response.json()
+
+
+def test_predict_batch_form_payload(client, raw_test, config):
+    """
+    /predict_batch принимает те же записи, что и /predict_input:
+    Yes/No из формы и коды 0/1 дают одинаковые предсказания
+    """
+    rows = raw_test.head(50)
+    form = client.post(
+        "/predict_batch", json=form_records(rows, config), params={"scores": True}
+    )
+    codes = client.post(
+        "/predict_batch", json=code_records(rows, config), params={"scores": True}
+    )
+    assert form.status_code == 200, form.text
+    assert form.json()["validation"]["n_invalid"] == 0
+    assert form.json() == codes.json()
+    record = form_records(rows.head(1), config)[0]
+    single = client.post("/predict_input", json=record, params={"scores": True})
+    assert single.json()["score"] == form.json()["score"][0]
+
+
+def test_predict_stream_spooled_body(client, monkeypatch):
+    """
+    csv в теле /predict_stream предсказывается одинаково, остается ли
+    файл в памяти или переносится на диск
+    """
+    import main
+
+    with open("../data/raw/test.csv", "rb") as file:
+        body = file.read()
+    responses = []
+    for max_bytes in (len(body) + 1, 1024):
+        monkeypatch.setitem(main.upload_config, "spool_max_bytes", max_bytes)
+        response = client.post(
+            "/predict_stream",
+            content=body,
+            headers={"Content-Type": "text/csv"},
+            params={"output_format": "csv"},
+        )
+        assert response.status_code == 200, response.text
+        responses.append(response.text)
+    assert responses[0] == responses[1]
+    assert len(responses[0].splitlines()) == body.count(b"\n")
+
+
+def test_predict_batch_malformed_body(client):
+    """
+    Тело /predict_batch, не являющееся JSON, - ошибка 422 с описанием
+    """
+    for body in (b"not json", b'[{"Age": 70,', b"{"):
+        response = client.post(
+            "/predict_batch", content=body, headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == 422, response.text
+        assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_predict_stream_column_mismatch(client, raw_test):
+    """
+    Файл с признаками, не совпадающими со схемой, - ошибка 422
+    до начала потоковой передачи, а не 200 с пустым ответом
+    """
+    body = raw_test.drop(columns=["Age"]).to_csv(index=False).encode()
+    response = client.post(
+        "/predict_stream", content=body, headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 422, response.text
+    assert "Age" in response.json()["detail"]
+
+
+def test_predict_file_all_rows(client, raw_test):
+    """
+    /predict возвращает предсказания для всех строк файла
+    """
+    with open("../data/raw/test.csv", "rb") as file:
+        response = client.post("/predict", files={"file": file})
+    assert response.status_code == 200, response.text
+    assert len(response.json()["prediction"]) == len(raw_test)
+
+
+def test_predict_file_scores(client, raw_test, config):
+    """
+    /predict при scores=true возвращает значения решающей функции
+    и вероятности, как /predict_batch
+    """
+    with open("../data/raw/test.csv", "rb") as file:
+        response = client.post(
+            "/predict", files={"file": file}, params={"scores": True}
+        )
+    assert response.status_code == 200, response.text
+    batch = client.post(
+        "/predict_batch", json=form_records(raw_test, config), params={"scores": True}
+    )
+    for field in ("prediction", "score", "probability"):
+        assert response.json()[field] == pytest.approx(batch.json()[field]), field
+
+
+def test_predict_input_invalid_record(client, raw_test, config):
+    """
+    Ошибки в значениях признаков записи - 422 с отчетом по признакам,
+    запись не учитывается в мониторинге сдвига
+    """
+    import main
+
+    version = main.registry.get().version
+    observed = lambda: main.drift_monitor.report().get(version, {}).get("n_rows", 0)
+    n_rows = observed()
+    record = form_records(raw_test.head(1), config)[0]
+    for column, value, kind in (
+        ("Ethnicity", "Martian", "unknown_category"),
+        ("Smoking", "maybe", "type"),
+        ("SystolicBP", 900, "out_of_range"),
+    ):
+        response = client.post("/predict_input", json={**record, column: value})
+        assert response.status_code == 422, response.text
+        report = response.json()["detail"]
+        assert report["n_invalid"] == 1
+        assert report["errors"][0]["errors"] == {column: kind}
+    assert observed() == n_rows
+
+
+def test_predict_input_encoding_error(client, raw_test, config, monkeypatch):
+    """
+    При отключенной проверке по схеме значение, не прошедшее кодирование,
+    дает 422 с названием признака, а не 500
+    """
+    import main
+
+    monkeypatch.setitem(main.validation_config, "enabled", False)
+    record = form_records(raw_test.head(1), config)[0]
+    for column, value in (("Ethnicity", "Martian"), ("Smoking", "maybe")):
+        response = client.post("/predict_input", json={**record, column: value})
+        assert response.status_code == 422, response.text
+        assert response.json()["detail"]["column"] == column
+        assert response.json()["detail"]["value"] == value
+
+
+def test_predict_without_model(client, raw_test, config, monkeypatch):
+    """
+    Пока нет опубликованной версии модели - 503, а не 500
+    """
+    import main
+
+    def no_model(version=None):
+        raise FileNotFoundError("Нет обученной модели")
+
+    monkeypatch.setattr(main.registry, "get", no_model)
+    record = form_records(raw_test.head(1), config)[0]
+    response = client.post("/predict_input", json=record)
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Нет обученной модели"
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from src.evaluate.batching import MicroBatcher
+
+
+def run_batcher(predict_fn, records, max_latency_ms=50, max_batch_size=4):
+    """
+    Одновременная отправка записей в сборщик батчей
+    :return: результаты (или исключения) и сборщик
+    """
+
+    async def main():
+        batcher = MicroBatcher(predict_fn, max_latency_ms, max_batch_size)
+        await batcher.start()
+        try:
+            results = await asyncio.gather(
+                *(batcher.submit(record) for record in records), return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+        return results, batcher
+
+    return asyncio.run(main())
+
+
+def double(records: list) -> list:
+    if any(record < 0 for record in records):
+        raise ValueError("Отрицательное значение")
+    return [2 * record for record in records]
+
+
+def test_flush_by_size():
+    """
+    Батч отправляется, как только набирается max_batch_size записей
+    """
+    start = time.perf_counter()
+    results, batcher = run_batcher(double, list(range(8)), max_latency_ms=5000)
+    assert time.perf_counter() - start < 5
+    assert results == [2 * i for i in range(8)]
+    assert batcher.batch_sizes == {4: 2}
+
+
+def test_flush_by_latency():
+    """
+    Неполный батч отправляется по истечении max_latency_ms
+    """
+    results, batcher = run_batcher(double, [1, 2], max_latency_ms=20)
+    assert results == [2, 4]
+    assert batcher.batch_sizes == {2: 1}
+
+
+def test_bad_record_isolated():
+    """
+    Ошибка одной записи не затрагивает остальные записи батча
+    """
+    results, _ = run_batcher(double, [1, -1, 2, 3])
+    assert results[0] == 2 and results[2:] == [4, 6]
+    assert isinstance(results[1], ValueError)
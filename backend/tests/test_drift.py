@@ -0,0 +1,26 @@
+from conftest import code_records, form_records
+from src.monitoring.drift import DriftMonitor
+
+
+def test_form_records_match_reference(client, raw_test, config):
+    """
+    Yes/No из формы попадают в ячейки кодов train: нет неизвестных
+    значений и ложного сдвига бинарных признаков
+    """
+    import main
+
+    artifacts = main.registry.get()
+    reports = {}
+    for name, records in (
+        ("form", form_records(raw_test, config)),
+        ("codes", code_records(raw_test, config)),
+    ):
+        monitor = DriftMonitor(min_rows=100, psi_warning=0.1, psi_alert=0.25)
+        monitor.observe_records(artifacts, records)
+        reports[name] = monitor.report(artifacts.version)[artifacts.version]
+
+    for column in config["preprocessing"]["passthrough_columns"]:
+        form = reports["form"]["features"][column]
+        assert form["unseen_rate"] == 0
+        assert form["status"] != "drift"
+        assert form == reports["codes"]["features"][column]
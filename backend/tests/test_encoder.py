@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from conftest import form_records
+from src.registry.registry import load_artifacts
+from src.transform import transform
+from src.transform.encoder import EncodingError
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    return load_artifacts("../config/params.yaml")
+
+
+@pytest.fixture(scope="module")
+def expected(artifacts, raw_test):
+    """
+    Признаки test.csv после test_preprocess и ColumnTransformer
+    """
+    features = transform.test_preprocess(
+        test_data=raw_test,
+        schema=artifacts.schema,
+        column_transformer=artifacts.column_transformer,
+        **artifacts.config,
+    )
+    return np.asarray(features, dtype=np.float64)
+
+
+def test_encoder_raw_codes(artifacts, raw_test, expected):
+    """
+    Записи с исходными кодами (Ethnicity 0-3, бинарные признаки 0/1)
+    """
+    records = raw_test[artifacts.schema["columns"]].to_dict("records")
+    np.testing.assert_allclose(artifacts.encoder.transform(records), expected)
+
+
+def test_encoder_form_records(artifacts, raw_test, expected, config):
+    """
+    Записи из формы UI (названия категорий, Yes/No)
+    """
+    records = form_records(raw_test, config)
+    np.testing.assert_allclose(artifacts.encoder.transform(records), expected)
+
+
+def test_encoder_single_record(artifacts, raw_test, expected, config):
+    record = form_records(raw_test.head(1), config)[0]
+    np.testing.assert_allclose(artifacts.encoder.transform(record), expected[:1])
+
+
+@pytest.mark.parametrize(
+    "column, value",
+    [
+        ("Ethnicity", "Martian"),
+        ("Ethnicity", ["Asian"]),
+        ("Age", "old"),
+        ("Smoking", "maybe"),
+    ],
+)
+def test_encoder_bad_value(artifacts, raw_test, config, column, value):
+    """
+    Некорректное значение - EncodingError с признаком и значением
+    """
+    record = {**form_records(raw_test.head(1), config)[0], column: value}
+    with pytest.raises(EncodingError, match=column) as error:
+        artifacts.encoder.transform(record)
+    assert (error.value.column, error.value.value) == (column, value)
+
+
+def test_encoder_missing_column(artifacts, raw_test, config):
+    record = form_records(raw_test.head(1), config)[0]
+    del record["Age"]
+    with pytest.raises(EncodingError, match="Нет признака Age"):
+        artifacts.encoder.transform(record)
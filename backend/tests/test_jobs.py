@@ -0,0 +1,107 @@
+import os
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from src.jobs import jobs
+
+from conftest import CONFIG_PATH
+
+
+def wait_status(training_jobs, job_id, statuses, timeout=10.0):
+    """
+    Ожидание, пока задача перейдет в одно из состояний
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = training_jobs.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Задача в состоянии {job['status']}")
+
+
+@pytest.fixture
+def training_jobs(tmp_path, monkeypatch):
+    """
+    Задачи обучения в пуле потоков (вместо процессов) с подменой обучения
+    """
+    monkeypatch.setattr(
+        jobs.TrainingJobs, "_new_executor", lambda self: ThreadPoolExecutor(1)
+    )
+    training_jobs = jobs.TrainingJobs(CONFIG_PATH, str(tmp_path))
+    yield training_jobs
+    training_jobs.shutdown()
+
+
+def test_submit_dedup_and_statuses(training_jobs, monkeypatch):
+    """
+    Повторный запрос во время обучения получает ту же задачу,
+    состояние проходит queued -> running -> done
+    """
+    release = threading.Event()
+
+    def fake_training(config_path, callback, search):
+        callback("train", 0.5)
+        release.wait(10)
+        return "v1"
+
+    monkeypatch.setattr(jobs, "pipeline_training", fake_training)
+    job = training_jobs.submit()
+    assert job["status"] == jobs.STATUS_QUEUED
+
+    running = wait_status(training_jobs, job["job_id"], [jobs.STATUS_RUNNING])
+    assert running["stage"] == "train"
+    assert training_jobs.submit()["job_id"] == job["job_id"]
+
+    release.set()
+    done = wait_status(training_jobs, job["job_id"], [jobs.STATUS_DONE])
+    assert done["version"] == "v1"
+    assert training_jobs.submit()["job_id"] != job["job_id"]
+
+
+def test_failed_job(training_jobs, monkeypatch):
+    def fake_training(config_path, callback, search):
+        raise RuntimeError("Нет данных")
+
+    monkeypatch.setattr(jobs, "pipeline_training", fake_training)
+    job = training_jobs.submit()
+    failed = wait_status(training_jobs, job["job_id"], [jobs.STATUS_FAILED])
+    assert "Нет данных" in failed["error"]
+
+
+def test_lost_queued_job(training_jobs, monkeypatch):
+    """
+    Задача в состоянии queued при живом процессе-владельце, которую пул
+    не выполнит (future отменен или задача осталась от прежнего экземпляра),
+    помечается упавшей, и запускается новая
+    """
+
+    class LostExecutor:
+        def submit(self, fn, *args):
+            future = Future()
+            future.cancel()
+            return future
+
+        def shutdown(self, wait, cancel_futures):
+            pass
+
+    monkeypatch.setattr(jobs.TrainingJobs, "_new_executor", lambda self: LostExecutor())
+    job = training_jobs.submit()
+    failed = training_jobs.get(job["job_id"])
+    assert failed["status"] == jobs.STATUS_FAILED
+    assert failed["owner_pid"] == os.getpid()
+
+    stale = {**job, "job_id": "stale", "status": jobs.STATUS_QUEUED}
+    jobs.write_job(os.path.join(training_jobs.jobs_dir, "stale.json"), stale)
+    monkeypatch.setattr(jobs, "pipeline_training", lambda **kwargs: "v1")
+    monkeypatch.setattr(
+        jobs.TrainingJobs, "_new_executor", lambda self: ThreadPoolExecutor(1)
+    )
+    training_jobs._executor = None
+    new_job = training_jobs.submit()
+    assert new_job["job_id"] not in (job["job_id"], "stale")
+    assert training_jobs.get("stale")["status"] == jobs.STATUS_FAILED
+    wait_status(training_jobs, new_job["job_id"], [jobs.STATUS_DONE])
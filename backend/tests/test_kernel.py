@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.svm import SVC
+
+from src.evaluate.kernel import SVCKernel
+from src.train.export import export_svc
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(n_samples=300, n_features=8, random_state=0)
+    return pd.DataFrame(X[:200]), y[:200], pd.DataFrame(X[200:])
+
+
+@pytest.mark.parametrize("kernel", ["rbf", "linear"])
+@pytest.mark.parametrize("dtype, rtol", [("float64", 1e-9), ("float32", 1e-4)])
+def test_decision_function(data, tmp_path, kernel, dtype, rtol):
+    """
+    Решающая функция и предсказания выгруженной модели совпадают с SVC
+    (после сохранения и загрузки артефакта)
+    """
+    X_train, y_train, X_test = data
+    model = SVC(kernel=kernel, C=1.0, gamma="scale").fit(X_train, y_train)
+    kernel_path = str(tmp_path / "model_svc.npz")
+    export_svc(model, X_test, kernel_path)
+
+    kernel_model = SVCKernel.load(kernel_path, dtype=dtype)
+    expected = model.decision_function(X_test)
+    result = kernel_model.decision_function(X_test)
+    assert result.dtype == np.dtype(dtype)
+    np.testing.assert_allclose(result, expected, rtol=rtol, atol=rtol)
+    # метки сравниваются вне окрестности границы (float32 может ее сдвинуть)
+    margin = np.abs(expected) > 1e-3
+    np.testing.assert_array_equal(
+        kernel_model.predict(X_test)[margin], model.predict(X_test)[margin]
+    )
+
+
+def test_load_round_trip(data, tmp_path):
+    """
+    Загруженный артефакт содержит массивы и параметры ядра обученной модели
+    """
+    X_train, y_train, X_test = data
+    model = SVC(kernel="poly", degree=2, coef0=0.5, gamma=0.1).fit(X_train, y_train)
+    kernel_path = str(tmp_path / "model_svc.npz")
+    export_svc(model, X_test, kernel_path)
+
+    kernel_model = SVCKernel.load(kernel_path)
+    np.testing.assert_array_equal(kernel_model.support_vectors, model.support_vectors_)
+    np.testing.assert_array_equal(kernel_model.dual_coef, model.dual_coef_[0])
+    np.testing.assert_array_equal(kernel_model.classes_, model.classes_)
+    assert kernel_model.intercept == model.intercept_[0]
+    assert (kernel_model.kernel, kernel_model.degree) == ("poly", 2)
+    assert (kernel_model.gamma, kernel_model.coef0) == (0.1, 0.5)
@@ -0,0 +1,43 @@
+from src.jobs import jobs
+from src.monitoring.metrics import REGISTRY, REQUESTS, stage_timer
+
+from conftest import CONFIG_PATH
+
+
+def test_type_names_match_samples():
+    """
+    В строках # TYPE - названия метрик, с которых начинаются их значения
+    """
+    REQUESTS.inc(method="GET", path="/metrics", status=200)
+    name = None
+    for line in REGISTRY.render().splitlines():
+        if line.startswith("# TYPE"):
+            _, _, name, kind = line.split()
+        elif not line.startswith("#"):
+            sample = line.split("{")[0].split()[0]
+            if kind == "counter":
+                assert sample == name
+            else:
+                assert sample in (f"{name}_bucket", f"{name}_sum", f"{name}_count")
+    assert "# TYPE http_requests_total counter" in REGISTRY.render()
+
+
+def test_job_function_timings(tmp_path, monkeypatch):
+    """
+    Время функций задачи обучения не включает предыдущие задачи
+    того же процесса
+    """
+
+    def fake_training(config_path, callback, search):
+        with stage_timer("fake_stage"):
+            callback("train", 0.5)
+        return "v1"
+
+    monkeypatch.setattr(jobs, "pipeline_training", fake_training)
+    for _ in range(2):
+        job_path = str(tmp_path / "job.json")
+        jobs.write_job(job_path, {"status": jobs.STATUS_QUEUED})
+        jobs.run_training_job(CONFIG_PATH, job_path)
+        job = jobs.read_job(job_path)
+        assert job["status"] == jobs.STATUS_DONE
+        assert job["function_timings"]["fake_stage"]["calls"] == 1
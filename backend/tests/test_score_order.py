@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from sklearn import metrics
+
+from src.train.metrics import ScoreOrder
+
+
+@pytest.fixture(scope="module")
+def scores():
+    """
+    Случайные ответы с совпадающими вероятностями (округление до 0.05)
+    """
+    rng = np.random.RandomState(0)
+    y_test = rng.randint(0, 2, size=500)
+    probability = np.round(np.clip(0.3 * y_test + rng.rand(500) * 0.7, 0, 1) * 20) / 20
+    y_predict = (probability >= 0.5).astype(int)
+    y_probability = np.c_[1 - probability, probability]
+    return y_test, y_predict, y_probability
+
+
+def test_metrics_match_sklearn(scores):
+    """
+    Метрики по весам объектов совпадают с sklearn (в том числе с sample_weight)
+    """
+    y_test, y_predict, y_probability = scores
+    score_order = ScoreOrder(y_test, y_predict, y_probability)
+    rng = np.random.RandomState(1)
+    weights = np.vstack(
+        [np.ones(len(y_test)), rng.randint(0, 3, size=len(y_test))]
+    ).astype(np.float64)
+
+    values = score_order.metrics(weights[:, score_order.order])
+    for row, sample_weight in enumerate(weights):
+        expected = {
+            "roc_auc": metrics.roc_auc_score(
+                y_test, y_probability[:, 1], sample_weight=sample_weight
+            ),
+            "precision": metrics.precision_score(
+                y_test, y_predict, sample_weight=sample_weight
+            ),
+            "recall": metrics.recall_score(
+                y_test, y_predict, sample_weight=sample_weight
+            ),
+            "f1": metrics.f1_score(y_test, y_predict, sample_weight=sample_weight),
+            "logloss": metrics.log_loss(
+                y_test, y_probability, sample_weight=sample_weight
+            ),
+        }
+        for name, value in expected.items():
+            assert values[name][row] == pytest.approx(value, rel=1e-9), name
+
+
+def test_curves_match_sklearn(scores):
+    """
+    ROC и precision-recall кривые по всем порогам совпадают с sklearn
+    """
+    y_test, y_predict, y_probability = scores
+    curves = ScoreOrder(y_test, y_predict, y_probability).curves()
+
+    fpr, tpr, thresholds = metrics.roc_curve(
+        y_test, y_probability[:, 1], drop_intermediate=False
+    )
+    # первая точка sklearn - порог выше максимальной вероятности
+    np.testing.assert_allclose(curves["threshold"], thresholds[1:])
+    np.testing.assert_allclose(curves["fpr"], fpr[1:])
+    np.testing.assert_allclose(curves["tpr"], tpr[1:])
+
+    precision, recall, thresholds = metrics.precision_recall_curve(
+        y_test, y_probability[:, 1]
+    )
+    np.testing.assert_allclose(curves["threshold"][::-1], thresholds)
+    np.testing.assert_allclose(curves["precision"][::-1], precision[:-1])
+    np.testing.assert_allclose(curves["recall"][::-1], recall[:-1])
+    assert curves["count"].sum() == len(y_test)
+
+
+def test_bootstrap_deterministic(scores):
+    """
+    Интервалы при фиксированном random_state воспроизводятся и не зависят
+    от разбиения выборок на батчи по памяти
+    """
+    score_order = ScoreOrder(*scores)
+    intervals = score_order.bootstrap(200, random_state=10)
+    assert score_order.bootstrap(200, random_state=10) == intervals
+    assert score_order.bootstrap(200, random_state=10, memory_mb=0.1) == intervals
+    for name, (low, high) in intervals.items():
+        assert low <= high, name
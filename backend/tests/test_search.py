@@ -0,0 +1,34 @@
+import json
+
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from src.train.search import search_params
+
+
+def test_halving_first_iteration_scored(tmp_path, config):
+    """
+    На первой итерации successive halving в каждом фолде есть оба класса:
+    оценки кандидатов определены (не NaN)
+    """
+    X, y = make_classification(
+        n_samples=600, n_features=8, weights=[0.65], random_state=42
+    )
+    search = {
+        **config["search"],
+        "method": "halving",
+        "n_jobs": 1,
+        "results_path": str(tmp_path / "search.csv"),
+    }
+    train = {**config["train"], "params_path": str(tmp_path / "params.json")}
+    best_params = search_params(
+        pd.DataFrame(X), pd.Series(y), search=search, train=train
+    )
+
+    results = pd.read_csv(search["results_path"])
+    first = results[results["iter"] == 0]
+    assert len(first) == len(results["params"].unique())
+    assert first["n_resources"].min() >= search["min_resources"]
+    assert first["mean_test_score"].notna().all()
+    with open(train["params_path"]) as file:
+        assert json.load(file) == best_params
@@ -0,0 +1,82 @@
+from src.pipeline.cache import StepCache, file_hash
+
+
+def run_step(cache, data_path, out_path, params, calls):
+    """
+    Этап, записывающий выходной файл: ключ - по хэшу входного файла и параметрам
+    """
+
+    def step():
+        calls.append(params)
+        with open(data_path) as file:
+            result = file.read() * params["repeat"]
+        with open(out_path, "w") as file:
+            file.write(result)
+        return {"length": len(result)}
+
+    key = cache.key("step", file_hash(data_path), params)
+    return cache.run("step", key, step, outs=[out_path])
+
+
+def test_hit_on_unchanged_inputs(tmp_path):
+    """
+    Повторный запуск с теми же входами - результат и выходной файл из кэша
+    """
+    data_path, out_path = tmp_path / "data.csv", tmp_path / "out.txt"
+    data_path.write_text("a,b\n")
+    cache, calls = StepCache(str(tmp_path / "cache")), []
+
+    first = run_step(cache, data_path, out_path, {"repeat": 2}, calls)
+    out_path.unlink()
+    second = run_step(cache, data_path, out_path, {"repeat": 2}, calls)
+
+    assert first == second == {"length": 8}
+    assert len(calls) == 1
+    assert out_path.read_text() == "a,b\na,b\n"
+
+
+def test_miss_on_changed_inputs(tmp_path):
+    """
+    Изменение параметров или содержимого входного файла - этап выполняется
+    """
+    data_path, out_path = tmp_path / "data.csv", tmp_path / "out.txt"
+    data_path.write_text("a,b\n")
+    cache, calls = StepCache(str(tmp_path / "cache")), []
+
+    run_step(cache, data_path, out_path, {"repeat": 1}, calls)
+    assert run_step(cache, data_path, out_path, {"repeat": 3}, calls) == {
+        "length": 12
+    }
+    data_path.write_text("a,b,c\n")
+    assert run_step(cache, data_path, out_path, {"repeat": 3}, calls) == {
+        "length": 18
+    }
+    assert len(calls) == 3
+    assert out_path.read_text() == "a,b,c\n" * 3
+
+
+def test_disabled(tmp_path):
+    """
+    При enabled=False этап выполняется каждый раз, кэш не записывается
+    """
+    data_path, out_path = tmp_path / "data.csv", tmp_path / "out.txt"
+    data_path.write_text("a,b\n")
+    cache, calls = StepCache(str(tmp_path / "cache"), enabled=False), []
+
+    for _ in range(2):
+        run_step(cache, data_path, out_path, {"repeat": 1}, calls)
+    assert len(calls) == 2
+    assert not (tmp_path / "cache").exists()
+
+
+def test_prune(tmp_path):
+    """
+    Для этапа хранится не больше max_entries последних результатов
+    """
+    data_path, out_path = tmp_path / "data.csv", tmp_path / "out.txt"
+    data_path.write_text("a,b\n")
+    cache, calls = StepCache(str(tmp_path / "cache"), max_entries=2), []
+
+    for repeat in range(1, 5):
+        run_step(cache, data_path, out_path, {"repeat": repeat}, calls)
+    assert len(list((tmp_path / "cache").iterdir())) == 2
@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import yaml
+
+from src.registry import store
+
+
+def write_config(config: dict, path: str) -> str:
+    with open(path, "w") as file:
+        yaml.safe_dump(config, file)
+    return path
+
+
+def test_publish_same_second(tmp_path, monkeypatch, config):
+    """
+    Повторная публикация в ту же секунду: те же артефакты - та же версия,
+    другие - версия с суффиксом
+    """
+    monkeypatch.setattr(store.time, "strftime", lambda fmt: "v20240101-000000-")
+    config = {**config, "serving": {**config["serving"]}, "train": {**config["train"]}}
+    config["serving"]["versions_dir"] = str(tmp_path / "versions")
+    metrics_path = str(tmp_path / "metrics.json")
+    shutil.copyfile(config["train"]["metrics_path"], metrics_path)
+    config["train"]["metrics_path"] = metrics_path
+    config_path = write_config(config, str(tmp_path / "params.yaml"))
+
+    first = store.publish_version(config_path)
+    assert store.publish_version(config_path) == first
+
+    with open(metrics_path, "a") as file:
+        file.write(" ")
+    second = store.publish_version(config_path)
+    assert second == f"{first}-2"
+    assert store.list_versions(config["serving"]["versions_dir"]) == [first, second]
+    assert store.read_routing(config["serving"]["versions_dir"])["production"] == second
+    names = os.listdir(config["serving"]["versions_dir"])
+    assert not [name for name in names if name.endswith(".tmp")]
+
+
+def test_list_versions_attempt_order(tmp_path):
+    """
+    Версии с суффиксом попытки упорядочены по номеру попытки, а не как строки
+    """
+    base = "v20240101-000000-1a2b3c4d"
+    names = [base] + [f"{base}-{attempt}" for attempt in (10, 2, 11, 3)]
+    names.append("v20240101-000001-00000000")
+    for name in names:
+        os.makedirs(tmp_path / name)
+        write_config({}, store.version_config_path(str(tmp_path), name))
+
+    assert store.list_versions(str(tmp_path)) == [
+        base,
+        f"{base}-2",
+        f"{base}-3",
+        f"{base}-10",
+        f"{base}-11",
+        "v20240101-000001-00000000",
+    ]
@@ -0,0 +1,79 @@
+import copy
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transform.streaming import (
+    fit_column_transformer_chunks,
+    iter_split_chunks,
+    load_memmap,
+    transform_columns_memmap,
+)
+from src.transform.transform import transform_columns
+
+CHUNK_SIZE = 70
+
+
+@pytest.fixture
+def streaming_config(config, tmp_path):
+    """
+    Конфигурация с артефактами предобработки во временной папке
+    и небольшой файл данных (несколько частей, последняя - неполная)
+    """
+    config = copy.deepcopy(config)
+    data_path = str(tmp_path / "train.csv")
+    pd.read_csv(config["preprocessing"]["raw_train_path"]).head(300).to_csv(
+        data_path, index=False
+    )
+    config["preprocessing"]["schema_path"] = str(tmp_path / "schema.json")
+    config["preprocessing"]["drift_reference_path"] = str(tmp_path / "drift.json")
+    config["train"]["col_transform_path"] = str(tmp_path / "transformer.joblib")
+    return data_path, config
+
+
+def test_streaming_matches_in_memory(streaming_config, tmp_path):
+    """
+    Потоковая предобработка (partial_fit по частям) дает те же статистики
+    StandardScaler, one-hot признаки и матрицы, что и transform_columns
+    на тех же строках трейна в памяти
+    """
+    data_path, config = streaming_config
+    chunks = list(iter_split_chunks(data_path, CHUNK_SIZE, **config))
+    assert len(chunks) > 1
+    X_train = pd.concat([chunk[0] for chunk in chunks])
+    X_test = pd.concat([chunk[1] for chunk in chunks])
+
+    expected_train = transform_columns(X_train, flg_fit=True, **config)
+    expected_test = transform_columns(X_test, **config)
+    expected = joblib.load(config["train"]["col_transform_path"]).named_transformers_
+
+    column_transformer, n_train, n_test = fit_column_transformer_chunks(
+        data_path, CHUNK_SIZE, **config
+    )
+    assert (n_train, n_test) == (len(X_train), len(X_test))
+    scaler = column_transformer.named_transformers_["scale"]
+    np.testing.assert_allclose(scaler.mean_, expected["scale"].mean_)
+    np.testing.assert_allclose(scaler.var_, expected["scale"].var_)
+    assert scaler.n_samples_seen_ == expected["scale"].n_samples_seen_
+    encoder = column_transformer.named_transformers_["encode"]
+    assert [list(c) for c in encoder.categories_] == [
+        list(c) for c in expected["encode"].categories_
+    ]
+    assert list(column_transformer.get_feature_names_out()) == list(
+        expected_train.columns
+    )
+
+    matrices = transform_columns_memmap(
+        data_path,
+        CHUNK_SIZE,
+        column_transformer,
+        n_train,
+        n_test,
+        memmap_dir=str(tmp_path / "memmap"),
+        **config
+    )
+    train, test, _, _ = load_memmap(matrices)
+    np.testing.assert_allclose(train, expected_train, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(test, expected_test, rtol=1e-6, atol=1e-6)
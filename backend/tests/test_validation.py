@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from conftest import form_records
+from src.transform.schema import load_schema
+from src.transform.validation import validate_features
+
+
+def raw_rows(raw_test: pd.DataFrame, config: dict) -> pd.DataFrame:
+    return raw_test.drop(columns=config["preprocessing"]["drop_columns"]).head(10)
+
+
+def test_form_values_are_valid(raw_test, config):
+    """
+    Yes/No бинарных признаков и названия категорий - корректные значения
+    """
+    schema = load_schema(config["preprocessing"]["schema_path"])
+    data = pd.DataFrame(form_records(raw_test.head(10), config))
+    data, valid, report = validate_features(data, schema, **config)
+    assert valid.all(), report
+    passthrough = config["preprocessing"]["passthrough_columns"]
+    expected = raw_test.head(10)[passthrough].to_numpy()
+    assert np.array_equal(data[passthrough].to_numpy(), expected)
+
+
+def test_row_errors(raw_test, config):
+    """
+    Ошибки отмечаются по строкам, дробный возраст не округляется
+    """
+    schema = load_schema(config["preprocessing"]["schema_path"])
+    data = raw_rows(raw_test, config).astype(object)
+    data.loc[1, "Age"] = 65.5
+    data.loc[2, "Smoking"] = "maybe"
+    data.loc[3, "MMSE"] = np.nan
+    data.loc[4, "SystolicBP"] = 900
+    data.loc[5, "Ethnicity"] = 9
+    _, valid, report = validate_features(data, schema, row_offset=100, **config)
+    assert valid.tolist() == [True, False, False, False, False, False] + [True] * 4
+    assert [item["errors"] for item in report["errors"]] == [
+        {"Age": "type"},
+        {"Smoking": "type"},
+        {"MMSE": "missing"},
+        {"SystolicBP": "out_of_range"},
+        {"Ethnicity": "unknown_category"},
+    ]
+    assert report["errors"][0]["row"] == 101
+
+
+def test_predict_batch_invalid_rows(client, raw_test, config):
+    """
+    Строки с ошибками не предсказываются, остальные - как обычно
+    """
+    records = form_records(raw_test.head(5), config)
+    expected = client.post("/predict_batch", json=records).json()["prediction"]
+    records[1]["SystolicBP"] = 900
+    records[3]["Smoking"] = "maybe"
+    response = client.post("/predict_batch", json=records)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["prediction"] == [
+        value if i not in (1, 3) else None for i, value in enumerate(expected)
+    ]
+    assert result["validation"]["n_invalid"] == 2
+
+
+def test_predict_file_fractional_age(client, raw_test):
+    """
+    Дробный возраст в файле - ошибка строки, а не округление
+    """
+    data = raw_test.head(5).astype({"Age": float})
+    data.loc[2, "Age"] = 65.5
+    response = client.post(
+        "/predict", files={"file": ("test.csv", data.to_csv(index=False).encode())}
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["prediction"][2] is None
+    assert result["validation"]["errors"] == [{"row": 2, "errors": {"Age": "type"}}]
@@ -0,0 +1,81 @@
+import os
+import json
+import subprocess
+import sys
+
+from conftest import form_records
+from src.monitoring.drift import DriftMonitor
+from src.monitoring.metrics import Counter, Histogram
+from src.monitoring.workers import WorkerStates
+
+
+def test_metrics_merge():
+    """
+    Значения метрик других воркеров суммируются с метриками процесса
+    """
+    counter = Counter("requests", "Запросы", ("path",))
+    counter.inc(path="/predict")
+    histogram = Histogram("seconds", "Время", buckets=(1.0,))
+    histogram.observe(0.5)
+    other_counter = json.loads(json.dumps(counter.state()))
+    other_histogram = json.loads(json.dumps(histogram.state()))
+
+    assert counter.samples([other_counter]) == ['requests_total{path="/predict"} 2.0']
+    assert histogram.samples([other_histogram]) == [
+        'seconds_bucket{le="1.0"} 2',
+        'seconds_bucket{le="+Inf"} 2',
+        "seconds_sum 1.0",
+        "seconds_count 2",
+    ]
+
+
+def test_worker_state_files(tmp_path):
+    """
+    Читаются состояния живых воркеров, файлы завершившихся удаляются
+    """
+    process = subprocess.run(
+        [sys.executable, "-c", "import os; print(os.getpid())"],
+        capture_output=True,
+        text=True,
+    )
+    dead_pid = int(process.stdout)
+    states = WorkerStates(lambda: {"pid": os.getpid()}, str(tmp_path), 5, "app")
+    states.flush()
+    # посторонние файлы в папке состояний пропускаются
+    for name, pid in (
+        (os.getppid(), os.getppid()),
+        (dead_pid, dead_pid),
+        ("settings", None),
+    ):
+        with open(tmp_path / "app" / f"{name}.json", "w") as file:
+            json.dump({"pid": pid}, file)
+
+    assert states.others() == [{"pid": os.getppid()}]
+    assert not os.path.exists(tmp_path / "app" / f"{dead_pid}.json")
+    assert os.path.exists(tmp_path / "app" / "settings.json")
+
+    # воркеры другого приложения с той же state_dir не видны
+    other_app = WorkerStates(lambda: {"pid": os.getpid()}, str(tmp_path), 5, "other")
+    assert other_app.others() == []
+
+
+def test_drift_merge(client, raw_test, config):
+    """
+    Сдвиг по запросам всех воркеров: описания других воркеров добавляются,
+    в том числе для версий, к которым процесс не получал запросов
+    """
+    import main
+
+    artifacts = main.registry.get()
+    records = form_records(raw_test, config)
+    worker = DriftMonitor(min_rows=100, psi_warning=0.1, psi_alert=0.25)
+    worker.observe_records(artifacts, records)
+    other = json.loads(json.dumps(worker.state()))
+
+    monitor = DriftMonitor(min_rows=100, psi_warning=0.1, psi_alert=0.25)
+    merged = monitor.report(artifacts.version, [other])[artifacts.version]
+    assert merged == worker.report(artifacts.version)[artifacts.version]
+
+    monitor.observe_records(artifacts, records)
+    merged = monitor.report(artifacts.version, [other])[artifacts.version]
+    assert merged["n_rows"] == 2 * len(records)
@@ -0,0 +1,127 @@
+"""
+Сравнение точного SVC и приближенного SVM (train.engine: approx):
+время обучения, пиковая память и метрики на холдауте. Каждый движок
+обучается в отдельном процессе, память - пиковый RSS процесса (учитывает
+и память C-библиотек, например libsvm).
+Запуск из корня репозитория:
+python benchmarks/bench_engines.py 2000 20000 100000
+"""
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import yaml
+import pandas as pd
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.transform.transform import split_preprocess, transform_columns
+from src.train.train import fit_model
+from src.train.metrics import create_dict_metrics
+from src.train.calibration import ScoreCalibrator
+from synthetic import make_synthetic
+
+CONFIG_PATH = "../config/params.yaml"
+# точный SVC обучается за O(n^2) - O(n^3), на больших размерах пропускается
+MAX_SVC_ROWS = 50000
+
+
+def peak_rss_mb() -> float:
+    """
+    Пиковый RSS текущего процесса (ru_maxrss в Linux - в килобайтах)
+    :return: мегабайты
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def bench_engine(engine: str, data_path: str, config: dict) -> dict:
+    """
+    Обучение модели одним движком, замер времени, памяти и метрик
+    (выполняется в отдельном процессе)
+    :param engine: svc или approx
+    :param data_path: путь до сохраненных X_train, X_test, y_train, y_test
+    :return: словарь с результатами
+    """
+    with open(config["train"]["params_path"]) as json_file:
+        best_params = json.load(json_file)
+    X_train, X_test, y_train, y_test = joblib.load(data_path)
+
+    # прирост пикового RSS за время обучения - память самого обучения
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    model = fit_model(
+        X_train,
+        y_train,
+        best_params,
+        engine=engine,
+        approx_params=config["train"]["approx"],
+    )
+    fit_time = time.perf_counter() - start
+    rss_after = peak_rss_mb()
+
+    start = time.perf_counter()
+    scores = model.decision_function(X_test)
+    predict_time = time.perf_counter() - start
+    # калибровка на холдауте только для сравнения ранжирования и logloss
+    calibrator = ScoreCalibrator(config["train"]["calibration_method"])
+    probability = calibrator.fit(scores, y_test).predict_proba(scores)
+    labels = model.classes_[(scores > 0).astype(int)]
+
+    return {
+        "engine": engine,
+        "fit_time_s": round(fit_time, 3),
+        "predict_time_s": round(predict_time, 3),
+        "peak_rss_mb": round(rss_after, 1),
+        "fit_rss_mb": round(rss_after - rss_before, 1),
+        **create_dict_metrics(y_test, labels, probability),
+    }
+
+
+def run_isolated(engine: str, data_path: str, config: dict) -> dict:
+    """
+    Запуск bench_engine в новом процессе, чтобы пиковый RSS
+    не включал память предыдущих замеров
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(bench_engine, engine, data_path, config).result()
+
+
+def main(sizes: list) -> None:
+    os.chdir(BACKEND_DIR)
+    with open(CONFIG_PATH) as file:
+        config = yaml.load(file, Loader=yaml.FullLoader)
+    preproc = config["preprocessing"]
+    data = pd.read_csv(preproc["raw_train_path"])
+    # column transformer бенчмарка не перезаписывает рабочий артефакт
+    config["train"]["col_transform_path"] = os.path.join(
+        tempfile.mkdtemp(), "column_transformer.joblib"
+    )
+
+    results = []
+    for size in sizes:
+        synthetic = make_synthetic(data, size, preproc["scale_columns"])
+        X_train, X_test, y_train, y_test = split_preprocess(synthetic, **config)
+        X_train = transform_columns(X_train, flg_fit=True, **config)
+        X_test = transform_columns(X_test, **config)
+        data_path = os.path.join(tempfile.mkdtemp(), "data.joblib")
+        joblib.dump((X_train, X_test, y_train, y_test), data_path)
+        for engine in ("svc", "approx"):
+            if engine == "svc" and len(X_train) > MAX_SVC_ROWS:
+                continue
+            result = {"rows": size, **run_isolated(engine, data_path, config)}
+            print(json.dumps(result))
+            results.append(result)
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [2000, 20000, 100000])
@@ -0,0 +1,411 @@
+"""
+Бенчмарки горячих путей обучения и предсказания на синтетических данных.
+Запуск из корня репозитория:
+python benchmarks/run_benchmarks.py --sizes 1000 100000 1000000
+Результаты пишутся в JSON и сравниваются с сохраненным baseline
+(код возврата 1 при регрессии), новый baseline: --save-baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+import joblib
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BACKEND_DIR = os.path.join(BENCH_DIR, "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from src.data.get_data import get_dataset
+from src.transform.transform import train_preprocess, test_preprocess
+from src.transform.schema import load_schema
+from src.transform.encoder import BINARY_MAP
+from src.train.train import make_model, fit_model, save_feature_importances
+from src.train.metrics import save_metrics
+from src.train.calibration import fit_calibrator
+from src.evaluate.evaluate import pipeline_evaluate
+from src.registry.registry import load_artifacts
+from synthetic import make_patients
+
+CONFIG_PATH = "../config/params.yaml"
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "latest.json")
+PATH_ARGS = ("baseline", "output")
+
+
+def measure(fn, repeat: int) -> float:
+    """
+    Медианное время выполнения функции
+    :param fn: функция без аргументов
+    :param repeat: количество повторов
+    :return: время в секундах
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def bench_config(config: dict, work_dir: str) -> dict:
+    """
+    Копия конфигурации, в которой артефакты пишутся во временную папку,
+    а не поверх рабочих
+    :param config: словарь с конфигурациями
+    :param work_dir: временная папка
+    :return: словарь с конфигурациями
+    """
+    config = json.loads(json.dumps(config))
+    paths = [
+        ("preprocessing", "schema_path"),
+        ("train", "model_path"),
+        ("train", "col_transform_path"),
+        ("train", "calibrator_path"),
+        ("train", "metrics_path"),
+        ("permutation_importances", "permutation_importances_path"),
+        ("permutation_importances", "grouped_importances_path"),
+        ("permutation_importances", "cache_path"),
+    ]
+    for section, key in paths:
+        config[section][key] = os.path.join(work_dir, os.path.basename(config[section][key]))
+    config["evaluate"]["model_engine"] = "sklearn"
+    return config
+
+
+def service_config(config: dict, work_dir: str) -> str:
+    """
+    Конфигурация сервиса, в которой версии модели и задачи обучения
+    пишутся во временную папку (артефакты рабочей модели только читаются)
+    :param config: словарь с конфигурациями
+    :param work_dir: временная папка
+    :return: путь до конфигурационного файла
+    """
+    config = json.loads(json.dumps(config))
+    config["serving"]["versions_dir"] = os.path.join(work_dir, "versions")
+    config["jobs"]["jobs_dir"] = os.path.join(work_dir, "jobs")
+    config_path = os.path.join(work_dir, "params.yaml")
+    with open(config_path, "w") as file:
+        yaml.safe_dump(config, file, allow_unicode=True)
+    return config_path
+
+
+def bench_size(
+    size: int, config: dict, raw_data: pd.DataFrame, schema: dict, args
+) -> dict:
+    """
+    Бенчмарки модулей на синтетических данных одного размера
+    :param size: количество строк
+    :param config: словарь с конфигурациями
+    :param raw_data: исходный датасет для генерации
+    :param schema: схема признаков train
+    :param args: аргументы командной строки
+    :return: словарь название -> результат
+    """
+    preproc = config["preprocessing"]
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    config = bench_config(config, work_dir)
+    config_path = os.path.join(work_dir, "params.yaml")
+    with open(config_path, "w") as file:
+        yaml.safe_dump(config, file, allow_unicode=True)
+
+    data = make_patients(
+        raw_data,
+        size,
+        schema,
+        preproc["scale_columns"],
+        preproc["map_change_columns"],
+    )
+    data_path = os.path.join(work_dir, "data.csv")
+    data.to_csv(data_path, index=False)
+
+    def record(name: str, seconds: float, rows: int) -> None:
+        results[f"{name}[{size}]"] = {"seconds": round(seconds, 6), "rows": rows}
+        print(f"{name:<28} {size:>8} rows={rows:<8} {seconds:.4f}s", flush=True)
+
+    record(
+        "get_dataset",
+        measure(
+            lambda: get_dataset(
+                data_path, drop_columns=preproc["drop_columns"], dtypes=preproc["dtypes"]
+            ),
+            args.repeat,
+        ),
+        size,
+    )
+    dataset = get_dataset(
+        data_path, drop_columns=preproc["drop_columns"], dtypes=preproc["dtypes"]
+    )
+
+    split = {}
+
+    def run_train_preprocess():
+        split["data"] = train_preprocess(dataset.copy(), **config)
+
+    record("train_preprocess", measure(run_train_preprocess, args.repeat), size)
+    X_train, X_test, y_train, y_test = split["data"]
+
+    # точный SVC обучается за O(n^2) - O(n^3): обучение и permutation
+    # importances считаются на подвыборке
+    n_train = min(len(X_train), args.max_train_rows)
+    X_fit, y_fit = X_train.iloc[:n_train], y_train.iloc[:n_train]
+    n_test = min(len(X_test), args.max_train_rows)
+    X_hold, y_hold = X_test.iloc[:n_test], y_test.iloc[:n_test]
+    with open(config["train"]["params_path"]) as json_file:
+        best_params = json.load(json_file)
+
+    calibrator = fit_calibrator(
+        X_fit,
+        y_fit,
+        estimator=make_model(best_params),
+        n_folds=config["train"]["n_folds"],
+        method=config["train"]["calibration_method"],
+        random_state=config["train"]["random_state"],
+    )
+    model = {}
+
+    def run_train_model():
+        # обучение и метрики на холдауте, как в pipeline_training
+        model["svc"] = fit_model(X_train=X_fit, y_train=y_fit, best_params=best_params)
+        save_metrics(
+            X_test=X_hold,
+            y_test=y_hold,
+            model=model["svc"],
+            calibrator=calibrator,
+            metric_path=config["train"]["metrics_path"],
+        )
+
+    record("train_model", measure(run_train_model, 1), n_train)
+    joblib.dump(model["svc"], config["train"]["model_path"])
+    joblib.dump(calibrator, config["train"]["calibrator_path"])
+
+    importances_config = {
+        **config["permutation_importances"],
+        "n_repeats": args.importance_repeats,
+        "cache_path": os.path.join(work_dir, "no_cache.json"),
+    }
+    record(
+        "save_feature_importances",
+        measure(
+            lambda: save_feature_importances(
+                model["svc"], X_hold, y_hold, **importances_config
+            ),
+            1,
+        ),
+        n_test,
+    )
+
+    artifacts = load_artifacts(config_path)
+    raw_test = data.drop(columns=preproc["target_column"])
+    record(
+        "test_preprocess",
+        measure(
+            lambda: test_preprocess(
+                raw_test,
+                schema=artifacts.schema,
+                column_transformer=artifacts.column_transformer,
+                **artifacts.config,
+            ),
+            args.repeat,
+        ),
+        size,
+    )
+    record(
+        "pipeline_evaluate_batch",
+        measure(
+            lambda: pipeline_evaluate(dataset=raw_test, artifacts=artifacts),
+            args.repeat,
+        ),
+        size,
+    )
+    single = raw_test.iloc[:1]
+    record(
+        "pipeline_evaluate_single",
+        measure(
+            lambda: pipeline_evaluate(dataset=single, artifacts=artifacts),
+            args.single_requests,
+        ),
+        1,
+    )
+    return results
+
+
+def patient_records(data: pd.DataFrame, config: dict, fields: dict) -> list:
+    """
+    Записи в формате Patient для /predict_input в том виде, в котором
+    их отправляет форма UI: названия категорий и Yes/No бинарных признаков
+    :param data: датасет в формате исходного файла
+    :param config: словарь с конфигурациями
+    :param fields: поля Patient (название -> тип)
+    :return: список словарей
+    """
+    preproc = config["preprocessing"]
+    answers = {code: answer for answer, code in BINARY_MAP.items()}
+    data = data.replace(preproc["map_change_columns"])
+    data = data.replace({column: answers for column in preproc["passthrough_columns"]})
+    records = []
+    for row in data[list(fields)].to_dict(orient="records"):
+        records.append(
+            {name: cast(row[name]) for name, cast in fields.items()}
+        )
+    return records
+
+
+def bench_service(
+    size: int, config: dict, raw_data: pd.DataFrame, schema: dict, args
+) -> dict:
+    """
+    Нагрузочный тест /predict_input и /predict внутри процесса (TestClient)
+    на рабочей модели сервиса (версии публикуются во временную папку)
+    :param size: количество строк в файле для /predict
+    :return: словарь название -> результат
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    os.environ["CONFIG_PATH"] = service_config(config, work_dir)
+    from fastapi.testclient import TestClient
+    import main
+
+    preproc = config["preprocessing"]
+    n_rows = min(size, args.max_request_rows)
+    data = make_patients(
+        raw_data,
+        max(n_rows, args.requests),
+        schema,
+        preproc["scale_columns"],
+        preproc["map_change_columns"],
+    )
+    fields = {
+        name: field.annotation for name, field in main.Patient.model_fields.items()
+    }
+    records = patient_records(data.iloc[: args.requests], config, fields)
+    data_path = os.path.join(work_dir, "data.csv")
+    data.iloc[:n_rows].drop(columns=preproc["target_column"]).to_csv(
+        data_path, index=False
+    )
+
+    results = {}
+    with TestClient(main.app) as client:
+
+        def post_input(record: dict) -> float:
+            start = time.perf_counter()
+            response = client.post("/predict_input", json=record)
+            assert response.status_code == 200, response.text
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            latencies = sorted(executor.map(post_input, records))
+        elapsed = time.perf_counter() - start
+        quantile = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+        results["predict_input_load"] = {
+            "seconds": round(elapsed, 6),
+            "rows": len(records),
+            "requests_per_second": round(len(records) / elapsed, 1),
+            "p50_seconds": round(quantile(0.5), 6),
+            "p99_seconds": round(quantile(0.99), 6),
+            "concurrency": args.concurrency,
+        }
+        print(f"predict_input_load           {results['predict_input_load']}", flush=True)
+
+        def post_file():
+            with open(data_path, "rb") as file:
+                response = client.post("/predict", files={"file": file})
+            assert response.status_code == 200, response.text
+
+        name = f"predict_file[{n_rows}]"
+        results[name] = {"seconds": round(measure(post_file, args.repeat), 6), "rows": n_rows}
+        print(f"{name:<28} {results[name]}", flush=True)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Сравнение с baseline
+    :param results: текущие результаты
+    :param baseline: сохраненные результаты
+    :param threshold: допустимое отношение времени к baseline
+    :return: список регрессий
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["seconds"] / max(baseline[name]["seconds"], 1e-9)
+        result["baseline_ratio"] = round(ratio, 3)
+        if ratio > threshold:
+            regressions.append(f"{name}: {ratio:.2f}x baseline")
+    return regressions
+
+
+def main(args) -> int:
+    os.chdir(BACKEND_DIR)
+    with open(CONFIG_PATH) as file:
+        config = yaml.load(file, Loader=yaml.FullLoader)
+    raw_data = pd.read_csv(config["preprocessing"]["raw_train_path"])
+    schema = load_schema(config["preprocessing"]["schema_path"])
+
+    results = {}
+    for size in args.sizes:
+        results.update(bench_size(size, config, raw_data, schema, args))
+    if not args.skip_service:
+        results.update(
+            bench_service(max(args.sizes), config, raw_data, schema, args)
+        )
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as json_file:
+            baseline = json.load(json_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        # пути - относительно корня репозитория (baseline хранится в git)
+        "args": {
+            key: os.path.relpath(value, REPO_DIR) if key in PATH_ARGS else value
+            for key, value in vars(args).items()
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+    output = args.baseline if args.save_baseline else args.output
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Результаты: {output}")
+
+    for regression in regressions:
+        print(f"РЕГРЕССИЯ {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--single-requests", type=int, default=50)
+    parser.add_argument("--max-train-rows", type=int, default=5000)
+    parser.add_argument("--importance-repeats", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-request-rows", type=int, default=100000)
+    parser.add_argument("--skip-service", action="store_true")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    sys.exit(main(parser.parse_args()))
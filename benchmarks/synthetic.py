@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+
+def make_synthetic(
+    data: pd.DataFrame,
+    n_rows: int,
+    scale_columns: list,
+    random_state: int = 42,
+    noise: float = 0.05,
+) -> pd.DataFrame:
+    """
+    Синтетический датасет заданного размера: строки исходных данных
+    выбираются с возвращением, к непрерывным признакам добавляется шум
+    в пределах их диапазона
+    :param data: исходный датасет
+    :param n_rows: количество строк
+    :param scale_columns: непрерывные признаки
+    :param random_state: random_state
+    :param noise: доля стандартного отклонения для шума
+    :return: датасет
+    """
+    rng = np.random.RandomState(random_state)
+    synthetic = data.iloc[rng.randint(0, len(data), n_rows)].reset_index(drop=True)
+    for column in scale_columns:
+        values = synthetic[column].to_numpy(dtype=np.float64)
+        values = values + rng.normal(0, noise * data[column].std(), n_rows)
+        values = np.clip(values, data[column].min(), data[column].max())
+        if pd.api.types.is_integer_dtype(data[column]):
+            values = np.round(values)
+        synthetic[column] = values.astype(data[column].dtype)
+    return synthetic
+
+
+def make_patients(
+    data: pd.DataFrame,
+    n_rows: int,
+    schema: dict,
+    scale_columns: list,
+    map_change_columns: dict,
+    random_state: int = 42,
+) -> pd.DataFrame:
+    """
+    Синтетические данные пациентов в формате исходного файла: значения
+    непрерывных признаков не выходят за диапазоны из схемы признаков train,
+    категориальные признаки принимают только значения из train
+    :param data: исходный датасет (raw train)
+    :param n_rows: количество строк
+    :param schema: схема признаков train
+    :param scale_columns: непрерывные признаки
+    :param map_change_columns: замена значений (код -> категория)
+    :param random_state: random_state
+    :return: датасет
+    """
+    synthetic = make_synthetic(data, n_rows, scale_columns, random_state=random_state)
+    synthetic["PatientID"] = np.arange(n_rows)
+
+    for column in schema["columns"]:
+        feature = schema["features"][column]
+        if column in scale_columns:
+            synthetic[column] = synthetic[column].clip(feature["min"], feature["max"])
+            continue
+        mapping = map_change_columns.get(column)
+        present = synthetic[column].map(mapping) if mapping else synthetic[column]
+        categories = set(feature["categories"])
+        assert set(present) <= categories, f"Значения {column} вне train"
+    return synthetic
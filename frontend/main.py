@@ -3,13 +3,15 @@ import yaml
 import streamlit as st
 import pandas as pd
 
-from src.data.get_data import get_data_selected_features
+from src.data.get_data import get_data_selected_features, load_eda
 from src.plotting.plots import barplot_norm_target, kde_and_boxplots
 from src.train.training import start_training, display_metrics, show_feature_importances
 
 from src.evaluate.evaluate import predict_from_input, predict_from_file
 
 CONFIG_PATH = "../config/params.yaml"
+# сколько строк загруженного файла читать для показа (весь файл разбирает backend)
+PREVIEW_ROWS = 1000
 
 
 def main_page():
@@ -75,8 +77,14 @@ def exploratory():
     with open(CONFIG_PATH) as file:
         config = yaml.load(file, Loader=yaml.FullLoader)
 
-    raw_path = config["preprocessing"]["raw_train_path"]
-    raw_data = pd.read_csv(raw_path)
+    # графики строятся по агрегатам, посчитанным при обучении
+    # (исходные данные не читаются)
+    eda_path = config["eda"]["eda_path"]
+    if not os.path.exists(eda_path):
+        st.error("Сначала обучите модель")
+        return
+    summary = load_eda(eda_path)
+    raw_data = pd.DataFrame(**summary["head"])
     data_disp = get_data_selected_features(raw_data, **config)
 
     # вывод датасета с отобранными признаками
@@ -93,56 +101,42 @@ def exploratory():
     behavior_target = st.sidebar.checkbox("Behavioral Problems and Diagnosis")
 
     if mmse_target:
-        st.pyplot(kde_and_boxplots(data=data_disp, column="MMSE", target="Diagnosis"))
+        st.pyplot(kde_and_boxplots(summary=summary, column="MMSE"))
         st.write(
             """У пациентов с болезнью Альцгеймера оценка MMSE ниже, чем у здоровых людей, \
                  что говорит о когнитивных нарушениях."""
         )
 
     if func_asses_target:
-        st.pyplot(
-            kde_and_boxplots(
-                data=data_disp, column="FunctionalAssessment", target="Diagnosis"
-            )
-        )
+        st.pyplot(kde_and_boxplots(summary=summary, column="FunctionalAssessment"))
         st.write(
             """У пациентов с болезнью Альцгеймера функциональная оценка ниже, \
                   чем у здоровых людей."""
         )
 
     if adl_target:
-        st.pyplot(kde_and_boxplots(data=data_disp, column="ADL", target="Diagnosis"))
+        st.pyplot(kde_and_boxplots(summary=summary, column="ADL"))
         st.write(
             """У пациентов с болезнью Альцгеймера оценка активности повседневной жизни ниже, \
                   чем у здоровых людей."""
         )
 
     if sleep_target:
-        st.pyplot(
-            kde_and_boxplots(data=data_disp, column="SleepQuality", target="Diagnosis")
-        )
+        st.pyplot(kde_and_boxplots(summary=summary, column="SleepQuality"))
         st.write(
             """У пациентов с болезнью Альцгеймера качество сна ниже, \
                   чем у здоровых людей."""
         )
 
     if memory_target:
-        st.pyplot(
-            barplot_norm_target(
-                data=data_disp, column="MemoryComplaints", target="Diagnosis"
-            )
-        )
+        st.pyplot(barplot_norm_target(summary=summary, column="MemoryComplaints"))
         st.write(
             """У пациентов с болезнью Альцгеймера чаще возникают жалобы на память, \
                   чем у здоровых людей."""
         )
 
     if behavior_target:
-        st.pyplot(
-            barplot_norm_target(
-                data=data_disp, column="BehavioralProblems", target="Diagnosis"
-            )
-        )
+        st.pyplot(barplot_norm_target(summary=summary, column="BehavioralProblems"))
         st.write(
             """У пациентов с болезнью Альцгеймера поведенческие нарушения возникают чаще, \
                   чем у здоровых людей."""
@@ -165,8 +159,9 @@ def training():
     tab1, tab2 = st.tabs(["Training", "Training results"])
 
     with tab1:
+        search = st.checkbox("Подобрать гиперпараметры")
         if st.button("Start training"):
-            start_training(config=config, endpoint=endpoint)
+            start_training(config=config, endpoint=endpoint, search=search)
     with tab2:
         # show metrics
         display_metrics(metrics_path)
@@ -182,11 +177,11 @@ def prediction_input():
     with open(CONFIG_PATH) as file:
         config = yaml.load(file, Loader=yaml.FullLoader)
     endpoint = config["endpoints"]["prediction_input"]
-    unique_data_path = config["preprocessing"]["unique_values_path"]
+    schema_path = config["preprocessing"]["schema_path"]
 
     # проверка на наличие сохраненной модели
     if os.path.exists(config["train"]["model_path"]):
-        predict_from_input(unique_data_path=unique_data_path, endpoint=endpoint)
+        predict_from_input(schema_path=schema_path, endpoint=endpoint)
     else:
         st.error("Сначала обучите модель")
 
@@ -198,14 +193,15 @@ def prediction_from_file():
     st.markdown("# Prediction")
     with open(CONFIG_PATH) as file:
         config = yaml.load(file, Loader=yaml.FullLoader)
-    endpoint = config["endpoints"]["prediction_from_file"]
+    endpoint = config["endpoints"]["prediction_stream"]
 
     upload_file = st.file_uploader(
         "", type=["csv", "xlsx"], accept_multiple_files=False
     )
     # проверка загружен ли файл
     if upload_file:
-        raw_data = pd.read_csv(upload_file)
+        raw_data = pd.read_csv(upload_file, nrows=PREVIEW_ROWS)
+        upload_file.seek(0)
         data_disp = get_data_selected_features(raw_data, **config)
         st.write(data_disp.head())
         # проверка на наличие сохраненной модели
@@ -1,4 +1,8 @@
+import os
+import json
+import hashlib
 import pandas as pd
+import streamlit as st
 
 
 def get_data_selected_features(
@@ -17,3 +21,48 @@ def get_data_selected_features(
     data.replace(preproc["map_change_columns"], inplace=True)
 
     return data
+
+
+@st.cache_data
+def read_schema(schema_path: str, modified: float) -> dict:
+    """
+    Чтение схемы признаков (кэшируется до изменения файла)
+    :param schema_path: путь до схемы признаков train
+    :param modified: время изменения файла (часть ключа кэша)
+    :return: словарь со схемой
+    """
+    with open(schema_path) as file:
+        return json.load(file)
+
+
+def load_schema(schema_path: str) -> dict:
+    """
+    Схема признаков train: порядок, типы, диапазоны, квантили и категории
+    :param schema_path: путь до схемы признаков train
+    :return: словарь со схемой
+    """
+    return read_schema(schema_path, os.path.getmtime(schema_path))
+
+
+@st.cache_data
+def read_eda(eda_path: str, digest: str) -> dict:
+    """
+    Чтение агрегатов для страницы EDA (кэшируется до изменения файла)
+    :param eda_path: путь до файла с агрегатами
+    :param digest: хэш содержимого файла (часть ключа кэша)
+    :return: словарь с агрегатами
+    """
+    with open(eda_path) as file:
+        return json.load(file)
+
+
+def load_eda(eda_path: str) -> dict:
+    """
+    Агрегаты, посчитанные при обучении: плотности и boxplot числовых
+    признаков, нормированные таблицы сопряженности, первые строки датасета
+    :param eda_path: путь до файла с агрегатами
+    :return: словарь с агрегатами
+    """
+    with open(eda_path, "rb") as file:
+        digest = hashlib.md5(file.read()).hexdigest()
+    return read_eda(eda_path, digest)
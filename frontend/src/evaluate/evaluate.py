@@ -1,28 +1,33 @@
-import json
 import pandas as pd
 import requests
 import streamlit as st
 
+from ..data.get_data import load_schema
 
-def predict_from_input(unique_data_path: str, endpoint: str) -> None:
+# количество строк с ошибками в данных, показываемых в UI
+PREVIEW_ERRORS = 20
+
+
+def predict_from_input(schema_path: str, endpoint: str) -> None:
     """
     Получение входных данных путем ввода в UI -> вывод результата
-    :param unique_data_path: путь до json c уникальными значениями
+    :param schema_path: путь до схемы признаков train
     :param endpoint: endpoint
     """
-
-    with open(unique_data_path) as file:
-        unique_data = json.load(file)
+    # диапазоны и категории признаков из схемы train
+    features = load_schema(schema_path)["features"]
     # делаем поля для ввода данных вручную:
     age = st.sidebar.slider(
-        "Age", min_value=min(unique_data["Age"]), max_value=max(unique_data["Age"])
+        "Age", min_value=features["Age"]["min"], max_value=features["Age"]["max"]
+    )
+    ethnicity = st.sidebar.selectbox(
+        "Ethnicity", features["Ethnicity"]["categories"]
     )
-    ethnicity = st.sidebar.selectbox("Ethnicity", unique_data["Ethnicity"])
     smoking = st.sidebar.selectbox("Smoking", ["Yes", "No"])
     sleep_quality = st.sidebar.slider(
         "Sleep quality",
-        min_value=min(unique_data["SleepQuality"]),
-        max_value=max(unique_data["SleepQuality"]),
+        min_value=features["SleepQuality"]["min"],
+        max_value=features["SleepQuality"]["max"],
     )
     fam_hist_alz = st.sidebar.selectbox("Family history Alzheimer's", ["Yes", "No"])
     cardovasc_dis = st.sidebar.selectbox("Cardiovascular disease", ["Yes", "No"])
@@ -31,31 +36,31 @@ def predict_from_input(unique_data_path: str, endpoint: str) -> None:
     hypertension = st.sidebar.selectbox("Hypertension", ["Yes", "No"])
     systolic_bp = st.sidebar.slider(
         "Systolic blood pressure",
-        min_value=min(unique_data["SystolicBP"]),
-        max_value=max(unique_data["SystolicBP"]),
+        min_value=features["SystolicBP"]["min"],
+        max_value=features["SystolicBP"]["max"],
     )
     cholesterol_ldl = st.sidebar.slider(
         "Cholesterol LDL",
-        min_value=min(unique_data["CholesterolLDL"]),
-        max_value=max(unique_data["CholesterolLDL"]),
+        min_value=features["CholesterolLDL"]["min"],
+        max_value=features["CholesterolLDL"]["max"],
     )
     cholesterol_hdl = st.sidebar.slider(
         "Cholesterol HDL",
-        min_value=min(unique_data["CholesterolHDL"]),
-        max_value=max(unique_data["CholesterolHDL"]),
+        min_value=features["CholesterolHDL"]["min"],
+        max_value=features["CholesterolHDL"]["max"],
     )
     mmse = st.sidebar.slider(
-        "MMSE", min_value=min(unique_data["MMSE"]), max_value=max(unique_data["MMSE"])
+        "MMSE", min_value=features["MMSE"]["min"], max_value=features["MMSE"]["max"]
     )
     func_asses = st.sidebar.slider(
         "Functional assessment",
-        min_value=min(unique_data["FunctionalAssessment"]),
-        max_value=max(unique_data["FunctionalAssessment"]),
+        min_value=features["FunctionalAssessment"]["min"],
+        max_value=features["FunctionalAssessment"]["max"],
     )
     memory_complaints = st.sidebar.selectbox("Memory complaints", ["Yes", "No"])
     behavioral_problems = st.sidebar.selectbox("Behavioral problems", ["Yes", "No"])
     adl = st.sidebar.slider(
-        "ADL", min_value=min(unique_data["ADL"]), max_value=max(unique_data["ADL"])
+        "ADL", min_value=features["ADL"]["min"], max_value=features["ADL"]["max"]
     )
     confusion = st.sidebar.selectbox("Confusion", ["Yes", "No"])
     personality_changes = st.sidebar.selectbox("Personality changes", ["Yes", "No"])
@@ -88,12 +93,16 @@ def predict_from_input(unique_data_path: str, endpoint: str) -> None:
 
     # evaluate and return prediction (text)
     if st.button("Predict"):
-        result = requests.post(endpoint, timeout=5000, json=data_dict)
+        result = requests.post(
+            endpoint, timeout=5000, json=data_dict, params={"scores": True}
+        )
         try:
-            if int(result.text) == 1:
+            result = result.json()
+            if int(result["prediction"]) == 1:
                 st.write("## The patient might have Alzheimer's disease")
-            elif int(result.text) == 0:
+            elif int(result["prediction"]) == 0:
                 st.write("## The patient probably does not have Alzheimer's disease")
+            st.write(f"Вероятность болезни: {result['probability']:.1%}")
             st.success("Success!")
         except:
             st.write("## Error")
@@ -102,15 +111,40 @@ def predict_from_input(unique_data_path: str, endpoint: str) -> None:
 def predict_from_file(file: object, data: pd.DataFrame, endpoint: str) -> None:
     """
     Получение входных данных в качестве файла -> вывод результата в виде таблицы
-    :param data: датасет
-    :param endpoint: endpoint
-    :param files:
+    :param file: загруженный файл
+    :param data: первые строки датасета для показа
+    :param endpoint: endpoint потокового предсказания
     """
     if st.button("Predict"):
-        # заглушка так как не выводим все предсказания
-        data_ = data[:5]
-        files = {"file": file.getvalue()}
-        output = requests.post(endpoint, files=files, timeout=5000)
-        result = json.loads(output.text)
-        data_["predict"] = result["prediction"]
-        st.write(data_.head())
+        # файл отправляется телом запроса частями, без копии в памяти
+        output = requests.post(
+            endpoint,
+            data=file,
+            headers={"Content-Type": "text/csv"},
+            params={"output_format": "csv"},
+            timeout=5000,
+            stream=True,
+        )
+        if output.status_code != 200:
+            st.error(f"Ошибка предсказания: {output.text}")
+            return
+        # предсказания приходят построчно в формате csv, у строк с ошибками
+        # в значениях признаков - пустое предсказание и список ошибок
+        output.raw.decode_content = True
+        predictions = pd.read_csv(
+            output.raw, index_col="row", dtype={"prediction": "Int8"}
+        )
+        data_ = data.copy()
+        data_["predict"] = predictions["prediction"].iloc[: len(data_)].to_numpy()
+        st.write(data_)
+        st.write(f"Всего предсказаний: {predictions['prediction'].count()}")
+        if "errors" in predictions and predictions["errors"].notna().any():
+            invalid = predictions[predictions["errors"].notna()]
+            st.warning(f"Строк с ошибками в данных (без предсказания): {len(invalid)}")
+            st.write(invalid[["errors"]].head(PREVIEW_ERRORS))
+        st.download_button(
+            "Скачать предсказания",
+            predictions.to_csv(),
+            file_name="predictions.csv",
+            mime="text/csv",
+        )
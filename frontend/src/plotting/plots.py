@@ -10,41 +10,54 @@ labels_for_plots = {
 }
 
 
-def kde_and_boxplots(
-    data: pd.DataFrame, column: str, target: str
-) -> matplotlib.figure.Figure:
+def kde_and_boxplots(summary: dict, column: str) -> matplotlib.figure.Figure:
     """
-    Отрисовка boxplot и kdeplot для числовых признаков
-    :param data: датасет
+    Отрисовка boxplot и kdeplot для числовых признаков по агрегатам,
+    посчитанным при обучении (плотности и статистики boxplot по классам)
+    :param summary: агрегаты для страницы EDA
     :param column: признак, анализируемый в разрезе целевой переменной
-    :param target: целевая переменная
     :return: поле рисунка
     """
+    target = summary["target"]
+    feature = summary["numeric"][column]
+    labels = list(feature["classes"])
+    colors = sns.color_palette("rocket", len(labels))
+
     fig, axes = plt.subplots(ncols=2, figsize=(11, 6))
-    sns.kdeplot(
-        data, x=column, hue=target, palette="rocket", common_norm=False, ax=axes[0]
-    )
+    for label, color in zip(labels, colors):
+        density = feature["classes"][label]["density"]
+        axes[0].plot(feature["grid"], density, color=color, label=label)
+    axes[0].set_xlabel(column)
+    axes[0].set_ylabel("Density")
+    axes[0].legend(title=target)
 
-    sns.boxplot(
-        data, y=column, x=target, legend=False, palette="rocket", hue=target, ax=axes[1]
-    )
+    boxes = [{**feature["classes"][label]["box"], "label": label} for label in labels]
+    artists = axes[1].bxp(boxes, positions=range(len(labels)), patch_artist=True)
+    for patch, color in zip(artists["boxes"], colors):
+        patch.set_facecolor(color)
+    for median in artists["medians"]:
+        median.set_color("black")
+    axes[1].set_xlabel(target)
+    axes[1].set_ylabel(column)
     plt.suptitle(f"{column} - Diagnosis", fontsize=15)
 
     return fig
 
 
 def barplot_norm_target(
-    data: pd.DataFrame, column: str, target: str, labels: dict = labels_for_plots
+    summary: dict, column: str, labels: dict = labels_for_plots
 ) -> matplotlib.figure.Figure:
     """
     Построение barplot с нормированными данными с выводом значений на графике
+    (по таблице сопряженности, посчитанной при обучении)
     """
-    norm_target = (
-        data.groupby(target)[column]
-        .value_counts(normalize=True)
-        .mul(100)
-        .rename("percent")
-        .reset_index()
+    target = summary["target"]
+    norm_target = pd.DataFrame(
+        [
+            {target: label, column: value, "percent": percent}
+            for label, percents in summary["categorical"][column].items()
+            for value, percent in percents.items()
+        ]
     )
     fig = plt.figure(figsize=(7, 6))
     ax = sns.barplot(
@@ -85,3 +98,22 @@ def plot_feature_importances(perm_path: str) -> matplotlib.figure.Figure:
     plt.title("Значимость признаков (Permutation importance)")
 
     return fig
+
+
+def plot_metrics_intervals(metrics: dict) -> matplotlib.figure.Figure:
+    """
+    Отрисовка метрик с бутстрэп доверительными интервалами
+    :param metrics: словарь с метриками и интервалами
+    """
+    names = list(metrics["intervals"])
+    values = [metrics[name] for name in names]
+    errors = [
+        [value - metrics["intervals"][name][0] for name, value in zip(names, values)],
+        [metrics["intervals"][name][1] - value for name, value in zip(names, values)],
+    ]
+    fig = plt.figure(figsize=(7, 4))
+    plt.errorbar(names, values, yerr=errors, fmt="o", capsize=6, color="teal")
+    plt.title(f"Метрики, {metrics['confidence']:.0%} доверительные интервалы")
+    plt.grid(axis="y", alpha=0.3)
+
+    return fig
@@ -1,21 +1,38 @@
 import os
 import json
+import time
 import requests
 import streamlit as st
 
-from ..plotting.plots import plot_feature_importances
+from ..plotting.plots import plot_feature_importances, plot_metrics_intervals
 
 
-def start_training(config: dict, endpoint: object) -> None:
+def start_training(
+    config: dict, endpoint: object, search: bool = False, poll_interval: float = 2.0
+) -> None:
     """
-    Тренировка модели
+    Тренировка модели: запуск фоновой задачи и ожидание ее завершения
     :param config: конфигурационный файл
     :param endpoint: endpoint
+    :param search: подбирать ли гиперпараметры перед обучением
+    :param poll_interval: период опроса статуса задачи в секундах
     """
     # Train
-    with st.spinner("Модель подбирает параметры..."):
-        requests.post(endpoint, timeout=5000)
-    st.success("Success!")
+    job = requests.post(endpoint, params={"search": search}, timeout=60).json()
+    progress_bar = st.progress(0.0, text="Модель в очереди на обучение...")
+
+    while job["status"] in ("queued", "running"):
+        time.sleep(poll_interval)
+        job = requests.get(f"{endpoint}/{job['job_id']}", timeout=60).json()
+        progress_bar.progress(
+            job["progress"],
+            text=f"Этап: {job['stage'] or 'queued'}, прошло {job['elapsed']:.0f} с",
+        )
+
+    if job["status"] == "done":
+        st.success(f"Success! Версия модели: {job.get('version')}")
+    else:
+        st.error(f"Обучение завершилось с ошибкой: {job.get('error')}")
 
 
 def display_metrics(metrics_path: str) -> None:
@@ -26,12 +43,25 @@ def display_metrics(metrics_path: str) -> None:
     if os.path.exists(metrics_path):
         with open(metrics_path) as json_file:
             metrics = json.load(json_file)
-        roc_auc, precision, recall, f1_metric, logloss = st.columns(5)
-        roc_auc.metric("ROC-AUC", metrics["roc_auc"])
-        precision.metric("Precision", metrics["precision"])
-        recall.metric("Recall", metrics["recall"])
-        f1_metric.metric("F1 score", metrics["f1"])
-        logloss.metric("Logloss", metrics["logloss"])
+        intervals = metrics.get("intervals", {})
+        labels = {
+            "roc_auc": "ROC-AUC",
+            "precision": "Precision",
+            "recall": "Recall",
+            "f1": "F1 score",
+            "logloss": "Logloss",
+        }
+        for column, (name, label) in zip(st.columns(len(labels)), labels.items()):
+            interval = intervals.get(name)
+            column.metric(
+                label,
+                metrics[name],
+                help=f"Доверительный интервал: {interval[0]} – {interval[1]}"
+                if interval
+                else None,
+            )
+        if intervals:
+            st.pyplot(plot_metrics_intervals(metrics))
     else:
         st.write("Train model first")
 